@@ -0,0 +1,90 @@
+
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.19;
+
+import "@openzeppelin/contracts/access/Ownable.sol";
+import "@openzeppelin/contracts/security/ReentrancyGuard.sol";
+import "@openzeppelin/contracts/utils/cryptography/MerkleProof.sol";
+
+interface IFixieToken {
+    function mintWorkoutReward(address to, uint256 amount, string calldata reason) external;
+    function minters(address minter) external view returns (bool);
+    function DAILY_EMISSION_LIMIT() external view returns (uint256);
+}
+
+/**
+ * @title FixieRewardDistributor
+ * @dev Pays out daily reward epochs from published Merkle roots.
+ * Leaves are keccak256(bytes.concat(keccak256(abi.encode(user, amount, epoch)))),
+ * one per user and epoch, verified with MerkleProof (sorted pairs); roots come
+ * from reward_merkle.py, whose tree layout differs from the JS
+ * StandardMerkleTree's. Rewards are minted when claimed; an epoch's total is
+ * capped at the token's DAILY_EMISSION_LIMIT.
+ * Replaces WorkoutValidator's per-workout mints: epochs can only be published
+ * while the validator is not a FixieToken minter, so no reward is paid twice.
+ */
+contract FixieRewardDistributor is Ownable, ReentrancyGuard {
+    IFixieToken public immutable fixieToken;
+    address public immutable workoutValidator;
+
+    mapping(address => bool) public publishers;
+    mapping(uint256 => bytes32) public epochRoots; // epoch (day) => Merkle root
+    mapping(uint256 => mapping(address => bool)) public claimed;
+
+    event PublisherUpdated(address indexed publisher, bool allowed);
+    event EpochPublished(uint256 indexed epoch, bytes32 root, uint256 total, uint256 leaves);
+    event RewardClaimed(uint256 indexed epoch, address indexed user, uint256 amount);
+
+    constructor(address _fixieToken, address _workoutValidator) {
+        fixieToken = IFixieToken(_fixieToken);
+        workoutValidator = _workoutValidator;
+    }
+
+    function setPublisher(address _publisher, bool allowed) external onlyOwner {
+        publishers[_publisher] = allowed;
+        emit PublisherUpdated(_publisher, allowed);
+    }
+
+    function publishEpoch(uint256 epoch, bytes32 root, uint256 total, uint256 leaves) external {
+        require(publishers[msg.sender] || msg.sender == owner(), "Not authorized publisher");
+        require(epoch < block.timestamp / 1 days, "Epoch not finished");
+        require(epochRoots[epoch] == bytes32(0), "Epoch already published");
+        require(root != bytes32(0), "Empty root");
+        require(!fixieToken.minters(workoutValidator), "Validator still mints rewards");
+        require(total <= fixieToken.DAILY_EMISSION_LIMIT(), "Epoch exceeds daily emission limit");
+
+        epochRoots[epoch] = root;
+        emit EpochPublished(epoch, root, total, leaves);
+    }
+
+    function claim(address user, uint256 epoch, uint256 amount, bytes32[] calldata proof) external nonReentrant {
+        _verifyClaim(user, epoch, amount, proof);
+        fixieToken.mintWorkoutReward(user, amount, "Epoch Reward");
+    }
+
+    function claimMany(
+        address user,
+        uint256[] calldata epochs,
+        uint256[] calldata amounts,
+        bytes32[][] calldata proofs
+    ) external nonReentrant {
+        require(epochs.length == amounts.length && epochs.length == proofs.length, "Length mismatch");
+
+        uint256 total = 0;
+        for (uint256 i = 0; i < epochs.length; ) {
+            _verifyClaim(user, epochs[i], amounts[i], proofs[i]);
+            total += amounts[i];
+            unchecked { ++i; }
+        }
+        fixieToken.mintWorkoutReward(user, total, "Epoch Reward");
+    }
+
+    function _verifyClaim(address user, uint256 epoch, uint256 amount, bytes32[] calldata proof) private {
+        require(!claimed[epoch][user], "Already claimed");
+        bytes32 leaf = keccak256(bytes.concat(keccak256(abi.encode(user, amount, epoch))));
+        require(MerkleProof.verifyCalldata(proof, epochRoots[epoch], leaf), "Invalid proof");
+
+        claimed[epoch][user] = true;
+        emit RewardClaimed(epoch, user, amount);
+    }
+}
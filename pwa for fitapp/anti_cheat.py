@@ -0,0 +1,235 @@
+# Vectorized anti-cheat stage in front of validateWorkout
+# Scores whole batches of GPS tracks at once ("Fraud detection for activity
+# tracking" in script.py). Tracks are packed CSR-style (one flat array of
+# points plus offsets) and every check is an array op over all segments of
+# the batch, reduced per track with bincount:
+#   - GPS teleports: steps faster than any human-powered movement (or moves
+#     under a repeated timestamp), more of them or over more distance than
+#     one GPS glitch accounts for
+#   - speeds impossible for the claimed workoutType
+#   - perfectly constant pace (scripted or replayed-at-fixed-speed tracks)
+#   - route geometry duplicated from an earlier track (among the last
+#     ROUTE_CACHE_SIZE distinct routes, least recently seen evicted first)
+
+import hashlib
+import sys
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+
+from fixie_rules import WORKOUT_CYCLING, WORKOUT_RUNNING, WORKOUT_TYPES, WORKOUT_WALKING
+from gps_ingest import haversine
+from reward_engine import workout_type_codes
+
+TELEPORT = 1
+IMPOSSIBLE_SPEED = 2
+CONSTANT_PACE = 4
+DUPLICATE_ROUTE = 8
+REASONS = {TELEPORT: "teleport", IMPOSSIBLE_SPEED: "impossible speed",
+           CONSTANT_PACE: "constant pace", DUPLICATE_ROUTE: "duplicate route"}
+
+TELEPORT_KMH = 150.0
+MIN_TELEPORT_STEPS = 3  # a single glitch (out and back) is two fast steps
+MIN_TELEPORT_M = 2_000.0  # ...unless the fast steps together cover this much
+STILL_M = 5.0  # displacement under a repeated timestamp that is just jitter
+# Sustained (95th percentile) speed no athlete reaches for each workoutType
+MAX_P95_KMH = {WORKOUT_RUNNING: 30.0, WORKOUT_CYCLING: 75.0, WORKOUT_WALKING: 12.0}
+MIN_PACE_CV = 0.01  # std / mean of step speed below this is machine-made
+MIN_STEPS_FOR_PACE = 60
+GRID_DEG = 1e-4  # ~11 m; route fingerprints are taken on this grid
+ROUTE_CACHE_SIZE = 1 << 20  # distinct route fingerprints kept, LRU
+
+_MAX_P95 = np.array([MAX_P95_KMH[code] for code in range(len(WORKOUT_TYPES))])
+_SPEED_SPAN = 1024.0  # km/h; step speeds are clipped here for the percentile sort
+
+
+@dataclass
+class TrackBatch:
+    lat: np.ndarray
+    lon: np.ndarray
+    time: np.ndarray
+    offsets: np.ndarray  # track i is [offsets[i], offsets[i + 1])
+    workout_type: np.ndarray  # WORKOUT_* codes
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    @classmethod
+    def from_tracks(cls, tracks, workout_types):
+        # tracks: iterable of (lat, lon, time) arrays
+        tracks = list(tracks)
+        lengths = [len(lat) for lat, _, _ in tracks]
+        offsets = np.zeros(len(tracks) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+
+        def flat(i):
+            return np.concatenate([np.asarray(t[i], dtype=np.float64) for t in tracks]) if tracks else np.zeros(0)
+
+        return cls(flat(0), flat(1), flat(2), offsets, workout_type_codes(workout_types))
+
+
+@dataclass
+class FraudScores:
+    reasons: np.ndarray  # bitmask of TELEPORT | IMPOSSIBLE_SPEED | ...
+    score: np.ndarray  # 0..1
+    teleports: np.ndarray
+    p95_speed_kmh: np.ndarray
+    pace_cv: np.ndarray
+    duplicate_of: np.ndarray  # fingerprint index of the first track seen with this route, or -1
+
+    def flagged(self, threshold=0.5):
+        return self.score >= threshold
+
+    def explain(self, i):
+        return [name for bit, name in REASONS.items() if self.reasons[i] & bit]
+
+
+_WEIGHTS = {TELEPORT: 0.6, IMPOSSIBLE_SPEED: 0.6, CONSTANT_PACE: 0.5, DUPLICATE_ROUTE: 0.8}
+
+
+class FraudScorer:
+    def __init__(self, max_routes=ROUTE_CACHE_SIZE):
+        # Route fingerprints seen so far -> running index, across batches;
+        # bounded so a long-running validator_daemon does not grow forever
+        self.max_routes = max_routes
+        self.seen_routes = OrderedDict()
+        self._next_route = 0
+
+    def score(self, batch):
+        n_tracks = len(batch)
+        counts = np.diff(batch.offsets)
+        n_points = len(batch.lat)
+
+        # Segment i joins point i and i + 1; drop the ones that straddle tracks
+        track_of_point = np.repeat(np.arange(n_tracks), counts)
+        same_track = track_of_point[1:] == track_of_point[:-1]
+        seg_track = track_of_point[1:][same_track]
+        dist = haversine(batch.lat[:-1], batch.lon[:-1], batch.lat[1:], batch.lon[1:])[same_track]
+        dt = np.diff(batch.time)[same_track]
+        timed = dt > 0
+
+        # A move under a repeated or backwards timestamp is an infinitely fast step
+        fast = np.where(timed, dist > TELEPORT_KMH / 3.6 * dt, dist > STILL_M)
+        teleports = np.bincount(seg_track, weights=fast, minlength=n_tracks).astype(np.int64)
+        teleport_m = np.bincount(seg_track, weights=dist * fast, minlength=n_tracks)
+
+        seg_track = seg_track[timed]
+        speed = dist[timed] / dt[timed] * 3.6
+        steps = np.bincount(seg_track, minlength=n_tracks)
+
+        # 95th percentile speed per track: one flat sort on track * SPAN +
+        # speed (cheaper than a lexsort), then index into each track's run
+        key = seg_track * _SPEED_SPAN + np.minimum(speed, _SPEED_SPAN - 1)
+        key.sort()
+        starts = np.concatenate(([0], np.cumsum(steps)[:-1]))
+        p95_pos = np.minimum(starts + np.maximum(np.ceil(steps * 0.95).astype(np.int64) - 1, 0), len(key) - 1)
+        p95 = np.where(steps > 0, key[p95_pos] - np.arange(n_tracks) * _SPEED_SPAN if len(key) else 0.0, 0.0)
+
+        # Constant pace: coefficient of variation of step speed
+        total = np.bincount(seg_track, weights=speed, minlength=n_tracks)
+        total_sq = np.bincount(seg_track, weights=speed * speed, minlength=n_tracks)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = total / steps
+            cv = np.sqrt(np.maximum(total_sq / steps - mean * mean, 0.0)) / mean
+        cv = np.nan_to_num(cv, nan=np.inf)
+
+        reasons = np.zeros(n_tracks, dtype=np.int64)
+        reasons[(teleports >= MIN_TELEPORT_STEPS) | (teleport_m >= MIN_TELEPORT_M)] |= TELEPORT
+        reasons[p95 > _MAX_P95[batch.workout_type]] |= IMPOSSIBLE_SPEED
+        reasons[(steps >= MIN_STEPS_FOR_PACE) & (cv < MIN_PACE_CV)] |= CONSTANT_PACE
+
+        duplicate_of = self._duplicates(batch, n_points)
+        reasons[duplicate_of >= 0] |= DUPLICATE_ROUTE
+
+        score = np.zeros(n_tracks)
+        for bit, weight in _WEIGHTS.items():
+            # Independent evidence combines like probabilities
+            score = 1 - (1 - score) * (1 - weight * ((reasons & bit) > 0))
+        return FraudScores(reasons, score, teleports, p95, cv, duplicate_of)
+
+    def _duplicates(self, batch, n_points):
+        # Fingerprint = hash of the track snapped to GRID_DEG with consecutive
+        # repeats removed, so a replay with new timestamps or resampling at a
+        # different rate along the same path still matches
+        grid = np.empty((n_points, 2), dtype=np.int32)
+        grid[:, 0] = np.round(batch.lat / GRID_DEG)
+        grid[:, 1] = np.round(batch.lon / GRID_DEG)
+        moved = np.ones(n_points, dtype=bool)
+        moved[1:] = (grid[1:] != grid[:-1]).any(axis=1)
+        moved[batch.offsets[:-1][np.diff(batch.offsets) > 0]] = True
+
+        path = grid[moved].tobytes()
+        path_offsets = np.concatenate(([0], np.cumsum(moved)))[batch.offsets]
+
+        duplicate_of = np.full(len(batch), -1, dtype=np.int64)
+        for i in range(len(batch)):
+            lo, hi = path_offsets[i], path_offsets[i + 1]
+            if hi - lo < 2:
+                continue
+            digest = hashlib.blake2b(path[lo * 8:hi * 8], digest_size=16).digest()
+            route = self.seen_routes.get(digest)
+            if route is not None:
+                duplicate_of[i] = route
+                self.seen_routes.move_to_end(digest)
+                continue
+            self.seen_routes[digest] = self._next_route
+            self._next_route += 1
+            if len(self.seen_routes) > self.max_routes:
+                self.seen_routes.popitem(last=False)
+        return duplicate_of
+
+
+if __name__ == "__main__":
+    print("=== FIXIE ANTI-CHEAT SCORER ===")
+    print()
+
+    rng = np.random.default_rng(0)
+    n_tracks = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    points = 1800  # 30 min at 1 Hz
+    tracks = []
+    types = []
+    for i in range(n_tracks):
+        kind = i % 10
+        workout_type = ("running", "cycling", "walking")[i % 3]
+        kmh = {"running": 11.0, "cycling": 24.0, "walking": 5.0}[workout_type]
+        step = kmh / 3.6 / 111_320 * (1 + rng.normal(0, 0.15, points))
+        if kind == 1:  # scripted constant pace
+            step = np.full(points, kmh / 3.6 / 111_320)
+        if kind == 2 and workout_type == "running":  # motorbike "run"
+            step = step * 5
+        heading = np.cumsum(rng.normal(0, 0.05, points))
+        lat = 48.85 + rng.random() * 0.1 + np.cumsum(np.cos(heading) * step)
+        lon = 2.35 + rng.random() * 0.1 + np.cumsum(np.sin(heading) * step) / np.cos(np.radians(48.9))
+        if kind == 3:  # teleport
+            lat[points // 2:] += 0.05
+        if kind == 5:  # one GPS glitch, ~300 m out and back: not a teleport
+            lat[points // 3] += 0.003
+        t = 1_700_000_000 + i * 7 + np.arange(points, dtype=np.float64)
+        if kind == 6:  # teleport under a repeated timestamp
+            lat[points // 2:] += 0.05
+            t[points // 2] = t[points // 2 - 1]
+        if kind == 4 and tracks:  # replay of the previous track with new timestamps
+            lat, lon = tracks[-1][0], tracks[-1][1]
+        tracks.append((lat, lon, t))
+        types.append(workout_type)
+
+    batch = TrackBatch.from_tracks(tracks, types)
+    scorer = FraudScorer()
+    start = time.perf_counter()
+    scores = scorer.score(batch)
+    elapsed = time.perf_counter() - start
+    print(f"Scored {n_tracks:,} tracks ({len(batch.lat):,} points) in {elapsed:.2f}s "
+          f"({n_tracks / elapsed:,.0f} tracks/s)")
+    for bit, name in REASONS.items():
+        print(f"  {name:<17} {int(np.count_nonzero(scores.reasons & bit)):,}")
+    print(f"  flagged (score >= 0.5): {int(scores.flagged().sum()):,}")
+    print(f"Route fingerprints kept: {len(scorer.seen_routes):,} (max {scorer.max_routes:,})")
+
+    # A bounded scorer forgets old routes but still catches a fresh replay
+    small = FraudScorer(max_routes=100)
+    for lo in range(0, min(n_tracks, 5000), 1000):
+        small_scores = small.score(TrackBatch.from_tracks(tracks[lo:lo + 1000], types[lo:lo + 1000]))
+    assert len(small.seen_routes) <= 100
+    assert (small_scores.reasons & DUPLICATE_ROUTE).any()
@@ -0,0 +1,92 @@
+# Incremental, atomic writer for generated files
+# script_1.py regenerates the contracts, deploy script and Hardhat config on
+# every run. Rewriting an unchanged file still bumps its mtime, which is
+# enough for Hardhat to drop its compile cache and rebuild every contract.
+# write_if_changed() compares SHA-256 digests of the new and the current
+# content and leaves identical files untouched. Changed files are written to
+# a temporary file in the same directory, fsynced and renamed over the
+# target, so a crash or a concurrent compile never sees a half-written file.
+
+import contextlib
+import hashlib
+import os
+import sys
+import tempfile
+import time
+
+
+def digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_digest(path):
+    try:
+        with open(path, "rb") as f:
+            return digest(f.read())
+    except FileNotFoundError:
+        return None
+
+
+def _default_mode():
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+@contextlib.contextmanager
+def open_atomic(path, mode=None):
+    # Binary file object that replaces `path` only when the block completes;
+    # keeps the mode of an existing file
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    if mode is None:
+        try:
+            mode = os.stat(path).st_mode & 0o777
+        except FileNotFoundError:
+            mode = _default_mode()
+    fd, partial = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(partial, mode)
+        os.replace(partial, path)
+    except BaseException:
+        os.unlink(partial)
+        raise
+
+
+def write_if_changed(path, content):
+    # Returns True if the file was (re)written
+    data = content.encode() if isinstance(content, str) else content
+    if file_digest(path) == digest(data):
+        return False
+    with open_atomic(path) as f:
+        f.write(data)
+    return True
+
+
+def write_artifacts(files, out_dir="."):
+    # files: {relative path: content}. Returns (written, unchanged) path lists
+    written, unchanged = [], []
+    for name, content in files.items():
+        path = os.path.join(out_dir, name)
+        (written if write_if_changed(path, content) else unchanged).append(path)
+    return written, unchanged
+
+
+if __name__ == "__main__":
+    print("=== FIXIE INCREMENTAL ARTIFACT WRITER ===")
+    print()
+
+    out_dir = sys.argv[1] if len(sys.argv) > 1 else tempfile.mkdtemp(prefix="fixie-artifacts-")
+    files = {f"Contract{i}.sol": f"// SPDX-License-Identifier: MIT\ncontract C{i} {{}}\n" * 200 for i in range(50)}
+    for label in ("first run", "no changes", "one edit"):
+        if label == "one edit":
+            files["Contract7.sol"] += "// edited\n"
+        start = time.perf_counter()
+        written, unchanged = write_artifacts(files, out_dir)
+        elapsed = time.perf_counter() - start
+        print(f"{label:<11} {len(written):3d} written, {len(unchanged):3d} unchanged in {elapsed * 1e3:6.1f} ms")
+    print(f"Output: {out_dir}")
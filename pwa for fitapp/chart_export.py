@@ -0,0 +1,149 @@
+# Batch chart exporter
+# Builds every registered diagram in one process and renders them through a
+# single long-lived Kaleido browser with several tabs working in parallel,
+# instead of one Python start-up, plotly import and renderer launch per
+# chart_script*.py file. Each chart module exposes build_figure(), OUTPUT
+# (its file name) and EXPORT (its write_image size options); running a
+# chart_script directly still writes its own PNG as before. The command line
+# run goes through a render_cache.RenderCache, so only charts whose data,
+# layout or export settings changed since the last run are rendered again.
+
+import importlib
+import os
+import sys
+import time
+from dataclasses import dataclass
+
+from render_cache import RenderCache
+
+CHARTS = {
+    "architecture": "chart_script",
+    "tokenomics": "chart_script_1",
+    "pwa-blockchain": "chart_script_2",
+}
+FORMATS = ("png", "svg", "pdf", "jpeg", "webp")
+DEFAULT_WORKERS = 4
+
+
+@dataclass(frozen=True)
+class ExportJob:
+    chart: str
+    path: str
+    format: str
+    width: int = None
+    height: int = None
+    scale: float = None
+
+    def opts(self):
+        opts = {"format": self.format}
+        for key in ("width", "height", "scale"):
+            if getattr(self, key) is not None:
+                opts[key] = getattr(self, key)
+        return opts
+
+
+def chart_module(name):
+    return importlib.import_module(CHARTS[name])
+
+
+def build_figures(names=None):
+    # {chart name: figure dict}; modules are imported on first use
+    return {name: chart_module(name).build_figure().to_dict() for name in (names or CHARTS)}
+
+
+def plan(names=None, formats=("png",), sizes=None, out_dir="."):
+    # One job per chart x format x size. sizes: iterable of (width, height,
+    # scale) tuples, None for each chart's own EXPORT settings. Non-default
+    # sizes get a "@WxH" (and "@Nx" for scale) suffix in the file name.
+    jobs = []
+    for name in names or CHARTS:
+        module = chart_module(name)
+        stem = os.path.splitext(module.OUTPUT)[0]
+        for fmt in formats:
+            if fmt not in FORMATS:
+                raise ValueError(f"unsupported format {fmt!r}, expected one of {FORMATS}")
+            for size in sizes or (None,):
+                if size is None:
+                    suffix, options = "", module.EXPORT
+                else:
+                    width, height, scale = size
+                    suffix = f"@{width}x{height}" + (f"@{scale:g}x" if scale not in (None, 1) else "")
+                    options = {"width": width, "height": height, "scale": scale}
+                jobs.append(ExportJob(name, os.path.join(out_dir, f"{stem}{suffix}.{fmt}"), fmt, **options))
+    return jobs
+
+
+class Renderer:
+    # One Kaleido browser for the lifetime of the block, `workers` tabs
+    # rendering concurrently. Kaleido's sync server is a process-wide
+    # singleton, so Renderers must not be nested.
+
+    def __init__(self, workers=DEFAULT_WORKERS):
+        self.workers = workers
+
+    def __enter__(self):
+        import kaleido  # deferred: ~200 ms, and only needed once something renders
+
+        self._kaleido = kaleido
+        kaleido.start_sync_server(n=self.workers)
+        return self
+
+    def __exit__(self, *exc):
+        self._kaleido.stop_sync_server(silence_warnings=True)
+        return False
+
+    def render(self, jobs, figures):
+        errors = self._kaleido.write_fig_from_object_sync(
+            [{"fig": figures[job.chart], "path": job.path, "opts": job.opts()} for job in jobs])
+        if errors:
+            raise RuntimeError(f"{len(errors)} of {len(jobs)} exports failed: {errors[0]!r}")
+
+
+def export(names=None, formats=("png",), sizes=None, out_dir=".", workers=DEFAULT_WORKERS, renderer=None,
+           cache=None):
+    # Builds and writes every requested chart; returns the written paths.
+    # With a render_cache.RenderCache, unchanged charts are copied from the
+    # cache and the renderer only sees (and only starts for) the rest.
+    jobs = plan(names, formats, sizes, out_dir)
+    figures = build_figures(names)
+    os.makedirs(out_dir, exist_ok=True)
+    pending = jobs
+    if cache is not None:
+        keys = {job: cache.key(figures[job.chart], job) for job in jobs}
+        pending = [job for job in jobs if not cache.fetch(keys[job], job)]
+    if pending:
+        if renderer is not None:
+            renderer.render(pending, figures)
+        else:
+            with Renderer(workers) as own:
+                own.render(pending, figures)
+    if cache is not None:
+        for job in pending:
+            cache.store(keys[job], job)
+        cache.evict()
+    return [job.path for job in jobs]
+
+
+def parse_size(text):
+    # "1000x1000" or "1000x1000@2"
+    dims, _, scale = text.partition("@")
+    width, height = (int(v) for v in dims.split("x"))
+    return width, height, float(scale) if scale else None
+
+
+if __name__ == "__main__":
+    print("=== FIXIE CHART EXPORT ===")
+    print()
+
+    out_dir = sys.argv[1] if len(sys.argv) > 1 else "."
+    formats = sys.argv[2].split(",") if len(sys.argv) > 2 else ["png"]
+    sizes = [None] + [parse_size(s) for s in sys.argv[3].split(",")] if len(sys.argv) > 3 else None
+
+    cache = RenderCache()
+    start = time.perf_counter()
+    paths = export(formats=formats, sizes=sizes, out_dir=out_dir, cache=cache)
+    elapsed = time.perf_counter() - start
+    for path in paths:
+        print(f"  {path}")
+    print(f"Exported {len(paths)} images from {len(CHARTS)} charts in {elapsed:.1f}s "
+          f"({cache.misses} rendered, {cache.hits} from cache)")
@@ -1,7 +1,4 @@
-import plotly.graph_objects as go
-import plotly.express as px
-import pandas as pd
-import numpy as np
+from diagram_layout import DiagramBuilder
 
 # Architecture data with exact brand colors and correct components
 architecture_data = {
@@ -39,127 +36,73 @@ architecture_data = {
     ]
 }
 
-# Create the figure
-fig = go.Figure()
+OUTPUT = "fixie_architecture.png"
+EXPORT = {}
 
-# Add layer backgrounds and components
-for layer_data in architecture_data["architecture_layers"]:
-    layer_name = layer_data["layer"]
-    components = layer_data["components"]
-    color = layer_data["color"]
-    y_pos = layer_data["y_pos"]
-    
-    # Add layer background rectangle
-    fig.add_shape(
-        type="rect",
-        x0=0, y0=y_pos-0.45, x1=8, y1=y_pos+0.45,
-        fillcolor=color,
-        opacity=0.15,
-        line=dict(color=color, width=3)
-    )
-    
-    # Add layer title box
-    fig.add_shape(
-        type="rect",
-        x0=0.1, y0=y_pos-0.2, x1=1.2, y1=y_pos+0.2,
-        fillcolor=color,
-        opacity=0.9,
-        line=dict(color="white", width=2)
-    )
-    
-    # Add layer title text
-    fig.add_trace(go.Scatter(
-        x=[0.65],
-        y=[y_pos],
-        mode='text',
-        text=[layer_name],
-        textfont=dict(size=11, color='white', family="Arial Black"),
-        showlegend=False,
-        hoverinfo='skip'
-    ))
-    
-    # Add components as prominent boxes
-    for i, component in enumerate(components):
-        x_pos = i + 1.8
-        
-        # Component box with high opacity
-        fig.add_shape(
-            type="rect",
-            x0=x_pos-0.4, y0=y_pos-0.25, x1=x_pos+0.4, y1=y_pos+0.25,
-            fillcolor=color,
-            opacity=0.95,
-            line=dict(color="white", width=2)
-        )
-        
-        # Component text with good contrast
-        fig.add_trace(go.Scatter(
-            x=[x_pos],
-            y=[y_pos],
-            mode='text',
-            text=[component],
-            textfont=dict(size=10, color='white', family="Arial"),
-            showlegend=False,
-            hovertemplate=f'<b>{component}</b><br>Layer: {layer_name}<extra></extra>'
-        ))
 
-# Add data flow arrows using shapes instead of annotations
-arrow_configs = [
-    {"x": 2.5, "from_y": 4.55, "to_y": 4.45, "color": "#333333"},  # UI to App
-    {"x": 3.5, "from_y": 3.55, "to_y": 3.45, "color": "#333333"},  # App to Blockchain
-    {"x": 4.5, "from_y": 3.55, "to_y": 2.45, "color": "#333333"},  # App to Data
-    {"x": 5.5, "from_y": 1.55, "to_y": 3.45, "color": "#333333"},  # External to App
-    {"x": 6.5, "from_y": 2.55, "to_y": 4.45, "color": "#333333"}   # Data to UI
-]
+def build_figure():
+    # Boxes, labels and arrows are collected by style and emitted as a few
+    # batched shapes and traces instead of one object per component
+    builder = DiagramBuilder()
+
+    # Add layer backgrounds and components
+    for layer_data in architecture_data["architecture_layers"]:
+        layer_name = layer_data["layer"]
+        components = layer_data["components"]
+        color = layer_data["color"]
+        y_pos = layer_data["y_pos"]
+
+        # Layer background rectangle and title box
+        builder.rect(0, y_pos-0.45, 8, y_pos+0.45, color, color, line_width=3, opacity=0.15)
+        builder.rect(0.1, y_pos-0.2, 1.2, y_pos+0.2, color, "white", line_width=2, opacity=0.9)
+        builder.text(0.65, y_pos, layer_name, 11, "white", family="Arial Black")
+
+        # Components as prominent boxes with good-contrast labels
+        for i, component in enumerate(components):
+            x_pos = i + 1.8
+            builder.rect(x_pos-0.4, y_pos-0.25, x_pos+0.4, y_pos+0.25, color, "white", line_width=2, opacity=0.95)
+            builder.text(x_pos, y_pos, component, 10, "white",
+                         hover=f"<b>{component}</b><br>Layer: {layer_name}")
 
-for arrow in arrow_configs:
-    # Arrow line
-    fig.add_shape(
-        type="line",
-        x0=arrow["x"], y0=arrow["from_y"], 
-        x1=arrow["x"], y1=arrow["to_y"],
-        line=dict(color=arrow["color"], width=4)
+    # Add data flow arrows
+    arrow_configs = [
+        {"x": 2.5, "from_y": 4.55, "to_y": 4.45, "color": "#333333"},  # UI to App
+        {"x": 3.5, "from_y": 3.55, "to_y": 3.45, "color": "#333333"},  # App to Blockchain
+        {"x": 4.5, "from_y": 3.55, "to_y": 2.45, "color": "#333333"},  # App to Data
+        {"x": 5.5, "from_y": 1.55, "to_y": 3.45, "color": "#333333"},  # External to App
+        {"x": 6.5, "from_y": 2.55, "to_y": 4.45, "color": "#333333"}   # Data to UI
+    ]
+
+    for arrow in arrow_configs:
+        builder.arrow(arrow["x"], arrow["from_y"], arrow["x"], arrow["to_y"], arrow["color"], width=4, head=0.05)
+
+    fig = builder.figure(
+        title="FixieRun PWA Architecture",
+        xaxis=dict(
+            range=[0, 8],
+            showticklabels=False,
+            showgrid=False,
+            zeroline=False,
+            visible=False
+        ),
+        yaxis=dict(
+            range=[0, 5.5],
+            showticklabels=False,
+            showgrid=False,
+            zeroline=False,
+            visible=False
+        ),
+        showlegend=False,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(family="Arial")
     )
-    
-    # Arrow head (triangle)
-    if arrow["from_y"] > arrow["to_y"]:  # Downward arrow
-        fig.add_shape(
-            type="path",
-            path=f"M {arrow['x']-0.05},{arrow['to_y']+0.05} L {arrow['x']},{arrow['to_y']} L {arrow['x']+0.05},{arrow['to_y']+0.05} Z",
-            fillcolor=arrow["color"],
-            line=dict(color=arrow["color"], width=0)
-        )
-    else:  # Upward arrow
-        fig.add_shape(
-            type="path",
-            path=f"M {arrow['x']-0.05},{arrow['to_y']-0.05} L {arrow['x']},{arrow['to_y']} L {arrow['x']+0.05},{arrow['to_y']-0.05} Z",
-            fillcolor=arrow["color"],
-            line=dict(color=arrow["color"], width=0)
-        )
 
-# Update layout
-fig.update_layout(
-    title="FixieRun PWA Architecture",
-    xaxis=dict(
-        range=[0, 8],
-        showticklabels=False,
-        showgrid=False,
-        zeroline=False,
-        visible=False
-    ),
-    yaxis=dict(
-        range=[0, 5.5],
-        showticklabels=False,
-        showgrid=False,
-        zeroline=False,
-        visible=False
-    ),
-    showlegend=False,
-    plot_bgcolor='rgba(0,0,0,0)',
-    paper_bgcolor='rgba(0,0,0,0)',
-    font=dict(family="Arial")
-)
+    fig.update_traces(cliponaxis=False)
+
+    return fig
 
-fig.update_traces(cliponaxis=False)
 
-# Save the chart
-fig.write_image("fixie_architecture.png")
\ No newline at end of file
+if __name__ == "__main__":
+    # Save the chart
+    build_figure().write_image(OUTPUT, **EXPORT)
@@ -1,169 +1,169 @@
-import plotly.graph_objects as go
-import plotly.io as pio
+import os
+
 import numpy as np
 
-# Create a cleaner circular flow diagram
-fig = go.Figure()
+from diagram_layout import DiagramBuilder
+from fixie_rules import MILESTONE_TIERS, MINT_COSTS, RATE_PER_KM, WEI
+import token_flow
 
-# Define main circular positions for key components
-angles = np.linspace(0, 2*np.pi, 9, endpoint=False)
-radius = 3
+# Flow amounts come from token_flow aggregates (FLOWS_PATH); regenerate them
+# with `python token_flow.py` (simulation) or `python token_flow.py days.jsonl`
+FLOWS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), token_flow.FLOWS_PATH)
 
-# Main cycle nodes (circular arrangement)
+# Main cycle nodes (circular arrangement); labels are formatted with the flows
+radius = 3
 main_nodes = [
-    ("Running\n1.2$/km", '#1FB8CD'),
-    ("Cycling\n0.8$/km", '#1FB8CD'), 
-    ("Walking\n0.5$/km", '#1FB8CD'),
-    ("Distance Rwds\n45k daily", '#2E8B57'),
-    ("Milestone Bon\n+50% tokens", '#2E8B57'),
-    ("NFT Purchase\n10-100 tokens", '#5D878F'),
-    ("Marketplace\n2.5% fee", '#5D878F'),
-    ("NFT Upgrades\n10-50 burned", '#DB4545'),
-    ("Market Fees\n2.5% burned", '#DB4545')
+    (f"Running<br>{RATE_PER_KM[0] / 1000:g}/km", '#1FB8CD'),
+    (f"Cycling<br>{RATE_PER_KM[1] / 1000:g}/km", '#1FB8CD'),
+    (f"Walking<br>{RATE_PER_KM[2] / 1000:g}/km", '#1FB8CD'),
+    ("Rewards<br>{minted_k} daily", '#2E8B57'),
+    ("Streak Bonus<br>every 7 days", '#2E8B57'),
+    (f"NFT Purchase<br>{MINT_COSTS[0] // WEI}-{MINT_COSTS[-1] // WEI} tokens", '#5D878F'),
+    ("Mint Costs<br>burned", '#DB4545'),
+    ("Daily Cap<br>{cap_days_pct} of days", '#DB4545'),
 ]
+angles = np.linspace(0, 2*np.pi, len(main_nodes), endpoint=False)
 
-# Plot main circular nodes
-for i, (label, color) in enumerate(main_nodes):
-    x = radius * np.cos(angles[i])
-    y = radius * np.sin(angles[i])
-    
-    fig.add_trace(go.Scatter(
-        x=[x], y=[y],
-        mode='markers+text',
-        marker=dict(size=60, color=color, line=dict(width=3, color='white')),
-        text=label,
-        textposition='middle center',
-        textfont=dict(size=11, color='white', family="Arial Black"),
-        showlegend=False,
-        hoverinfo='skip'
-    ))
-
-# Add center hub for token economy
-fig.add_trace(go.Scatter(
-    x=[0], y=[0],
-    mode='markers+text',
-    marker=dict(size=100, color='#964325', line=dict(width=4, color='white')),
-    text="$FIXIE<br>Economy<br>500k emit<br>200k burn",
-    textposition='middle center',
-    textfont=dict(size=12, color='white', family="Arial Black"),
-    showlegend=False,
-    hoverinfo='skip'
-))
-
-# Add external factors (outer ring)
+# Reward boosts (outer ring, next to Rewards)
 external_radius = 4.5
-external_angles = [np.pi/4, np.pi, 7*np.pi/4]
+external_angles = [3*np.pi/8, 5*np.pi/8, 7*np.pi/8]
 external_nodes = [
-    ("Seasonal Bon\n+25%", '#D2BA4C'),
-    ("Social Rwds\n+10%", '#D2BA4C'),
-    ("Achievements\n+100 tokens", '#D2BA4C')
+    ("NFT Boost<br>+{boost_pct}", '#D2BA4C'),
+    ("Streak Mult<br>+{streak_pct}", '#D2BA4C'),
+    (f"Milestones<br>{MILESTONE_TIERS[-1][0]}-{MILESTONE_TIERS[0][0]} km", '#D2BA4C'),
 ]
 
-for i, (label, color) in enumerate(external_nodes):
-    x = external_radius * np.cos(external_angles[i])
-    y = external_radius * np.sin(external_angles[i])
-    
-    fig.add_trace(go.Scatter(
-        x=[x], y=[y],
-        mode='markers+text',
-        marker=dict(size=45, color=color, line=dict(width=2, color='white')),
-        text=label,
-        textposition='middle center',
-        textfont=dict(size=9, color='white', family="Arial Black"),
-        showlegend=False,
-        hoverinfo='skip'
-    ))
-
-# Add curved arrows showing flow direction (simplified)
-# Main flow arrows
+# Flow arrows: (from, to, flows key); "main", i / "external", i nodes, and
+# the per-day amount of the key as the label (None: no label)
 flow_arrows = [
-    # Activities to earning (clockwise flow)
-    (angles[0], angles[3], "15k"),  # Running to Distance
-    (angles[1], angles[4], "10k"),  # Cycling to Milestone  
-    (angles[2], angles[3], "8k"),   # Walking to Distance
-    
-    # Earning to utility
-    (angles[3], angles[5], "20k"),  # Distance to NFT Purchase
-    (angles[4], angles[6], "12k"),  # Milestone to Marketplace
-    
-    # Utility to burning
-    (angles[5], angles[7], "15k"),  # NFT Purchase to Upgrades
-    (angles[6], angles[8], "5k"),   # Marketplace to Fees
-    
-    # External to earning
-    (external_angles[0], angles[3], "5k"),  # Seasonal to Distance
-    (external_angles[1], angles[4], "3k"),  # Social to Milestone
-]
+    # Activities to rewards (base distance rate)
+    (("main", 0), ("main", 3), "distance_running"),
+    (("main", 1), ("main", 3), "distance_cycling"),
+    (("main", 2), ("main", 3), "distance_walking"),
 
-for start_angle, end_angle, amount in flow_arrows:
-    # Calculate arrow positions
-    start_x = (radius - 0.3) * np.cos(start_angle)
-    start_y = (radius - 0.3) * np.sin(start_angle)
-    end_x = (radius - 0.3) * np.cos(end_angle)
-    end_y = (radius - 0.3) * np.sin(end_angle)
-    
-    # Add arrow
-    fig.add_annotation(
-        x=end_x, y=end_y,
-        ax=start_x, ay=start_y,
-        arrowhead=3,
-        arrowsize=1.5,
-        arrowwidth=3,
-        arrowcolor='#666666',
-        showarrow=True
-    )
-    
-    # Add flow amount label
-    mid_x = (start_x + end_x) / 2
-    mid_y = (start_y + end_y) / 2
-    
-    fig.add_trace(go.Scatter(
-        x=[mid_x], y=[mid_y],
-        mode='text',
-        text=amount,
-        textfont=dict(size=10, color='#333333', family="Arial Bold"),
-        showlegend=False,
-        hoverinfo='skip'
-    ))
+    # Boosts on top of the base rate
+    (("external", 0), ("main", 3), "nft_boost"),
+    (("external", 1), ("main", 3), "streak_multiplier"),
+    (("external", 2), ("main", 3), "milestone"),
+    (("main", 4), ("main", 3), "streak_bonus"),
+
+    # Spending and burning
+    (("main", 3), ("main", 5), None),
+    (("main", 5), ("main", 6), "burned"),
+]
 
-# Add section headers
+# Section headers
 section_headers = [
-    (-4.5, 3.5, "EARN", '#1FB8CD'),
-    (0, 5.5, "BOOST", '#D2BA4C'),
-    (4.5, 3.5, "BURN", '#DB4545'),
-    (0, -5.5, "SUPPLY", '#B4413C')
+    (4.6, 3.6, "EARN", '#1FB8CD'),
+    (0, 5.6, "BOOST", '#D2BA4C'),
+    (-4.2, -4.4, "BURN", '#DB4545'),
+    (3.6, -4.4, "SUPPLY", '#B4413C')
 ]
+supply_box = (2.1, -5.5, 5.1, -4.8)  # x0, y0, x1, y1 of the supply sparkline
+
+OUTPUT = "fixie_tokenomics_flow.png"
+EXPORT = {"width": 1000, "height": 1000, "scale": 2}
+
+
+def _tokens(value):
+    # 384660 -> "385k", like the hand-written labels this replaces
+    if abs(value) >= 1e6:
+        return f"{value / 1e6:.1f}M"
+    if abs(value) >= 1e3:
+        return f"{value / 1e3:.0f}k"
+    return f"{value:.0f}"
+
 
-for x, y, text, color in section_headers:
-    fig.add_trace(go.Scatter(
-        x=[x], y=[y],
-        mode='text',
-        text=f"<b>{text}</b>",
-        textfont=dict(size=16, color=color, family="Arial Black"),
+def _labels(flows):
+    rewards = sum(flows[f"distance_{name}"] for name in ("running", "cycling", "walking"))
+    return {
+        "minted_k": _tokens(flows["minted"]),
+        "cap_days_pct": f"{flows['cap_day_share']:.0%}",
+        "boost_pct": f"{flows['nft_boost'] / max(rewards, 1):.0%}",
+        "streak_pct": f"{flows['streak_multiplier'] / max(rewards + flows['nft_boost'], 1):.0%}",
+    }
+
+
+def _position(node):
+    ring, i = node
+    if ring == "main":
+        return radius * np.cos(angles[i]), radius * np.sin(angles[i])
+    return external_radius * np.cos(external_angles[i]), external_radius * np.sin(external_angles[i])
+
+
+def build_figure(flows=None):
+    flows = token_flow.load(FLOWS_PATH) if flows is None else flows
+    labels = _labels(flows)
+    builder = DiagramBuilder()
+
+    # Plot main circular nodes and the outer ring
+    for i, (label, color) in enumerate(main_nodes):
+        x, y = _position(("main", i))
+        builder.marker(x, y, 60, color, line_width=3)
+        builder.text(x, y, label.format(**labels), 11, "white", family="Arial Black")
+    for i, (label, color) in enumerate(external_nodes):
+        x, y = _position(("external", i))
+        builder.marker(x, y, 45, color, line_width=2)
+        builder.text(x, y, label.format(**labels), 9, "white", family="Arial Black")
+
+    # Add center hub for token economy
+    builder.marker(0, 0, 100, '#964325', line_width=4)
+    builder.text(0, 0, f"$FIXIE<br>Economy<br>{_tokens(flows['minted'])} emit<br>{_tokens(flows['burned'])} burn",
+                 12, "white", family="Arial Black")
+
+    # Arrows stop short of both nodes; amounts sit at the midpoint
+    for start, end, key in flow_arrows:
+        (x0, y0), (x1, y1) = _position(start), _position(end)
+        dx, dy = x1 - x0, y1 - y0
+        gap = 0.45 / np.hypot(dx, dy)
+        builder.arrow(x0 + dx * gap, y0 + dy * gap, x1 - dx * gap, y1 - dy * gap, '#666666', width=3, head=0.12)
+        if key is not None:
+            builder.text((x0 + x1) / 2, (y0 + y1) / 2, _tokens(flows[key]), 10, '#333333', family="Arial Bold",
+                         hover=f"{key.replace('_', ' ')}: {flows[key]:,.0f} FIXIE/day")
+
+    # Add section headers
+    for x, y, text, color in section_headers:
+        builder.text(x, y, f"<b>{text}</b>", 16, color, family="Arial Black")
+
+    # Total supply sparkline, already downsampled to (day, low, high) buckets
+    x0, y0, x1, y1 = supply_box
+    curve = np.array(flows["supply_curve"], dtype=np.float64).reshape(-1, 3)
+    if len(curve) > 1:
+        days, low, high = curve.T
+        span = max(high.max() - low.min(), 1.0)
+        xs = x0 + (days - days[0]) / max(days[-1] - days[0], 1.0) * (x1 - x0)
+        builder.rect(x0, y0, x1, y1, "rgba(180,65,60,0.08)", '#B4413C', line_width=1, layer="below")
+        band = [f"M{x:g},{y0 + (h - low.min()) / span * (y1 - y0):g}" if i == 0 else
+                f"L{x:g},{y0 + (h - low.min()) / span * (y1 - y0):g}" for i, (x, h) in enumerate(zip(xs, high))]
+        band += [f"L{x:g},{y0 + (v - low.min()) / span * (y1 - y0):g}" for x, v in zip(xs[::-1], low[::-1])]
+        builder.path("".join(band) + "Z", fillcolor='#B4413C', line_color='#B4413C', line_width=1)
+        builder.text(x0, y1 + 0.15, f"{_tokens(low[0])}", 9, '#B4413C', position="middle right")
+        builder.text(x1, y1 + 0.15, f"{_tokens(high[-1])} on day {int(days[-1])}", 9, '#B4413C',
+                     position="middle left")
+
+    fig = builder.figure(
+        title="$FIXIE M2E Token Economy",
+        xaxis=dict(range=[-6, 6], visible=False, fixedrange=True),
+        yaxis=dict(range=[-6, 6], visible=False, fixedrange=True),
+        plot_bgcolor='white',
         showlegend=False,
-        hoverinfo='skip'
-    ))
-
-# Update layout for better presentation
-fig.update_layout(
-    title="$FIXIE M2E Token Economy",
-    xaxis=dict(range=[-6, 6], visible=False, fixedrange=True),
-    yaxis=dict(range=[-6, 6], visible=False, fixedrange=True),
-    plot_bgcolor='white',
-    showlegend=False,
-    annotations=[
-        dict(
-            text="Net Daily Growth: +300k tokens",
-            x=0, y=-6,
-            xref="x", yref="y",
-            font=dict(size=12, color='#333333'),
-            showarrow=False
-        )
-    ]
-)
-
-# Ensure equal aspect ratio for proper circle
-fig.update_yaxes(scaleanchor="x", scaleratio=1)
-
-# Save the chart
-fig.write_image("fixie_tokenomics_flow.png", width=1000, height=1000, scale=2)
\ No newline at end of file
+        annotations=[
+            dict(
+                text=f"Net Daily Growth: {flows['net']:+,.0f} tokens ({flows['days']:,}-day average)",
+                x=0, y=-6,
+                xref="x", yref="y",
+                font=dict(size=12, color='#333333'),
+                showarrow=False
+            )
+        ]
+    )
+
+    # Ensure equal aspect ratio for proper circle
+    fig.update_yaxes(scaleanchor="x", scaleratio=1)
+
+    return fig
+
+
+if __name__ == "__main__":
+    # Save the chart
+    build_figure().write_image(OUTPUT, **EXPORT)
@@ -1,9 +1,4 @@
-import plotly.graph_objects as go
-import plotly.express as px
-import pandas as pd
-
-# Create the comprehensive PWA-Blockchain diagram
-fig = go.Figure()
+from diagram_layout import DiagramBuilder
 
 # Define colors
 colors = {
@@ -14,23 +9,6 @@ colors = {
     "Background": "#D2BA4C"
 }
 
-# Add background rectangles for grouping
-fig.add_shape(
-    type="rect",
-    x0=0.2, y0=-0.5, x1=2.3, y1=6,
-    fillcolor="rgba(31,184,205,0.1)",
-    line=dict(color="#1FB8CD", width=2),
-    layer="below"
-)
-
-fig.add_shape(
-    type="rect", 
-    x0=4.2, y0=-0.5, x1=6.3, y1=6,
-    fillcolor="rgba(219,69,69,0.1)",
-    line=dict(color="#DB4545", width=2),
-    layer="below"
-)
-
 # PWA Features (left side) - better spaced
 pwa_data = [
     {"name": "Service Worker", "detail": "Cache Strategy", "x": 1.25, "y": 5.2},
@@ -51,166 +29,105 @@ blockchain_data = [
     {"name": "TX Confirm", "detail": "$0.001 Cost", "x": 5.25, "y": 1.2}
 ]
 
-# Add PWA feature nodes
-for i, item in enumerate(pwa_data):
-    fig.add_trace(go.Scatter(
-        x=[item["x"]],
-        y=[item["y"]],
-        mode='markers',
-        marker=dict(size=30, color=colors["PWA"], line=dict(width=2, color='white')),
-        showlegend=False,
-        hovertext=f"{item['name']}<br>{item['detail']}",
-        hoverinfo='text'
-    ))
-    
-    # Add text labels to the right of PWA nodes
-    fig.add_annotation(
-        text=f"{item['name'][:15]}",
-        x=item["x"] + 0.4, y=item["y"],
+OUTPUT = "fixierun_pwa_blockchain_architecture.png"
+EXPORT = {}
+
+
+def build_figure():
+    # Create the comprehensive PWA-Blockchain diagram; nodes, labels and
+    # arrows are batched by style (see diagram_layout.DiagramBuilder)
+    builder = DiagramBuilder()
+
+    # Add background rectangles for grouping
+    builder.rect(0.2, -0.5, 2.3, 6, "rgba(31,184,205,0.1)", "#1FB8CD", line_width=2, layer="below")
+    builder.rect(4.2, -0.5, 6.3, 6, "rgba(219,69,69,0.1)", "#DB4545", line_width=2, layer="below")
+
+    # Add PWA feature nodes, labelled to their right
+    for item in pwa_data:
+        builder.marker(item["x"], item["y"], 30, colors["PWA"], hover=f"{item['name']}<br>{item['detail']}")
+        builder.text(item["x"] + 0.4, item["y"], f"{item['name'][:15]}", 11, "#1FB8CD", position="middle right")
+
+    # Add Blockchain feature nodes, labelled to their left
+    for item in blockchain_data:
+        builder.marker(item["x"], item["y"], 30, colors["Blockchain"], hover=f"{item['name']}<br>{item['detail']}")
+        builder.text(item["x"] - 0.4, item["y"], f"{item['name'][:15]}", 11, "#DB4545", position="middle left")
+
+    # Add central Web3 Bridge with larger prominence
+    builder.marker(3.25, 3.2, 50, colors["Bridge"], line_width=3, hover="Web3 APIs<br>Bridge Layer", name="Web3 Bridge")
+    builder.text(3.25, 3.2, "Web3 APIs", 12, "white")
+
+    # Add directional arrows from PWA to Web3 Bridge and on to Blockchain
+    for item in pwa_data:
+        builder.arrow(item["x"] + 0.15, item["y"], 2.9, 3.2, "#5D878F", width=2, head=0.06)
+    for item in blockchain_data:
+        builder.arrow(3.6, 3.2, item["x"] - 0.15, item["y"], "#5D878F", width=2, head=0.06)
+
+    # Add section headers
+    builder.annotation(
+        text="PWA Features",
+        x=1.25, y=6.2,
         showarrow=False,
-        font=dict(size=11, color="#1FB8CD"),
-        xanchor="left"
+        font=dict(size=16, color="#1FB8CD"),
+        bgcolor="white",
+        bordercolor="#1FB8CD",
+        borderwidth=2
     )
 
-# Add Blockchain feature nodes
-for i, item in enumerate(blockchain_data):
-    fig.add_trace(go.Scatter(
-        x=[item["x"]],
-        y=[item["y"]],
-        mode='markers',
-        marker=dict(size=30, color=colors["Blockchain"], line=dict(width=2, color='white')),
-        showlegend=False,
-        hovertext=f"{item['name']}<br>{item['detail']}",
-        hoverinfo='text'
-    ))
-    
-    # Add text labels to the left of Blockchain nodes
-    fig.add_annotation(
-        text=f"{item['name'][:15]}",
-        x=item["x"] - 0.4, y=item["y"],
+    builder.annotation(
+        text="Blockchain",
+        x=5.25, y=6.2,
         showarrow=False,
-        font=dict(size=11, color="#DB4545"),
-        xanchor="right"
+        font=dict(size=16, color="#DB4545"),
+        bgcolor="white",
+        bordercolor="#DB4545",
+        borderwidth=2
     )
 
-# Add central Web3 Bridge with larger prominence
-fig.add_trace(go.Scatter(
-    x=[3.25],
-    y=[3.2],
-    mode='markers',
-    marker=dict(size=50, color=colors["Bridge"], line=dict(width=3, color='white')),
-    name="Web3 Bridge",
-    hovertext="Web3 APIs<br>Bridge Layer",
-    hoverinfo='text'
-))
-
-fig.add_annotation(
-    text="Web3 APIs",
-    x=3.25, y=3.2,
-    showarrow=False,
-    font=dict(size=12, color="white"),
-    xanchor="center"
-)
-
-# Add directional arrows from PWA to Web3 Bridge
-for item in pwa_data:
-    fig.add_annotation(
-        ax=item["x"] + 0.15, ay=item["y"],
-        x=2.9, y=3.2,
-        arrowhead=2,
-        arrowsize=1,
-        arrowwidth=2,
-        arrowcolor="#5D878F",
-        showarrow=True,
-        text=""
+    # Add improved performance metrics boxes
+    builder.rect(0.3, 0.3, 2.2, 0.8, "rgba(31,184,205,0.2)", "#1FB8CD", line_width=2)
+
+    builder.annotation(
+        text="PWA Metrics:<br>Load <2s | Score 95+<br>Size <500KB",
+        x=1.25, y=0.55,
+        showarrow=False,
+        font=dict(size=10, color="#1FB8CD"),
+        xanchor="center"
     )
 
-# Add directional arrows from Web3 Bridge to Blockchain
-for item in blockchain_data:
-    fig.add_annotation(
-        ax=3.6, ay=3.2,
-        x=item["x"] - 0.15, y=item["y"],
-        arrowhead=2,
-        arrowsize=1,
-        arrowwidth=2,
-        arrowcolor="#5D878F",
-        showarrow=True,
-        text=""
+    builder.rect(4.3, 0.3, 6.2, 0.8, "rgba(219,69,69,0.2)", "#DB4545", line_width=2)
+
+    builder.annotation(
+        text="Chain Metrics:<br>Block 2-3s | Fee $0.001<br>Network 1101",
+        x=5.25, y=0.55,
+        showarrow=False,
+        font=dict(size=10, color="#DB4545"),
+        xanchor="center"
     )
 
-# Add section headers
-fig.add_annotation(
-    text="PWA Features",
-    x=1.25, y=6.2,
-    showarrow=False,
-    font=dict(size=16, color="#1FB8CD"),
-    bgcolor="white",
-    bordercolor="#1FB8CD",
-    borderwidth=2
-)
-
-fig.add_annotation(
-    text="Blockchain",
-    x=5.25, y=6.2,
-    showarrow=False,
-    font=dict(size=16, color="#DB4545"),
-    bgcolor="white",
-    bordercolor="#DB4545",
-    borderwidth=2
-)
-
-# Add improved performance metrics boxes
-fig.add_shape(
-    type="rect",
-    x0=0.3, y0=0.3, x1=2.2, y1=0.8,
-    fillcolor="rgba(31,184,205,0.2)",
-    line=dict(color="#1FB8CD", width=2)
-)
-
-fig.add_annotation(
-    text="PWA Metrics:<br>Load <2s | Score 95+<br>Size <500KB",
-    x=1.25, y=0.55,
-    showarrow=False,
-    font=dict(size=10, color="#1FB8CD"),
-    xanchor="center"
-)
-
-fig.add_shape(
-    type="rect",
-    x0=4.3, y0=0.3, x1=6.2, y1=0.8,
-    fillcolor="rgba(219,69,69,0.2)",
-    line=dict(color="#DB4545", width=2)
-)
-
-fig.add_annotation(
-    text="Chain Metrics:<br>Block 2-3s | Fee $0.001<br>Network 1101",
-    x=5.25, y=0.55,
-    showarrow=False,
-    font=dict(size=10, color="#DB4545"),
-    xanchor="center"
-)
-
-# Update layout
-fig.update_layout(
-    title="FixieRun PWA & Blockchain Integration",
-    xaxis=dict(
-        range=[0, 6.5],
-        showgrid=False,
-        showticklabels=False,
-        zeroline=False
-    ),
-    yaxis=dict(
-        range=[0, 6.8],
-        showgrid=False,
-        showticklabels=False,
-        zeroline=False
-    ),
-    legend=dict(orientation='h', yanchor='bottom', y=1.05, xanchor='center', x=0.5),
-    plot_bgcolor='rgba(0,0,0,0)',
-    paper_bgcolor='white'
-)
-
-fig.update_traces(cliponaxis=False)
-
-# Save the chart
-fig.write_image("fixierun_pwa_blockchain_architecture.png")
\ No newline at end of file
+    fig = builder.figure(
+        title="FixieRun PWA & Blockchain Integration",
+        xaxis=dict(
+            range=[0, 6.5],
+            showgrid=False,
+            showticklabels=False,
+            zeroline=False
+        ),
+        yaxis=dict(
+            range=[0, 6.8],
+            showgrid=False,
+            showticklabels=False,
+            zeroline=False
+        ),
+        legend=dict(orientation='h', yanchor='bottom', y=1.05, xanchor='center', x=0.5),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='white'
+    )
+
+    fig.update_traces(cliponaxis=False)
+
+    return fig
+
+
+if __name__ == "__main__":
+    # Save the chart
+    build_figure().write_image(OUTPUT, **EXPORT)
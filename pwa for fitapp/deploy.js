@@ -26,14 +26,35 @@ async function main() {
   await workoutValidator.deployed();
   console.log("WorkoutValidator deployed to:", workoutValidator.address);
 
+  // Rewards are paid through exactly one path: per-workout mints from
+  // WorkoutValidator (default) or daily Merkle epochs with FIXIE_PAYOUT=merkle.
+  // Only that contract becomes a minter; with merkle, validateWorkout reverts
+  // and workouts are settled off-chain (reward_merkle.py).
+  const payout = process.env.FIXIE_PAYOUT || "validator";
+  if (payout !== "validator" && payout !== "merkle") {
+    throw new Error("FIXIE_PAYOUT must be validator or merkle, got " + payout);
+  }
+
+  // Deploy Reward Distributor (Merkle epochs)
+  let rewardDistributor = null;
+  if (payout === "merkle") {
+    const FixieRewardDistributor = await ethers.getContractFactory("FixieRewardDistributor");
+    rewardDistributor = await FixieRewardDistributor.deploy(fixieToken.address, workoutValidator.address);
+    await rewardDistributor.deployed();
+    console.log("FixieRewardDistributor deployed to:", rewardDistributor.address);
+  }
+
   // Setup permissions
-  await fixieToken.addMinter(workoutValidator.address);
+  await fixieToken.addMinter(payout === "merkle" ? rewardDistributor.address : workoutValidator.address);
   await fixieRunNFT.setStakingContract(workoutValidator.address);
 
   console.log("\nDeployment complete!");
   console.log("FIXIE Token:", fixieToken.address);
   console.log("FixieRun NFT:", fixieRunNFT.address);
   console.log("Workout Validator:", workoutValidator.address);
+  if (rewardDistributor) {
+    console.log("Reward Distributor:", rewardDistributor.address);
+  }
 
   // Verify contracts on zkEVM explorer
   if (network.name !== "hardhat") {
@@ -41,6 +62,9 @@ async function main() {
     await fixieToken.deployTransaction.wait(6);
     await fixieRunNFT.deployTransaction.wait(6);
     await workoutValidator.deployTransaction.wait(6);
+    if (rewardDistributor) {
+      await rewardDistributor.deployTransaction.wait(6);
+    }
 
     console.log("Verifying contracts...");
 
@@ -58,6 +82,13 @@ async function main() {
       address: workoutValidator.address,
       constructorArguments: [fixieToken.address, fixieRunNFT.address],
     });
+
+    if (rewardDistributor) {
+      await hre.run("verify:verify", {
+        address: rewardDistributor.address,
+        constructorArguments: [fixieToken.address, workoutValidator.address],
+      });
+    }
   }
 }
 
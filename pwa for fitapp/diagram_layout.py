@@ -0,0 +1,166 @@
+# Batched diagram construction for the chart scripts
+# fig.add_shape / fig.add_trace per component validates and stores one object
+# per box, label and arrow, so figure build time and JSON size grow with the
+# node count. DiagramBuilder collects primitives as plain lists and emits one
+# object per visual style instead:
+#   - rectangles and arrows of the same style -> one SVG path shape
+#     ("M .. Z M .. Z"), arrow heads included
+#   - text labels and markers of the same style -> one Scatter trace, with
+#     per-point colours and hover text as arrays
+# and hands the figure a pre-built shapes / annotations list in a single
+# go.Figure call.
+
+import math
+import sys
+import time
+
+import plotly.graph_objects as go
+
+
+def _key(**style):
+    return tuple(sorted(style.items()))
+
+
+class DiagramBuilder:
+    def __init__(self):
+        self.annotations = []
+        self._paths = {}  # style -> list of subpaths; insertion order = draw order
+        self._points = {}  # (kind, style) -> {"x", "y", "text", "color", "hover"}
+
+    def _path(self, subpath, **style):
+        self._paths.setdefault(_key(**style), []).append(subpath)
+
+    def rect(self, x0, y0, x1, y1, fillcolor, line_color, line_width=2, opacity=1.0, layer="above"):
+        self._path(f"M{x0:g},{y0:g}H{x1:g}V{y1:g}H{x0:g}Z", fillcolor=fillcolor, line_color=line_color,
+                   line_width=line_width, opacity=opacity, layer=layer)
+
+    def path(self, path, fillcolor, line_color, line_width=2, opacity=1.0, layer="above"):
+        # Free-form SVG path in data coordinates (closed with Z to fill)
+        self._path(path, fillcolor=fillcolor, line_color=line_color, line_width=line_width, opacity=opacity,
+                   layer=layer)
+
+    def arrow(self, x0, y0, x1, y1, color, width=2, head=0.05):
+        # Shaft plus a filled triangular head of half-width `head` at (x1, y1)
+        self._path(f"M{x0:g},{y0:g}L{x1:g},{y1:g}", fillcolor=None, line_color=color, line_width=width,
+                   opacity=1.0, layer="above")
+        dx, dy = x1 - x0, y1 - y0
+        length = math.hypot(dx, dy) or 1.0
+        ux, uy = dx / length * head, dy / length * head
+        self._path(f"M{x1 - ux - uy:g},{y1 - uy + ux:g}L{x1:g},{y1:g}L{x1 - ux + uy:g},{y1 - uy - ux:g}Z",
+                   fillcolor=color, line_color=color, line_width=0, opacity=1.0, layer="above")
+
+    def _point(self, kind, x, y, text, color, hover, **style):
+        group = self._points.setdefault((kind, _key(hover=hover is not None, **style)),
+                                        {"x": [], "y": [], "text": [], "color": [], "hover": []})
+        group["x"].append(x)
+        group["y"].append(y)
+        group["text"].append(text)
+        group["color"].append(color)
+        group["hover"].append(hover)
+
+    def text(self, x, y, text, size, color, family="Arial", position="middle center", hover=None):
+        self._point("text", x, y, text, color, hover, size=size, family=family, position=position)
+
+    def marker(self, x, y, size, color, line_color="white", line_width=2, hover=None, name=None):
+        # A named marker style gets its own legend entry
+        self._point("marker", x, y, None, color, hover, size=size, line_color=line_color, line_width=line_width,
+                    name=name)
+
+    def annotation(self, **annotation):
+        self.annotations.append(annotation)
+
+    def shapes(self):
+        shapes = []
+        for style, subpaths in self._paths.items():
+            style = dict(style)
+            shape = {"type": "path", "path": "".join(subpaths), "layer": style["layer"],
+                     "line": {"color": style["line_color"], "width": style["line_width"]}}
+            if style["fillcolor"] is not None:
+                shape["fillcolor"] = style["fillcolor"]
+            if style["opacity"] != 1.0:
+                shape["opacity"] = style["opacity"]
+            shapes.append(shape)
+        return shapes
+
+    def traces(self):
+        traces = []
+        for (kind, style), group in self._points.items():
+            style = dict(style)
+            trace = {"type": "scatter", "x": group["x"], "y": group["y"], "showlegend": False}
+            if style.get("name") is not None:
+                trace.update(name=style["name"], showlegend=True)
+            if style["hover"]:
+                trace.update(hovertext=group["hover"], hovertemplate="%{hovertext}<extra></extra>")
+            else:
+                trace["hoverinfo"] = "skip"
+            if kind == "text":
+                trace.update(mode="text", text=group["text"], textposition=style["position"],
+                             textfont={"size": style["size"], "color": group["color"], "family": style["family"]})
+            else:
+                trace.update(mode="markers", marker={
+                    "size": style["size"], "color": group["color"],
+                    "line": {"width": style["line_width"], "color": style["line_color"]}})
+            traces.append(trace)
+        return traces
+
+    def figure(self, **layout):
+        layout = dict(layout, shapes=self.shapes(), annotations=self.annotations + list(layout.get("annotations", ())))
+        return go.Figure(data=self.traces(), layout=layout)
+
+
+def _synthetic_architecture(layers, per_layer):
+    palette = ["#1FB8CD", "#DB4545", "#2E8B57", "#5D878F", "#D2BA4C"]
+    return [{"layer": f"Layer {i}", "color": palette[i % len(palette)], "y_pos": layers - i,
+             "components": [f"C{i}.{j}" for j in range(per_layer)]} for i in range(layers)]
+
+
+def _per_component(architecture):
+    # The one-call-per-component construction chart_script.py used to do
+    fig = go.Figure()
+    for layer in architecture:
+        y = layer["y_pos"]
+        fig.add_shape(type="rect", x0=0, y0=y - 0.45, x1=len(layer["components"]) + 2, y1=y + 0.45,
+                      fillcolor=layer["color"], opacity=0.15, line=dict(color=layer["color"], width=3))
+        for i, component in enumerate(layer["components"]):
+            x = i + 1.8
+            fig.add_shape(type="rect", x0=x - 0.4, y0=y - 0.25, x1=x + 0.4, y1=y + 0.25,
+                          fillcolor=layer["color"], opacity=0.95, line=dict(color="white", width=2))
+            fig.add_trace(go.Scatter(x=[x], y=[y], mode="text", text=[component], showlegend=False,
+                                     textfont=dict(size=10, color="white", family="Arial"),
+                                     hovertemplate=f"<b>{component}</b><br>Layer: {layer['layer']}<extra></extra>"))
+            if y > 1:
+                fig.add_shape(type="line", x0=x, y0=y - 0.25, x1=x, y1=y - 0.75, line=dict(color="#333333", width=2))
+    return fig
+
+
+def _batched(architecture):
+    builder = DiagramBuilder()
+    for layer in architecture:
+        y = layer["y_pos"]
+        builder.rect(0, y - 0.45, len(layer["components"]) + 2, y + 0.45, layer["color"], layer["color"], 3, 0.15)
+        for i, component in enumerate(layer["components"]):
+            x = i + 1.8
+            builder.rect(x - 0.4, y - 0.25, x + 0.4, y + 0.25, layer["color"], "white", 2, 0.95)
+            builder.text(x, y, component, 10, "white", hover=f"<b>{component}</b><br>Layer: {layer['layer']}")
+            if y > 1:
+                builder.arrow(x, y - 0.25, x, y - 0.75, "#333333")
+    return builder.figure()
+
+
+if __name__ == "__main__":
+    print("=== FIXIE DIAGRAM BUILDER ===")
+    print()
+
+    layers = int(sys.argv[1]) if len(sys.argv) > 1 else 6
+    per_layer = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    architecture = _synthetic_architecture(layers, per_layer)
+    for name, build in (("per-component", _per_component), ("batched", _batched)):
+        start = time.perf_counter()
+        fig = build(architecture)
+        built = time.perf_counter() - start
+        start = time.perf_counter()
+        payload = fig.to_json()
+        serialized = time.perf_counter() - start
+        print(f"{name:<14} {layers * per_layer:,} nodes: build {built * 1e3:7.0f} ms, "
+              f"to_json {serialized * 1e3:5.0f} ms, {len(payload) / 1024:7.0f} KiB, "
+              f"{len(fig.data)} traces, {len(fig.layout.shapes)} shapes")
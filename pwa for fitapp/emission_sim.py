@@ -0,0 +1,234 @@
+# Streaming multi-year FIXIE emission simulator
+# Streams synthetic workouts day by day in fixed-size chunks and applies the
+# FixieToken.mintWorkoutReward caps (DAILY_EMISSION_LIMIT and MAX_SUPPLY).
+# Memory stays constant in the number of users: no per-user state is kept,
+# only one chunk of workouts exists at a time.
+
+import math
+import sys
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+from fixie_rules import (
+    DAILY_EMISSION_LIMIT,
+    INITIAL_SUPPLY,
+    MAX_SUPPLY,
+    MINT_COSTS,
+    RATE_PER_KM,
+    RATE_UNIT,
+    STREAK_BONUS_EVERY,
+    STREAK_BONUS_PER_DAY,
+    WORKOUT_WALKING,
+)
+from reward_engine import REWARD_UNIT, milestone_bonus_units, score_workouts, streak_multipliers
+
+DAILY_LIMIT_UNITS = DAILY_EMISSION_LIMIT // REWARD_UNIT
+MAX_SUPPLY_UNITS = MAX_SUPPLY // REWARD_UNIT
+MINT_COST_UNITS = np.array([cost // REWARD_UNIT for cost in MINT_COSTS], dtype=np.int64)
+STREAK_BONUS_UNITS = STREAK_BONUS_PER_DAY // REWARD_UNIT
+# Smallest non-zero transaction: a 1 km walk (0.5 FIXIE + 1 FIXIE milestone)
+MIN_POSITIVE_UNITS = int(score_workouts([1000], [WORKOUT_WALKING], [0])[0])
+_RATE_UNITS = np.array(RATE_PER_KM, dtype=np.int64) * (RATE_UNIT // REWARD_UNIT)
+# Where minted tokens come from, in DayStats.sources order
+SOURCES = ("distance", "nft_boost", "streak_multiplier", "milestone", "streak_bonus")
+
+
+@dataclass
+class ActivityModel:
+    users: int = 10_000
+    user_growth_per_day: float = 0.0  # compound daily growth of the user base
+    max_users: int = 50_000_000
+    workout_probability: float = 0.3  # chance a user validates a workout on a given day
+    type_mix: tuple = (0.5, 0.3, 0.2)  # running, cycling, walking
+    distance_median_m: float = 5000.0
+    distance_sigma: float = 0.6  # lognormal shape
+    streak_mean: float = 5.0  # geometric streak length after _updateStreak
+    mean_token_boost: float = 3.0  # summed tokenBoost of equipped NFTs
+    nft_purchase_probability: float = 0.002  # per active user per day
+    rarity_mix: tuple = (0.6, 0.25, 0.1, 0.04, 0.01)
+
+
+@dataclass
+class DayStats:
+    day: int
+    users: int
+    workouts: int
+    accepted: int
+    rejected: int
+    minted: int  # wei
+    burned: int  # wei
+    total_supply: int  # wei
+    daily_cap_hit: bool
+    distance_by_type: tuple = (0, 0, 0)  # wei of SOURCES[0] per WORKOUT_* code
+    sources: tuple = (0, 0, 0, 0, 0)  # wei per SOURCES entry; sums to minted
+    nft_purchases: int = 0
+
+
+def accept_in_order(amounts, capacity):
+    # Mirrors sequential mintWorkoutReward calls: each one either fits in the
+    # remaining capacity or reverts, and later smaller ones may still fit.
+    # Returns (accepted mask, amount accepted).
+    accepted = np.zeros(len(amounts), dtype=bool)
+    candidates = np.arange(len(amounts))
+    used = 0
+    while len(candidates):
+        csum = np.cumsum(amounts[candidates])
+        fit = int(np.searchsorted(csum, capacity - used, side="right"))
+        if fit:
+            accepted[candidates[:fit]] = True
+            used += int(csum[fit - 1])
+        rest = candidates[fit + 1:]
+        candidates = rest[amounts[rest] <= capacity - used]
+    return accepted, used
+
+
+def _zero_amount_probability(model):
+    # Once the cap is reached only zero-amount mints (under 1 km, no weekly
+    # bonus) still succeed, so the rest of the day is a single binomial draw
+    z = (math.log(1000) - math.log(model.distance_median_m)) / model.distance_sigma
+    short = 0.5 * (1.0 + math.erf(z / math.sqrt(2.0)))
+    p = 1.0 / max(model.streak_mean, 1.0)
+    q = (1.0 - p) ** (STREAK_BONUS_EVERY - 1)
+    weekly = p * q / (1.0 - q * (1.0 - p))
+    return short * (1.0 - weekly)
+
+
+def _workout_chunk(rng, model, n):
+    # Returns (types, amounts, parts): parts[k] is each workout's share of
+    # SOURCES[k], and the parts of a workout sum to its amount. Same result
+    # as score_workouts plus the weekly bonus, split along the way.
+    types = np.searchsorted(np.cumsum(model.type_mix), rng.random(n) * sum(model.type_mix))
+    distances = rng.lognormal(np.log(model.distance_median_m), model.distance_sigma, n).astype(np.int64)
+    streaks = rng.geometric(1.0 / max(model.streak_mean, 1.0), n)
+    boosts = rng.poisson(model.mean_token_boost, n)
+    parts = np.empty((len(SOURCES), n), dtype=np.int64)
+    parts[0] = (distances // 1000) * _RATE_UNITS[types]
+    boosted = parts[0] * (100 + boosts) // 100  # exact: see reward_engine
+    parts[2] = boosted * streak_multipliers(streaks) // 100 - boosted
+    parts[1] = boosted - parts[0]
+    parts[3] = milestone_bonus_units(distances)
+    # _updateStreak mints the weekly bonus in the same transaction, so a
+    # revert of the workout mint rolls the bonus back too: treat them as one.
+    parts[4] = np.where(streaks % STREAK_BONUS_EVERY == 0, streaks * STREAK_BONUS_UNITS, 0)
+    return types, parts.sum(axis=0), parts
+
+
+def simulate(model, days, chunk_size=250_000, seed=0):
+    # Yields one DayStats per simulated day
+    rng = np.random.default_rng(seed)
+    supply = INITIAL_SUPPLY // REWARD_UNIT
+    users = float(model.users)
+    p_zero = _zero_amount_probability(model)
+
+    for day in range(days):
+        n_users = min(int(users), model.max_users)
+        workouts = int(rng.binomial(n_users, model.workout_probability))
+        daily = 0
+        accepted = 0
+        distance_by_type = np.zeros(3, dtype=np.int64)
+        sources = np.zeros(len(SOURCES), dtype=np.int64)
+        remaining = workouts
+        while remaining:
+            capacity = min(DAILY_LIMIT_UNITS - daily, MAX_SUPPLY_UNITS - supply)
+            if capacity < MIN_POSITIVE_UNITS:
+                accepted += int(rng.binomial(remaining, p_zero))
+                break
+            n = min(chunk_size, remaining)
+            remaining -= n
+            types, amounts, parts = _workout_chunk(rng, model, n)
+            mask, used = accept_in_order(amounts, capacity)
+            accepted += int(mask.sum())
+            # Masked sums without copying the accepted columns; per-chunk
+            # totals stay far below 2**53, so the float bincount is exact
+            weights = mask.astype(np.int64)
+            sources += parts @ weights
+            distance_by_type += np.bincount(types, weights=parts[0] * weights, minlength=3).astype(np.int64)
+            daily += used
+            supply += used
+
+        purchases = int(rng.binomial(workouts, model.nft_purchase_probability))
+        burned = int(rng.multinomial(purchases, model.rarity_mix) @ MINT_COST_UNITS)
+        burned = min(burned, supply)
+        supply -= burned
+
+        yield DayStats(
+            day=day,
+            users=n_users,
+            workouts=workouts,
+            accepted=accepted,
+            rejected=workouts - accepted,
+            minted=daily * REWARD_UNIT,
+            burned=burned * REWARD_UNIT,
+            total_supply=supply * REWARD_UNIT,
+            daily_cap_hit=accepted < workouts and daily > 0,
+            distance_by_type=tuple(int(v) * REWARD_UNIT for v in distance_by_type),
+            sources=tuple(int(v) * REWARD_UNIT for v in sources),
+            nft_purchases=purchases,
+        )
+        users *= 1.0 + model.user_growth_per_day
+
+
+def summarize(day_stats, curve_every=30):
+    # Folds a DayStats stream into totals, first-exhaustion days and a
+    # downsampled supply curve without keeping the whole series
+    summary = {
+        "days": 0,
+        "workouts": 0,
+        "accepted": 0,
+        "rejected": 0,
+        "minted": 0,
+        "burned": 0,
+        "first_daily_cap_day": None,
+        "daily_cap_days": 0,
+        "supply_exhausted_day": None,
+        "supply_curve": [],
+    }
+    for stats in day_stats:
+        summary["days"] += 1
+        summary["workouts"] += stats.workouts
+        summary["accepted"] += stats.accepted
+        summary["rejected"] += stats.rejected
+        summary["minted"] += stats.minted
+        summary["burned"] += stats.burned
+        if stats.daily_cap_hit:
+            summary["daily_cap_days"] += 1
+            if summary["first_daily_cap_day"] is None:
+                summary["first_daily_cap_day"] = stats.day
+        if summary["supply_exhausted_day"] is None and MAX_SUPPLY - stats.total_supply < DAILY_EMISSION_LIMIT // 100:
+            summary["supply_exhausted_day"] = stats.day
+        if stats.day % curve_every == 0:
+            summary["supply_curve"].append((stats.day, stats.total_supply))
+    if summary["days"]:
+        summary["avg_daily_minted"] = summary["minted"] // summary["days"]
+        summary["avg_daily_burned"] = summary["burned"] // summary["days"]
+        summary["avg_daily_net"] = summary["avg_daily_minted"] - summary["avg_daily_burned"]
+    return summary
+
+
+if __name__ == "__main__":
+    print("=== FIXIE EMISSION SIMULATOR ===")
+    print()
+
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    years = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    model = ActivityModel(users=users, user_growth_per_day=0.002)
+
+    start = time.perf_counter()
+    result = summarize(simulate(model, days=365 * years))
+    elapsed = time.perf_counter() - start
+
+    fixie = 10**18
+    print(f"Simulated {result['days']:,} days, {result['workouts']:,} workouts in {elapsed:.1f}s")
+    print(f"Accepted mints: {result['accepted']:,}  Rejected mints: {result['rejected']:,}")
+    print(f"Avg daily emit: {result['avg_daily_minted'] / fixie:,.0f} FIXIE")
+    print(f"Avg daily burn: {result['avg_daily_burned'] / fixie:,.0f} FIXIE")
+    print(f"Avg daily net:  {result['avg_daily_net'] / fixie:+,.0f} FIXIE")
+    print(f"First day at DAILY_EMISSION_LIMIT: {result['first_daily_cap_day']}")
+    print(f"Days at DAILY_EMISSION_LIMIT: {result['daily_cap_days']:,}")
+    print(f"MAX_SUPPLY exhausted on day: {result['supply_exhausted_day']}")
+    print()
+    print("Supply curve:")
+    for day, supply in result["supply_curve"][:: max(1, len(result["supply_curve"]) // 12)]:
+        print(f"  day {day:5d}: {supply / fixie:,.0f} FIXIE")
@@ -0,0 +1,424 @@
+# Self-hosted event indexer: FixieRun contract logs into SQLite
+# script.py plans on The Graph for indexing; this is the same job without a
+# hosted service. It decodes WorkoutValidated, StreakBonus, TokensMinted,
+# NFTMinted, NFTLevelUp, NFTStaked and NFTUnstaked logs (topic0 = keccak256
+# of the event signature, indexed arguments in topics, the rest ABI-encoded
+# in data) and writes one table per event. The gas-optimized FixieToken
+# (script_1.py --optimized) emits TokensMinted(address,uint256,uint8) with a
+# workoutType code instead of a reason string; both land in tokens_minted.
+#
+# Ingest reads block ranges like eth_getLogs, decodes them with plain
+# bytes slicing and writes each range in a single transaction: one
+# executemany per table, a user_totals upsert with the range's per-user sums,
+# and the sync cursor, so an interrupted catch-up resumes from the last
+# committed block. The database runs in WAL mode (readers never block the
+# writer) with synchronous=NORMAL.
+#
+# Covering indexes keep the app's queries off the tables:
+#   per-user history     workout_validated / tokens_minted by (user, block)
+#   leaderboards         user_totals by tokens earned and by distance,
+#                        workout_validated by (timestamp, user) for weekly
+#                        boards
+# Amounts overflow SQLite's 64-bit INTEGER in wei, so they are stored in
+# reward_engine.REWARD_UNIT (1e11 wei, exact for everything WorkoutValidator
+# mints); tokens_minted also keeps the exact wei as text.
+#
+# Logs are matched on (contract address, topic0). EventIndexer takes the
+# deployed FixieToken / FixieRunNFT / WorkoutValidator addresses and defaults
+# to ledger_sim's; logs with a known topic from any other address are counted
+# in unknown_sources rather than dropped without a trace.
+#
+# LocalChain is the block/log stand-in: it mines ledger_sim events into
+# blocks of encoded logs and serves get_logs(from_block, to_block).
+
+import sqlite3
+import sys
+import time
+from collections import Counter, namedtuple
+
+from evm_encoding import keccak256, to_address_bytes
+from fixie_rules import WORKOUT_TYPES
+from ledger_sim import NFT_ADDRESS, TOKEN_ADDRESS, VALIDATOR_ADDRESS
+from reward_engine import REWARD_UNIT
+
+BATCH_BLOCKS = 500  # blocks per get_logs call and per transaction
+
+Log = namedtuple("Log", "address topics data block_number log_index")
+Block = namedtuple("Block", "number timestamp logs")
+
+# ledger_sim's stand-in deployment
+CONTRACTS = {"token": TOKEN_ADDRESS, "nft": NFT_ADDRESS, "validator": VALIDATOR_ADDRESS}
+
+# name: (emitting contract, signature, indexed argument types, data argument types)
+EVENTS = {
+    "MinterAdded": ("token", "MinterAdded(address)", ("address",), ()),
+    "MinterRemoved": ("token", "MinterRemoved(address)", ("address",), ()),
+    "TokensMinted": ("token", "TokensMinted(address,uint256,string)", ("address",), ("uint256", "string")),
+    # optimized FixieToken: reward plus any weekly streak bonus, one log per workout
+    "TokensMintedCode": ("token", "TokensMinted(address,uint256,uint8)", ("address",), ("uint256", "uint8")),
+    "NFTMinted": ("nft", "NFTMinted(address,uint256,uint8)", ("address", "uint256"), ("uint8",)),
+    "NFTLevelUp": ("nft", "NFTLevelUp(uint256,uint256)", ("uint256",), ("uint256",)),
+    "NFTStaked": ("nft", "NFTStaked(uint256,address)", ("uint256", "address"), ()),
+    "NFTUnstaked": ("nft", "NFTUnstaked(uint256,address)", ("uint256", "address"), ()),
+    "WorkoutValidated": ("validator", "WorkoutValidated(address,uint256,uint256,uint256)", ("address",),
+                         ("uint256", "uint256", "uint256")),
+    "StreakBonus": ("validator", "StreakBonus(address,uint256,uint256)", ("address",), ("uint256", "uint256")),
+}
+TOPICS = {name: keccak256(spec[1].encode()) for name, spec in EVENTS.items()}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sync_state (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS blocks (number INTEGER PRIMARY KEY, timestamp INTEGER NOT NULL);
+
+CREATE TABLE IF NOT EXISTS workout_validated (
+    block INTEGER NOT NULL, log_index INTEGER NOT NULL, timestamp INTEGER NOT NULL,
+    user BLOB NOT NULL, distance INTEGER NOT NULL, tokens_earned INTEGER NOT NULL, streak INTEGER NOT NULL,
+    PRIMARY KEY (block, log_index)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS workout_validated_by_user
+    ON workout_validated (user, block, log_index, timestamp, distance, tokens_earned, streak);
+CREATE INDEX IF NOT EXISTS workout_validated_by_time
+    ON workout_validated (timestamp, user, distance, tokens_earned);
+
+CREATE TABLE IF NOT EXISTS streak_bonus (
+    block INTEGER NOT NULL, log_index INTEGER NOT NULL,
+    user BLOB NOT NULL, streak INTEGER NOT NULL, bonus INTEGER NOT NULL,
+    PRIMARY KEY (block, log_index)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS streak_bonus_by_user ON streak_bonus (user, block, log_index, streak, bonus);
+
+CREATE TABLE IF NOT EXISTS tokens_minted (
+    block INTEGER NOT NULL, log_index INTEGER NOT NULL,
+    recipient BLOB NOT NULL, amount INTEGER NOT NULL, amount_wei TEXT NOT NULL, reason TEXT NOT NULL,
+    PRIMARY KEY (block, log_index)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS tokens_minted_by_recipient
+    ON tokens_minted (recipient, block, log_index, amount, reason);
+
+CREATE TABLE IF NOT EXISTS nft_minted (
+    block INTEGER NOT NULL, log_index INTEGER NOT NULL,
+    owner BLOB NOT NULL, token_id INTEGER NOT NULL, rarity INTEGER NOT NULL,
+    PRIMARY KEY (block, log_index)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS nft_minted_by_owner ON nft_minted (owner, token_id, rarity);
+
+CREATE TABLE IF NOT EXISTS nft_level_up (
+    block INTEGER NOT NULL, log_index INTEGER NOT NULL, token_id INTEGER NOT NULL, new_level INTEGER NOT NULL,
+    PRIMARY KEY (block, log_index)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS nft_level_up_by_token ON nft_level_up (token_id, block, log_index, new_level);
+
+-- NFTStaked (staked = 1) and NFTUnstaked (staked = 0)
+CREATE TABLE IF NOT EXISTS nft_staking (
+    block INTEGER NOT NULL, log_index INTEGER NOT NULL,
+    token_id INTEGER NOT NULL, staker BLOB NOT NULL, staked INTEGER NOT NULL,
+    PRIMARY KEY (block, log_index)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS nft_staking_by_token ON nft_staking (token_id, block, log_index, staker, staked);
+CREATE INDEX IF NOT EXISTS nft_staking_by_staker ON nft_staking (staker, block, log_index, token_id, staked);
+
+-- Running per-user sums of WorkoutValidated, for leaderboards
+CREATE TABLE IF NOT EXISTS user_totals (
+    user BLOB PRIMARY KEY, workouts INTEGER NOT NULL, distance INTEGER NOT NULL,
+    tokens_earned INTEGER NOT NULL, best_streak INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS user_totals_by_tokens ON user_totals (tokens_earned DESC, user, distance, workouts);
+CREATE INDEX IF NOT EXISTS user_totals_by_distance ON user_totals (distance DESC, user, tokens_earned, workouts);
+"""
+
+INSERTS = {
+    "workout_validated": "INSERT INTO workout_validated VALUES (?, ?, ?, ?, ?, ?, ?)",
+    "streak_bonus": "INSERT INTO streak_bonus VALUES (?, ?, ?, ?, ?)",
+    "tokens_minted": "INSERT INTO tokens_minted VALUES (?, ?, ?, ?, ?, ?)",
+    "nft_minted": "INSERT INTO nft_minted VALUES (?, ?, ?, ?, ?)",
+    "nft_level_up": "INSERT INTO nft_level_up VALUES (?, ?, ?, ?)",
+    "nft_staking": "INSERT INTO nft_staking VALUES (?, ?, ?, ?, ?)",
+}
+
+UPSERT_TOTALS = """
+INSERT INTO user_totals VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (user) DO UPDATE SET
+    workouts = workouts + excluded.workouts,
+    distance = distance + excluded.distance,
+    tokens_earned = tokens_earned + excluded.tokens_earned,
+    best_streak = max(best_streak, excluded.best_streak)
+"""
+
+
+# -- log encoding (stand-in chain) ---------------------------------------
+
+def _word(abi_type, value):
+    if abi_type == "address":
+        return bytes(12) + value
+    return int(value).to_bytes(32, "big")
+
+
+def encode_log(name, args, block_number, log_index):
+    contract, _, indexed, data_types = EVENTS[name]
+    address = CONTRACTS[contract]
+    topics = (TOPICS[name],) + tuple(_word(t, v) for t, v in zip(indexed, args))
+    head, tail = [], []
+    for abi_type, value in zip(data_types, args[len(indexed):]):
+        if abi_type == "string":
+            raw = value.encode()
+            head.append(32 * len(data_types) + sum(len(part) for part in tail))
+            tail.append(len(raw).to_bytes(32, "big") + raw + bytes(-len(raw) % 32))
+        else:
+            head.append(_word(abi_type, value))
+    data = b"".join(h.to_bytes(32, "big") if isinstance(h, int) else h for h in head) + b"".join(tail)
+    return Log(address, topics, data, block_number, log_index)
+
+
+class LocalChain:
+    # Blocks of encoded logs, mined from a ledger_sim.FixieLedger's events
+    def __init__(self):
+        self.blocks = []
+
+    @property
+    def head(self):
+        return len(self.blocks) - 1
+
+    def mine(self, ledger):
+        # Seals the events recorded since the last call into a new block
+        number = len(self.blocks)
+        logs = [encode_log(name, args, number, i) for i, (name, args) in enumerate(ledger.events)]
+        ledger.events.clear()
+        self.blocks.append(Block(number, ledger.block_timestamp, logs))
+        return number
+
+    def get_logs(self, from_block, to_block):
+        # eth_getLogs over [from_block, to_block], in chain order
+        return [log for block in self.blocks[from_block:to_block + 1] for log in block.logs]
+
+    def timestamps(self, from_block, to_block):
+        return [(block.number, block.timestamp) for block in self.blocks[from_block:to_block + 1]]
+
+
+# -- decoding ---------------------------------------------------------------
+
+def _uint(word):
+    return int.from_bytes(word, "big")
+
+
+def _string(data, offset):
+    start = _uint(data[offset:offset + 32]) + 32
+    return data[start:start + _uint(data[start - 32:start])].decode()
+
+
+class EventIndexer:
+    def __init__(self, path, token=TOKEN_ADDRESS, nft=NFT_ADDRESS, validator=VALIDATOR_ADDRESS):
+        # token / nft / validator: deployed contract addresses
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        self.contracts = {"token": to_address_bytes(token), "nft": to_address_bytes(nft),
+                          "validator": to_address_bytes(validator)}
+        self.unknown_sources = Counter()  # (event name, address) -> logs skipped
+        self._decoders = {
+            (self.contracts[EVENTS[name][0]], TOPICS[name]): decoder for name, decoder in (
+                ("WorkoutValidated", self._workout_validated),
+                ("StreakBonus", self._streak_bonus),
+                ("TokensMinted", self._tokens_minted),
+                ("TokensMintedCode", self._tokens_minted_code),
+                ("NFTMinted", self._nft_minted),
+                ("NFTLevelUp", self._nft_level_up),
+                ("NFTStaked", self._nft_staked),
+                ("NFTUnstaked", self._nft_unstaked),
+            )
+        }
+        self._names = {topic: name for name, topic in TOPICS.items()
+                       if (self.contracts[EVENTS[name][0]], topic) in self._decoders}
+
+    def close(self):
+        # Refreshes planner statistics where the tables have grown
+        self.db.execute("PRAGMA optimize")
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def last_block(self):
+        row = self.db.execute("SELECT value FROM sync_state WHERE key = 'last_block'").fetchone()
+        return -1 if row is None else row[0]
+
+    # Each decoder appends its row to rows[table]; `timestamp` is the block's
+
+    def _workout_validated(self, log, rows, timestamp):
+        d = log.data
+        rows["workout_validated"].append((log.block_number, log.log_index, timestamp, log.topics[1][12:],
+                                          _uint(d[0:32]), _uint(d[32:64]) // REWARD_UNIT, _uint(d[64:96])))
+
+    def _streak_bonus(self, log, rows, timestamp):
+        d = log.data
+        rows["streak_bonus"].append((log.block_number, log.log_index, log.topics[1][12:], _uint(d[0:32]),
+                                     _uint(d[32:64]) // REWARD_UNIT))
+
+    def _tokens_minted(self, log, rows, timestamp):
+        amount = _uint(log.data[0:32])
+        rows["tokens_minted"].append((log.block_number, log.log_index, log.topics[1][12:], amount // REWARD_UNIT,
+                                      str(amount), _string(log.data, 32)))
+
+    def _tokens_minted_code(self, log, rows, timestamp):
+        amount = _uint(log.data[0:32])
+        rows["tokens_minted"].append((log.block_number, log.log_index, log.topics[1][12:], amount // REWARD_UNIT,
+                                      str(amount), "Workout: " + WORKOUT_TYPES[_uint(log.data[32:64])]))
+
+    def _nft_minted(self, log, rows, timestamp):
+        rows["nft_minted"].append((log.block_number, log.log_index, log.topics[1][12:], _uint(log.topics[2]),
+                                   _uint(log.data[0:32])))
+
+    def _nft_level_up(self, log, rows, timestamp):
+        rows["nft_level_up"].append((log.block_number, log.log_index, _uint(log.topics[1]), _uint(log.data[0:32])))
+
+    def _nft_staked(self, log, rows, timestamp):
+        rows["nft_staking"].append((log.block_number, log.log_index, _uint(log.topics[1]), log.topics[2][12:], 1))
+
+    def _nft_unstaked(self, log, rows, timestamp):
+        rows["nft_staking"].append((log.block_number, log.log_index, _uint(log.topics[1]), log.topics[2][12:], 0))
+
+    def _index_range(self, chain, from_block, to_block):
+        timestamps = dict(chain.timestamps(from_block, to_block))
+        rows = {table: [] for table in INSERTS}
+        decoders = self._decoders
+        for log in chain.get_logs(from_block, to_block):
+            decoder = decoders.get((log.address, log.topics[0]))
+            if decoder is not None:
+                decoder(log, rows, timestamps[log.block_number])
+            elif log.topics[0] in self._names:
+                self.unknown_sources[self._names[log.topics[0]], log.address] += 1
+
+        totals = {}
+        for _, _, _, user, distance, tokens, streak in rows["workout_validated"]:
+            total = totals.get(user)
+            if total is None:
+                totals[user] = [user, 1, distance, tokens, streak]
+            else:
+                total[1] += 1
+                total[2] += distance
+                total[3] += tokens
+                total[4] = max(total[4], streak)
+
+        with self.db:
+            self.db.executemany("INSERT OR REPLACE INTO blocks VALUES (?, ?)", timestamps.items())
+            for table, sql in INSERTS.items():
+                if rows[table]:
+                    self.db.executemany(sql, rows[table])
+            self.db.executemany(UPSERT_TOTALS, totals.values())
+            self.db.execute("INSERT OR REPLACE INTO sync_state VALUES ('last_block', ?)", (to_block,))
+        return sum(len(table_rows) for table_rows in rows.values())
+
+    def sync(self, chain, batch_blocks=BATCH_BLOCKS):
+        # Index from the cursor to the chain head; returns the events written
+        written = 0
+        head = chain.head
+        for from_block in range(self.last_block + 1, head + 1, batch_blocks):
+            written += self._index_range(chain, from_block, min(from_block + batch_blocks - 1, head))
+        return written
+
+    # -- queries ------------------------------------------------------------
+
+    def user_history(self, user, limit=20):
+        # Latest workouts: (block, timestamp, distance, tokens_earned units, streak)
+        return self.db.execute(
+            "SELECT block, timestamp, distance, tokens_earned, streak FROM workout_validated "
+            "WHERE user = ? ORDER BY block DESC, log_index DESC LIMIT ?", (user, limit)).fetchall()
+
+    def leaderboard(self, by="tokens_earned", limit=10):
+        # All-time (user, workouts, distance, tokens_earned units)
+        if by not in ("tokens_earned", "distance"):
+            raise ValueError(f"unknown leaderboard {by!r}")
+        return self.db.execute(
+            f"SELECT user, workouts, distance, tokens_earned FROM user_totals ORDER BY {by} DESC LIMIT ?",
+            (limit,)).fetchall()
+
+    def leaderboard_between(self, start, end, limit=10):
+        # (user, distance, tokens_earned units) for workouts in [start, end)
+        return self.db.execute(
+            "SELECT user, SUM(distance) AS distance, SUM(tokens_earned) AS tokens FROM workout_validated "
+            "WHERE timestamp >= ? AND timestamp < ? GROUP BY user ORDER BY tokens DESC LIMIT ?",
+            (start, end, limit)).fetchall()
+
+
+if __name__ == "__main__":
+    print("=== FIXIE EVENT INDEXER ===")
+    print()
+
+    import os
+    import tempfile
+
+    from fixie_rules import SECONDS_PER_DAY
+    from ledger_sim import FixieLedger, Revert, Workout
+
+    # python event_indexer.py [workouts] [db path]
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    path = sys.argv[2] if len(sys.argv) > 2 else os.path.join(tempfile.mkdtemp(prefix="fixie-index-"), "events.db")
+    deployer, validator = "0x" + "11" * 20, "0x" + "22" * 20
+    ledger = FixieLedger.deploy(deployer, block_timestamp=1_700_000_000)
+    ledger.add_validator(deployer, validator)
+    chain = LocalChain()
+    users = [i.to_bytes(20, "big") for i in range(1, 5_001)]
+    for i, user in enumerate(users[:1000]):
+        ledger.seed_nft(user, f"Sneaker #{i}", rarity=i % 5)
+        if i % 4 == 0:
+            ledger.stake_nft(user, i)
+    chain.mine(ledger)
+
+    # One block every 2s; one day per n / 30 workouts
+    per_day = max(n // 30, 1)
+    for i in range(n):
+        if i and i % per_day == 0:
+            ledger.block_timestamp += SECONDS_PER_DAY - (ledger.block_timestamp % SECONDS_PER_DAY) + 600
+        if i % 50 == 0:
+            ledger.block_timestamp += 2
+            chain.mine(ledger)
+        u = i % len(users)
+        workout = Workout(users[u], 1_000 + (i * 37) % 20_000, 1_800 + i, 250, WORKOUT_TYPES[i % 3],
+                          ledger.block_timestamp - 60, (u,) if u < 1000 else ())
+        try:
+            ledger.validate_workout(validator, workout)
+        except Revert:
+            pass
+    chain.mine(ledger)
+    events = sum(len(block.logs) for block in chain.blocks)
+
+    with EventIndexer(path) as indexer:
+        start = time.perf_counter()
+        written = indexer.sync(chain)
+        elapsed = time.perf_counter() - start
+        print(f"Indexed {len(chain.blocks):,} blocks, {events:,} logs ({written:,} rows) in {elapsed:.2f}s "
+              f"({events / elapsed:,.0f} logs/s) -> {path}")
+
+        print("Top 5 by tokens earned:")
+        for user, workouts, distance, tokens in indexer.leaderboard(limit=5):
+            print(f"  0x{user.hex()}  {workouts:>4} workouts  {distance / 1000:>8,.1f} km  "
+                  f"{tokens * REWARD_UNIT / 10**18:>10,.2f} FIXIE")
+        history = indexer.user_history(users[0], limit=3)
+        print(f"Latest workouts of 0x{users[0].hex()}: {history}")
+        week_end = ledger.block_timestamp
+        print(f"Last 7 days leader: {indexer.leaderboard_between(week_end - 7 * SECONDS_PER_DAY, week_end + 1, 1)}")
+        for label, sql, args in (
+            ("history", "SELECT block, timestamp, distance, tokens_earned, streak FROM workout_validated "
+                        "WHERE user = ? ORDER BY block DESC, log_index DESC LIMIT 20", (users[0],)),
+            ("leaderboard", "SELECT user, workouts, distance, tokens_earned FROM user_totals "
+                            "ORDER BY tokens_earned DESC LIMIT 10", ()),
+            ("weekly", "SELECT user, SUM(distance), SUM(tokens_earned) AS tokens FROM workout_validated "
+                       "WHERE timestamp >= ? AND timestamp < ? GROUP BY user ORDER BY tokens DESC LIMIT 10",
+             (week_end - 7 * SECONDS_PER_DAY, week_end + 1)),
+        ):
+            plan = "; ".join(row[-1] for row in indexer.db.execute("EXPLAIN QUERY PLAN " + sql, args))
+            print(f"  plan {label:<11} {plan}")
+
+        # Caught up: a second sync has nothing to do
+        assert indexer.sync(chain) == 0
+        assert not indexer.unknown_sources
+
+    # Pointed at other contracts, nothing is written and the skips are counted
+    with EventIndexer(":memory:", token="0x" + "ab" * 20) as other:
+        other.sync(chain)
+        skipped = sum(other.unknown_sources.values())
+        print(f"Indexer for another token address: {skipped:,} token logs counted as unknown sources")
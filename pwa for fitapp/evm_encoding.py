@@ -0,0 +1,35 @@
+# keccak256 and abi.encodePacked helpers shared by the off-chain tools
+# Only the handful of Solidity types the FixieRun contracts hash are covered.
+# keccak256 comes from pycryptodome (hashlib.sha3_256 uses different padding).
+
+from Crypto.Hash import keccak
+
+
+def keccak256(data):
+    return keccak.new(data=data, digest_bits=256).digest()
+
+
+def to_address_bytes(address):
+    # Accepts "0x..." hex strings, 20 raw bytes or ints
+    if isinstance(address, (bytes, bytearray)):
+        if len(address) != 20:
+            raise ValueError(f"address must be 20 bytes, got {len(address)}")
+        return bytes(address)
+    if isinstance(address, int):
+        return address.to_bytes(20, "big")
+    raw = bytes.fromhex(address[2:] if address.startswith(("0x", "0X")) else address)
+    if len(raw) != 20:
+        raise ValueError(f"address must be 20 bytes, got {len(raw)}")
+    return raw
+
+
+def pack_address(address):
+    return to_address_bytes(address)
+
+
+def pack_uint256(value):
+    return int(value).to_bytes(32, "big")
+
+
+def pack_string(value):
+    return value.encode("utf-8") if isinstance(value, str) else bytes(value)
@@ -0,0 +1,112 @@
+# Contract constants and pure reward rules for FixieRun
+# Mirrors the Solidity emitted by script_1.py so off-chain tools agree with
+# the contracts to the last wei. Keep this file in sync with script_1.py.
+
+from evm_encoding import keccak256, pack_string, pack_uint256
+
+WEI = 10**18
+SECONDS_PER_DAY = 86400  # Solidity `1 days`
+
+# FixieToken
+MAX_SUPPLY = 1_000_000_000 * WEI
+DAILY_EMISSION_LIMIT = 500_000 * WEI
+INITIAL_SUPPLY = 250_000_000 * WEI
+
+# WorkoutValidator
+MAX_WORKOUT_AGE = 3600  # "Workout too old" window, in seconds
+EXP_PER_METERS = 100  # 1 exp per 100m
+STREAK_BONUS_EVERY = 7  # weekly StreakBonus
+STREAK_BONUS_PER_DAY = 1 * WEI
+
+# Workout types, in the order _calculateBaseReward tests them.
+# Anything that is not "running" or "cycling" pays the walking rate.
+WORKOUT_RUNNING = 0
+WORKOUT_CYCLING = 1
+WORKOUT_WALKING = 2
+WORKOUT_TYPES = ("running", "cycling", "walking")
+RATE_PER_KM = (1200, 800, 500)  # multiplied by 10**15 wei
+RATE_UNIT = 10**15
+
+# _getStreakMultiplier: (minimum streak, percent)
+STREAK_TIERS = ((30, 150), (14, 130), (7, 115), (3, 105))
+# _getMilestoneBonus: (minimum km, bonus in wei)
+MILESTONE_TIERS = (
+    (42, 50 * WEI),
+    (21, 25 * WEI),
+    (10, 10 * WEI),
+    (5, 5 * WEI),
+    (1, 1 * WEI),
+)
+
+# FixieRunNFT
+RARITY_COMMON = 0
+RARITY_UNCOMMON = 1
+RARITY_RARE = 2
+RARITY_EPIC = 3
+RARITY_LEGENDARY = 4
+RARITIES = ("COMMON", "UNCOMMON", "RARE", "EPIC", "LEGENDARY")
+ITEM_TYPES = ("SNEAKER", "BIKE", "ACHIEVEMENT", "SPECIAL")
+MINT_COSTS = (10 * WEI, 25 * WEI, 50 * WEI, 100 * WEI, 250 * WEI)
+# _generateStats: (baseBoost, variance) per rarity
+RARITY_STATS = ((1, 2), (3, 3), (6, 4), (10, 5), (15, 5))
+EXP_PER_LEVEL = 1000
+
+
+def workout_type_code(workout_type):
+    if workout_type == "running":
+        return WORKOUT_RUNNING
+    if workout_type == "cycling":
+        return WORKOUT_CYCLING
+    return WORKOUT_WALKING
+
+
+def calculate_base_reward(workout_type, distance):
+    distance_km = distance // 1000
+    return distance_km * RATE_PER_KM[workout_type_code(workout_type)] * RATE_UNIT
+
+
+def apply_token_boost(base_reward, total_token_boost):
+    return base_reward + (base_reward * total_token_boost // 100)
+
+
+def get_streak_multiplier(streak):
+    for min_streak, multiplier in STREAK_TIERS:
+        if streak >= min_streak:
+            return multiplier
+    return 100
+
+
+def get_milestone_bonus(distance):
+    distance_km = distance // 1000
+    for min_km, bonus in MILESTONE_TIERS:
+        if distance_km >= min_km:
+            return bonus
+    return 0
+
+
+def workout_reward(workout_type, distance, streak, total_token_boost=0):
+    # Same order of operations as validateWorkout, so truncation matches
+    boosted = apply_token_boost(calculate_base_reward(workout_type, distance), total_token_boost)
+    final_reward = boosted * get_streak_multiplier(streak) // 100
+    return final_reward + get_milestone_bonus(distance)
+
+
+def generate_stats(rarity, timestamp):
+    # _generateStats: baseBoost + keccak256(abi.encodePacked(block.timestamp, tag)) % variance
+    base_boost, variance = RARITY_STATS[rarity]
+    packed_ts = pack_uint256(timestamp)
+    return tuple(
+        base_boost + int.from_bytes(keccak256(packed_ts + pack_string(tag)), "big") % variance
+        for tag in ("speed", "token", "exp")
+    )
+
+
+def update_streak(streak, last_workout_date, now):
+    # _updateStreak: returns (streak, lastWorkoutDate, bonus wei)
+    today = now // SECONDS_PER_DAY
+    last_day = last_workout_date // SECONDS_PER_DAY
+    if today == last_day:
+        return streak, last_workout_date, 0
+    streak = streak + 1 if today == last_day + 1 else 1
+    bonus = streak * STREAK_BONUS_PER_DAY if streak % STREAK_BONUS_EVERY == 0 else 0
+    return streak, now, bonus
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# fixierun-charts: command line front end for the diagram exporter
+#   fixierun-charts --list
+#   fixierun-charts architecture -o docs/img -f png,svg -s 1000x1000@2
+#   fixierun-charts all --no-cache
+# One subcommand per chart_export.CHARTS entry plus "all". Only the standard
+# library is imported up front: the chart modules (plotly), the render cache
+# hashing and Kaleido are pulled in when a figure is actually built or
+# rendered, so --list / --help stay cheap for the many small CI and doc jobs
+# that call this. Every export reports on stderr how long importing,
+# building and rendering took.
+
+import argparse
+import importlib
+import sys
+import time
+
+import chart_export
+from render_cache import DEFAULT_CACHE_DIR, RenderCache
+
+PROG = "fixierun-charts"
+
+
+def _parser():
+    parser = argparse.ArgumentParser(prog=PROG, description="Build and export the FixieRun diagrams.")
+    parser.add_argument("--list", action="store_true", help="list the available charts and exit")
+    commands = parser.add_subparsers(dest="chart", metavar="CHART")
+    for name in (*chart_export.CHARTS, "all"):
+        help = "every chart in one renderer session" if name == "all" else f"{chart_export.CHARTS[name]}.py"
+        command = commands.add_parser(name, help=help)
+        command.add_argument("-o", "--out-dir", default=".", help="output directory (default: %(default)s)")
+        command.add_argument("-f", "--formats", default="png",
+                             help=f"comma separated, any of {','.join(chart_export.FORMATS)} (default: %(default)s)")
+        command.add_argument("-s", "--sizes", default=None,
+                             help="extra sizes as WxH or WxH@SCALE, comma separated; the chart's own size is "
+                                  "always exported")
+        command.add_argument("-w", "--workers", type=int, default=chart_export.DEFAULT_WORKERS,
+                             help="parallel renderer tabs (default: %(default)s)")
+        command.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="render cache (default: %(default)s)")
+        command.add_argument("--no-cache", action="store_true", help="always re-render")
+    return parser
+
+
+def _timed_import(module):
+    start = time.perf_counter()
+    importlib.import_module(module)
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = _parser()
+    args = parser.parse_args(argv)
+    if args.list:
+        for name, module in chart_export.CHARTS.items():
+            print(f"{name:<16} {module}.py")
+        return 0
+    if args.chart is None:
+        parser.print_help()
+        return 2
+
+    names = list(chart_export.CHARTS) if args.chart == "all" else [args.chart]
+    formats = args.formats.split(",")
+    sizes = [None] + [chart_export.parse_size(s) for s in args.sizes.split(",")] if args.sizes else None
+    cache = None if args.no_cache else RenderCache(args.cache_dir)
+
+    timings = {name: _timed_import(chart_export.CHARTS[name]) for name in names}
+    start = time.perf_counter()
+    paths = chart_export.export(names, formats, sizes, args.out_dir, args.workers, cache=cache)
+    elapsed = time.perf_counter() - start
+
+    for path in paths:
+        print(path)
+    for name, imported in timings.items():
+        print(f"{PROG} {name}: import {imported * 1e3:.0f} ms", file=sys.stderr)
+    summary = f"{PROG}: {len(paths)} images in {elapsed:.2f}s"
+    if cache is not None:
+        summary += f" ({cache.misses} rendered, {cache.hits} from cache)"
+    print(summary, file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
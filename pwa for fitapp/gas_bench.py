@@ -0,0 +1,310 @@
+# Offline gas benchmarks for the script_1.py contracts
+# Compiles FixieToken, FixieRunNFT and WorkoutValidator with the settings in
+# hardhat.config.js (solc 0.8.19, optimizer, 200 runs), deploys them on an
+# in-process py-evm chain (eth-tester, no node, no network) wired like
+# deploy.js, and records gasUsed for:
+#   - validateWorkout, sweeping equippedNFTs length, workoutType, streak
+#     state (first workout, same day, consecutive day, weekly StreakBonus,
+#     broken streak) and milestone distances
+#   - mintNFT, levelUpNFT (with and without a level-up), stakeNFT, unstakeNFT
+# Results go to GAS_BASELINE as {scenario: {"gas": n, "reverted": bool}};
+# `--check` compares a fresh run against it and exits non-zero on any
+# increase beyond the tolerance, so regressions show up in review. The
+# baseline is recorded once by running without flags and committed next to
+# the contracts; `--check` refuses to run without one.
+# `--compare DIR` runs the same scenarios against a second contract set (the
+# gas-optimized one from `script_1.py --optimized` is in ./optimized) and
+# prints both side by side instead of touching the baseline.
+#
+# mintNFT "burns" with transferFrom(msg.sender, address(0), cost), which
+# OpenZeppelin rejects, so it always reverts (see ledger_sim.mint_nft); it is
+# measured as a revert. NFT fixtures are created by FixieRunNFTBench, a
+# subclass that only adds an owner-only seedNFT(); storage layout and every
+# other function are FixieRunNFT's own.
+#
+# Needs: pip install py-solc-x "eth-tester[py-evm]" eth-abi, and the
+# OpenZeppelin sources (`npm install` next to script_1.py's package.json).
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import solcx
+from eth_abi import encode
+from eth_tester import EthereumTester, PyEVMBackend
+from eth_tester.exceptions import TransactionFailed
+
+from evm_encoding import keccak256
+from fixie_rules import MINT_COSTS, RARITY_STATS, SECONDS_PER_DAY, workout_type_code
+
+SOLC_VERSION = "0.8.19"
+OPTIMIZER_RUNS = 200
+CONTRACTS = ("FixieToken.sol", "FixieRunNFT.sol", "WorkoutValidator.sol")
+GAS_BASELINE = "gas_baseline.json"
+GAS_LIMIT = 15_000_000
+SEED_TOKEN_ID = 1_000_000  # fixture NFT ids, far from mintNFT's counter
+MAX_EQUIPPED = 8
+
+BENCH_NFT_SOURCE = """// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.19;
+
+import "./FixieRunNFT.sol";
+
+contract FixieRunNFTBench is FixieRunNFT {
+    constructor(address _fixieToken) FixieRunNFT(_fixieToken) {}
+
+    function seedNFT(address to, uint256 tokenId, Rarity rarity, uint256 boost) external onlyOwner {
+        _safeMint(to, tokenId);
+        // Named fields: the optimized FixieRunNFT packs them in another order
+        NFTMetadata storage metadata = nftMetadata[tokenId];
+        metadata.name = "Bench";
+        metadata.rarity = rarity;
+        metadata.itemType = ItemType.SNEAKER;
+        metadata.level = 1;
+        metadata.speedBoost = uint16(boost);
+        metadata.tokenBoost = uint16(boost);
+        metadata.experienceBoost = uint16(boost);
+        userNFTs[to].push(tokenId);
+    }
+}
+"""
+
+
+def compile_contracts(source_dir=".", node_modules=None):
+    # {contract name: (abi, bytecode hex)}
+    node_modules = os.path.abspath(node_modules or os.path.join(source_dir, "node_modules"))
+    if SOLC_VERSION not in {str(v) for v in solcx.get_installed_solc_versions()}:
+        solcx.install_solc(SOLC_VERSION)
+    sources = {}
+    for name in CONTRACTS:
+        with open(os.path.join(source_dir, name)) as f:
+            sources[name] = {"content": f.read()}
+    sources["FixieRunNFTBench.sol"] = {"content": BENCH_NFT_SOURCE}
+    output = solcx.compile_standard({
+        "language": "Solidity",
+        "sources": sources,
+        "settings": {
+            "optimizer": {"enabled": True, "runs": OPTIMIZER_RUNS},
+            "remappings": [f"@openzeppelin/={node_modules}/@openzeppelin/"],
+            "outputSelection": {"*": {"*": ["abi", "evm.bytecode.object"]}},
+        },
+    }, solc_version=SOLC_VERSION, allow_paths=[node_modules])
+    return {name: (contract["abi"], contract["evm"]["bytecode"]["object"])
+            for unit in output["contracts"].values() for name, contract in unit.items()}
+
+
+def _selector(signature):
+    return keccak256(signature.encode())[:4]
+
+
+def _workout_type(abi):
+    # ABI tuple type of validateWorkout's Workout: workoutType is a string in
+    # script_1.py's contract and an enum (uint8) in the optimized one
+    entry = next(e for e in abi if e["type"] == "function" and e["name"] == "validateWorkout")
+    return "(" + ",".join(component["type"] for component in entry["inputs"][0]["components"]) + ")"
+
+
+class GasBench:
+    def __init__(self, compiled):
+        self.compiled = compiled
+        self.chain = EthereumTester(PyEVMBackend())
+        self.owner, self.validator, self.user, self.other = self.chain.get_accounts()[:4]
+        self._nonce = 0
+
+        # deploy.js wiring, plus a validator account and NFT fixtures
+        self.token = self._deploy("FixieToken")
+        self.nft = self._deploy("FixieRunNFTBench", self.token)
+        self.workouts = self._deploy("WorkoutValidator", self.token, self.nft)
+        self.workout_type = _workout_type(compiled["WorkoutValidator"][0])
+        self.send(self.owner, self.token, "addMinter(address)", ["address"], [self.workouts])
+        self.send(self.owner, self.nft, "setStakingContract(address)", ["address"], [self.workouts])
+        self.send(self.owner, self.workouts, "addValidator(address)", ["address"], [self.validator])
+        self.send(self.owner, self.token, "transfer(address,uint256)", ["address", "uint256"],
+                  [self.user, 10 * MINT_COSTS[-1]])
+        self.nft_ids = []
+        for i in range(MAX_EQUIPPED):
+            rarity = i % len(RARITY_STATS)
+            self.send(self.owner, self.nft, "seedNFT(address,uint256,uint8,uint256)",
+                      ["address", "uint256", "uint8", "uint256"],
+                      [self.user, SEED_TOKEN_ID + i, rarity, RARITY_STATS[rarity][0]])
+            self.nft_ids.append(SEED_TOKEN_ID + i)
+        self.base = self.chain.take_snapshot()
+
+    def _deploy(self, name, *args):
+        abi, bytecode = self.compiled[name]
+        types = next((
+            [item["type"] for item in entry["inputs"]] for entry in abi if entry["type"] == "constructor"), [])
+        data = "0x" + bytecode + encode(types, list(args)).hex()
+        receipt = self._transact({"from": self.owner, "gas": GAS_LIMIT, "data": data})
+        if not receipt["status"]:
+            raise RuntimeError(f"deploying {name} reverted")
+        return receipt["contract_address"]
+
+    def _transact(self, transaction):
+        try:
+            return self.chain.get_transaction_receipt(self.chain.send_transaction(transaction))
+        except TransactionFailed:
+            # Backends that refuse to mine a failing transaction: record the
+            # revert without a gas figure
+            return {"status": 0, "gas_used": None}
+
+    def send(self, sender, to, signature, types, args):
+        # Returns (gas_used, reverted)
+        data = "0x" + (_selector(signature) + encode(types, args)).hex()
+        receipt = self._transact({"from": sender, "to": to, "gas": GAS_LIMIT, "value": 0, "data": data})
+        return receipt["gas_used"], not receipt["status"]
+
+    def reset(self):
+        self.chain.revert_to_snapshot(self.base)
+
+    def now(self):
+        return self.chain.get_block_by_number("pending")["timestamp"]
+
+    def next_day(self, days=1):
+        # Jumps to 10 minutes past midnight `days` days later
+        self.chain.time_travel((self.now() // SECONDS_PER_DAY + days) * SECONDS_PER_DAY + 600)
+
+    def validate(self, distance=3_000, workout_type="running", equipped=0):
+        # A fresh workout (unique duration) timestamped at the pending block
+        self._nonce += 1
+        if self.workout_type.split(",")[4] == "uint8":
+            workout_type = workout_type_code(workout_type)
+        workout = (self.user, distance, 1_800 + self._nonce, distance // 15, workout_type, self.now(),
+                   self.nft_ids[:equipped], b"")
+        return self.send(self.validator, self.workouts, f"validateWorkout({self.workout_type})",
+                         [self.workout_type], [workout])
+
+
+def scenarios():
+    # (name, prelude(bench), measured(bench)); every scenario starts from the
+    # deployed snapshot. Unless a sweep says otherwise the measured workout is
+    # a returning user's first workout of the day (streak 2), running 3 km.
+    def returning(bench):
+        bench.validate()
+        bench.next_day()
+
+    def streak(days, gap=1):
+        def prelude(bench):
+            for _ in range(days):
+                bench.validate()
+                bench.next_day(gap)
+        return prelude
+
+    def same_day(bench):
+        bench.validate()
+
+    for n in (0, 1, 2, 4, MAX_EQUIPPED):
+        yield f"validateWorkout/equipped={n}", returning, lambda b, n=n: b.validate(equipped=n)
+    for workout_type in ("running", "cycling", "walking", "swimming"):
+        yield f"validateWorkout/type={workout_type}", returning, lambda b, t=workout_type: b.validate(workout_type=t)
+    yield "validateWorkout/streak=first", None, lambda b: b.validate()
+    yield "validateWorkout/streak=same-day", same_day, lambda b: b.validate()
+    yield "validateWorkout/streak=2", streak(1), lambda b: b.validate()
+    yield "validateWorkout/streak=7-bonus", streak(6), lambda b: b.validate()
+    yield "validateWorkout/streak=reset", streak(3, gap=2), lambda b: b.validate()
+    for distance in (999, 1_000, 5_000, 10_000, 21_097, 42_195):
+        yield f"validateWorkout/distance={distance}", returning, lambda b, d=distance: b.validate(distance=d)
+
+    def approve(bench):
+        bench.send(bench.user, bench.token, "approve(address,uint256)", ["address", "uint256"],
+                   [bench.nft, MINT_COSTS[0]])
+    yield "mintNFT/common", approve, lambda b: b.send(
+        b.user, b.nft, "mintNFT(address,string,string,uint8,uint8)",
+        ["address", "string", "string", "uint8", "uint8"], [b.user, "Sneaker", "ipfs://fixie/0", 0, 0])
+    for exp, label in ((10, "no-level"), (1_000, "level-up")):
+        yield f"levelUpNFT/{label}", None, lambda b, e=exp: b.send(
+            b.owner, b.nft, "levelUpNFT(uint256,uint256)", ["uint256", "uint256"], [b.nft_ids[0], e])
+    yield "stakeNFT", None, lambda b: b.send(b.user, b.nft, "stakeNFT(uint256)", ["uint256"], [b.nft_ids[0]])
+    yield "unstakeNFT", lambda b: b.send(b.user, b.nft, "stakeNFT(uint256)", ["uint256"], [b.nft_ids[0]]), \
+        lambda b: b.send(b.user, b.nft, "unstakeNFT(uint256)", ["uint256"], [b.nft_ids[0]])
+
+
+def run(bench):
+    results = {}
+    for name, prelude, measured in scenarios():
+        bench.reset()
+        if prelude is not None:
+            prelude(bench)
+        gas, reverted = measured(bench)
+        results[name] = {"gas": gas, "reverted": reverted}
+    return results
+
+
+def compare(baseline, results, tolerance=0.0):
+    # [(scenario, old gas, new gas)] for increases beyond `tolerance`
+    # (fraction), new scenarios, dropped scenarios and changed revert status
+    regressions = []
+    for name in sorted(set(baseline) | set(results)):
+        old, new = baseline.get(name), results.get(name)
+        if old is None or new is None or old["reverted"] != new["reverted"]:
+            regressions.append((name, old and old["gas"], new and new["gas"]))
+        elif old["gas"] is not None and new["gas"] is not None and new["gas"] > old["gas"] * (1 + tolerance):
+            regressions.append((name, old["gas"], new["gas"]))
+    return regressions
+
+
+def side_by_side(base, variant):
+    # [(scenario, base gas, variant gas)] in scenario order
+    return [(name, base[name]["gas"], variant.get(name, {}).get("gas")) for name in base]
+
+
+def save_baseline(results, path=GAS_BASELINE):
+    with open(path, "w") as f:
+        json.dump({"solc": SOLC_VERSION, "optimizer_runs": OPTIMIZER_RUNS, "scenarios": results}, f, indent=1,
+                  sort_keys=True)
+        f.write("\n")
+
+
+def load_baseline(path=GAS_BASELINE):
+    with open(path) as f:
+        return json.load(f)["scenarios"]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure contract gas on an in-process EVM.")
+    parser.add_argument("--contracts", default=".", help="directory with the script_1.py .sol files")
+    parser.add_argument("--node-modules", default=None, help="node_modules with @openzeppelin/contracts")
+    parser.add_argument("--baseline", default=GAS_BASELINE)
+    parser.add_argument("--check", action="store_true", help="fail on gas increases against the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.0, help="allowed increase, in percent")
+    parser.add_argument("--compare", default=None, metavar="DIR",
+                        help="second contract set to report side by side (e.g. optimized)")
+    args = parser.parse_args()
+    if args.check and not os.path.exists(args.baseline):
+        sys.exit(f"No gas baseline at {args.baseline}; run without --check to record one and commit it")
+
+    print("=== FIXIE GAS BENCHMARKS ===")
+    print()
+
+    start = time.perf_counter()
+    node_modules = args.node_modules or os.path.join(args.contracts, "node_modules")
+    results = run(GasBench(compile_contracts(args.contracts, node_modules)))
+    elapsed = time.perf_counter() - start
+
+    if args.compare:
+        variant = run(GasBench(compile_contracts(args.compare, node_modules)))
+        print(f"  {'scenario':<34} {args.contracts:>10} {args.compare:>10} {'delta':>8} {'%':>7}")
+        for name, old, new in side_by_side(results, variant):
+            if old is None or new is None:
+                print(f"  {name:<34} {old or 'n/a':>10} {new or 'n/a':>10}")
+                continue
+            print(f"  {name:<34} {old:>10,} {new:>10,} {new - old:>+8,} {(new - old) / old:>+7.1%}")
+        sys.exit(0)
+
+    baseline = load_baseline(args.baseline) if os.path.exists(args.baseline) else {}
+    for name, result in results.items():
+        old = baseline.get(name, {}).get("gas")
+        delta = f"{result['gas'] - old:+,}" if old is not None and result["gas"] is not None else ""
+        gas = "n/a" if result["gas"] is None else f"{result['gas']:,}"
+        print(f"  {name:<34} {gas:>10} {delta:>8}{'  (reverts)' if result['reverted'] else ''}")
+    print(f"{len(results)} scenarios in {elapsed:.1f}s")
+
+    if args.check:
+        regressions = compare(baseline, results, args.tolerance / 100)
+        for name, old, new in regressions:
+            print(f"REGRESSION {name}: {old} -> {new}")
+        sys.exit(1 if regressions else 0)
+    save_baseline(results, args.baseline)
+    print(f"Baseline written to {args.baseline}")
@@ -0,0 +1,412 @@
+# Streaming GPS track ingestion
+# Reads GPX, TCX and FIT uploads (or raw lat/lon/time arrays) as generators of
+# fixed-size point chunks and folds them into distance, duration, speed and
+# elevation with vectorized haversine. Only one chunk of points is in memory at
+# a time, so arbitrarily long tracks and large upload backlogs stream through.
+# This replaces the baseSpeed +/- random distance that
+# FixieRunApp.updateTrackingStats fakes in app.js.
+
+import gzip
+import os
+import struct
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import islice
+from xml.etree.ElementTree import iterparse
+
+import numpy as np
+
+EARTH_RADIUS_M = 6_371_008.8
+CHUNK_SIZE = 8192
+FIT_EPOCH = 631_065_600  # 1989-12-31T00:00:00Z in unix seconds
+SEMICIRCLE_DEG = 180.0 / 2**31
+INGEST_BATCH = 64  # paths per pool task
+INGEST_WINDOW = 4  # pool tasks in flight per worker
+
+
+@dataclass
+class TrackChunk:
+    lat: np.ndarray  # degrees
+    lon: np.ndarray  # degrees
+    time: np.ndarray  # unix seconds, float64 (NaN when missing)
+    ele: np.ndarray  # metres, float64 (NaN when missing)
+
+    def __len__(self):
+        return len(self.lat)
+
+
+@dataclass
+class TrackStats:
+    points: int = 0
+    distance_m: float = 0.0
+    duration_s: float = 0.0
+    moving_time_s: float = 0.0
+    avg_speed_kmh: float = 0.0
+    max_speed_kmh: float = 0.0
+    elevation_gain_m: float = 0.0
+    elevation_loss_m: float = 0.0
+    start_time: float = float("nan")
+    end_time: float = float("nan")
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    # Great-circle distance in metres between arrays of points (degrees)
+    lat1, lon1, lat2, lon2 = (np.radians(a) for a in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class TrackAccumulator:
+    # Folds chunks into TrackStats, carrying the previous chunk's last point
+    # so segment boundaries are counted exactly once
+
+    def __init__(self, min_moving_speed_kmh=1.0):
+        self.stats = TrackStats()
+        self._last = None
+        self._last_ele = float("nan")
+        self._min_moving = min_moving_speed_kmh / 3.6
+
+    def update(self, chunk):
+        if not len(chunk):
+            return
+        lat, lon, t, ele = chunk.lat, chunk.lon, chunk.time, chunk.ele
+        if self._last is not None:
+            lat = np.concatenate(([self._last[0]], lat))
+            lon = np.concatenate(([self._last[1]], lon))
+            t = np.concatenate(([self._last[2]], t))
+        stats = self.stats
+        stats.points += len(chunk)
+
+        if len(lat) > 1:
+            step = haversine(lat[:-1], lon[:-1], lat[1:], lon[1:])
+            dt = np.diff(t)
+            stats.distance_m += float(step.sum())
+            timed = dt > 0
+            if timed.any():
+                speed = step[timed] / dt[timed]
+                stats.max_speed_kmh = max(stats.max_speed_kmh, float(speed.max()) * 3.6)
+                stats.moving_time_s += float(dt[timed][speed >= self._min_moving].sum())
+
+        valid_t = t[~np.isnan(t)]
+        if len(valid_t):
+            if np.isnan(stats.start_time):
+                stats.start_time = float(valid_t[0])
+            stats.end_time = float(valid_t[-1])
+
+        valid_ele = ele[~np.isnan(ele)]
+        if len(valid_ele):
+            climb = np.diff(np.concatenate(([self._last_ele], valid_ele)) if not np.isnan(self._last_ele) else valid_ele)
+            stats.elevation_gain_m += float(climb[climb > 0].sum())
+            stats.elevation_loss_m -= float(climb[climb < 0].sum())
+            self._last_ele = float(valid_ele[-1])
+
+        self._last = (float(lat[-1]), float(lon[-1]), float(t[-1]))
+
+    def result(self):
+        stats = self.stats
+        if not np.isnan(stats.start_time):
+            stats.duration_s = stats.end_time - stats.start_time
+        if stats.moving_time_s > 0:
+            stats.avg_speed_kmh = stats.distance_m / stats.moving_time_s * 3.6
+        return stats
+
+
+def track_stats(chunks):
+    accumulator = TrackAccumulator()
+    for chunk in chunks:
+        accumulator.update(chunk)
+    return accumulator.result()
+
+
+# -- sources ------------------------------------------------------------
+
+
+def _parse_times(values):
+    # ISO 8601 strings -> unix seconds; the common "...Z" form is parsed by
+    # NumPy in one call, anything else falls back to datetime
+    if all(v and v.endswith("Z") for v in values):
+        stamps = np.array([v[:-1] for v in values], dtype="datetime64[ms]")
+        return stamps.astype(np.int64) / 1000.0
+    return np.array(
+        [datetime.fromisoformat(v.replace("Z", "+00:00")).timestamp() if v else np.nan for v in values]
+    )
+
+
+def _chunk(lat, lon, times, ele):
+    return TrackChunk(
+        np.array(lat, dtype=np.float64),
+        np.array(lon, dtype=np.float64),
+        _parse_times(times) if times else np.array([], dtype=np.float64),
+        np.array(ele, dtype=np.float64),
+    )
+
+
+def _open(source):
+    if not isinstance(source, (str, os.PathLike)):
+        return source
+    if str(source).endswith(".gz"):
+        return gzip.open(source, "rb")
+    return open(source, "rb")
+
+
+def _local(tag):
+    return tag.rpartition("}")[2]
+
+
+def _iter_xml_points(source, point_tag, read_point, chunk_size):
+    lat, lon, times, ele = [], [], [], []
+    stack = []
+    with _open(source) as f:
+        for event, elem in iterparse(f, events=("start", "end")):
+            if event == "start":
+                stack.append(elem)
+                continue
+            stack.pop()
+            if _local(elem.tag) != point_tag:
+                continue
+            point = read_point(elem)
+            # Drop the finished point from its parent so memory stays flat
+            elem.clear()
+            if stack and len(stack[-1]) and stack[-1][-1] is elem:
+                del stack[-1][-1]
+            if point is None:
+                continue
+            lat.append(point[0])
+            lon.append(point[1])
+            times.append(point[2])
+            ele.append(point[3])
+            if len(lat) >= chunk_size:
+                yield _chunk(lat, lon, times, ele)
+                lat, lon, times, ele = [], [], [], []
+    if lat:
+        yield _chunk(lat, lon, times, ele)
+
+
+def _gpx_point(elem):
+    point_time = None
+    point_ele = np.nan
+    for child in elem:
+        name = _local(child.tag)
+        if name == "time":
+            point_time = child.text.strip()
+        elif name == "ele":
+            point_ele = float(child.text)
+    return float(elem.get("lat")), float(elem.get("lon")), point_time, point_ele
+
+
+def _tcx_point(elem):
+    lat = lon = None
+    point_time = None
+    point_ele = np.nan
+    for child in elem.iter():
+        name = _local(child.tag)
+        if name == "LatitudeDegrees":
+            lat = float(child.text)
+        elif name == "LongitudeDegrees":
+            lon = float(child.text)
+        elif name == "Time":
+            point_time = child.text.strip()
+        elif name == "AltitudeMeters":
+            point_ele = float(child.text)
+    if lat is None or lon is None:
+        return None  # indoor / paused samples carry no position
+    return lat, lon, point_time, point_ele
+
+
+def iter_gpx_points(source, chunk_size=CHUNK_SIZE):
+    return _iter_xml_points(source, "trkpt", _gpx_point, chunk_size)
+
+
+def iter_tcx_points(source, chunk_size=CHUNK_SIZE):
+    return _iter_xml_points(source, "Trackpoint", _tcx_point, chunk_size)
+
+
+# FIT "record" message (global 20) fields we read: number -> name
+_FIT_RECORD = 20
+_FIT_FIELDS = {0: "lat", 1: "lon", 2: "altitude", 78: "enhanced_altitude", 253: "timestamp"}
+_FIT_INVALID = {"lat": 0x7FFFFFFF, "lon": 0x7FFFFFFF, "altitude": 0xFFFF,
+                "enhanced_altitude": 0xFFFFFFFF, "timestamp": 0xFFFFFFFF}
+_FIT_FORMATS = {1: "b", 2: "B", 0x83: "h", 0x84: "H", 0x85: "i", 0x86: "I", 0x8C: "I", 0x8B: "H", 0x0A: "B"}
+
+
+def _fit_definition(f, header):
+    _, arch, global_num, field_count = struct.unpack("<BBHB", f.read(5))
+    endian = ">" if arch else "<"
+    if arch:
+        global_num = struct.unpack(">H", struct.pack("<H", global_num))[0]
+    fields = [struct.unpack("BBB", f.read(3)) for _ in range(field_count)]
+    consumed = 5 + 3 * field_count
+    dev_size = 0
+    if header & 0x20:  # developer data fields are skipped by size
+        dev_count = f.read(1)[0]
+        dev_size = sum(struct.unpack("BBB", f.read(3))[1] for _ in range(dev_count))
+        consumed += 1 + 3 * dev_count
+
+    # Precompute one struct for the whole message, with pad bytes for
+    # fields we do not decode
+    fmt = endian
+    names = []
+    for number, size, base_type in fields:
+        name = _FIT_FIELDS.get(number)
+        code = _FIT_FORMATS.get(base_type)
+        wanted = name is not None and (global_num == _FIT_RECORD or number == 253)
+        if wanted and code and struct.calcsize(code) == size:
+            fmt += code
+            names.append(name)
+        else:
+            fmt += f"{size}x"
+    fmt += f"{dev_size}x"
+    return (global_num, struct.Struct(fmt), names), consumed
+
+
+def iter_fit_points(source, chunk_size=CHUNK_SIZE):
+    # Minimal streaming FIT decoder: definition and data messages, compressed
+    # timestamp headers and developer fields; only record positions,
+    # altitude and timestamps are decoded
+    lat, lon, times, ele = [], [], [], []
+    definitions = {}
+    last_timestamp = 0
+    with _open(source) as f:
+        header_size = f.read(1)[0]
+        header = f.read(header_size - 1)
+        data_size = struct.unpack("<I", header[3:7])[0]
+        if header[7:11] != b".FIT":
+            raise ValueError("not a FIT file")
+        remaining = data_size
+        while remaining > 0:
+            record_header = f.read(1)[0]
+            values = None
+            if record_header & 0x80:  # compressed timestamp header
+                local = (record_header >> 5) & 0x3
+                offset = record_header & 0x1F
+                last_timestamp = (last_timestamp & ~0x1F) + offset + (0x20 if offset < (last_timestamp & 0x1F) else 0)
+                global_num, layout, names = definitions[local]
+                values = dict(zip(names, layout.unpack(f.read(layout.size))))
+                values.setdefault("timestamp", last_timestamp)
+                consumed = 1 + layout.size
+            elif record_header & 0x40:  # definition message
+                definitions[record_header & 0x0F], consumed = _fit_definition(f, record_header)
+                consumed += 1
+            else:
+                global_num, layout, names = definitions[record_header & 0x0F]
+                values = dict(zip(names, layout.unpack(f.read(layout.size))))
+                consumed = 1 + layout.size
+            remaining -= consumed
+
+            if values is None:
+                continue
+            stamp = values.get("timestamp", _FIT_INVALID["timestamp"])
+            if stamp != _FIT_INVALID["timestamp"]:
+                last_timestamp = stamp
+            if global_num != _FIT_RECORD:
+                continue
+            if values.get("lat", _FIT_INVALID["lat"]) == _FIT_INVALID["lat"]:
+                continue
+            if values.get("lon", _FIT_INVALID["lon"]) == _FIT_INVALID["lon"]:
+                continue
+            altitude = values.get("enhanced_altitude", _FIT_INVALID["enhanced_altitude"])
+            if altitude == _FIT_INVALID["enhanced_altitude"]:
+                altitude = values.get("altitude", _FIT_INVALID["altitude"])
+                altitude = np.nan if altitude == _FIT_INVALID["altitude"] else altitude / 5.0 - 500.0
+            else:
+                altitude = altitude / 5.0 - 500.0
+            lat.append(values["lat"])
+            lon.append(values["lon"])
+            times.append(last_timestamp + FIT_EPOCH)
+            ele.append(altitude)
+            if len(lat) >= chunk_size:
+                yield _fit_chunk(lat, lon, times, ele)
+                lat, lon, times, ele = [], [], [], []
+    if lat:
+        yield _fit_chunk(lat, lon, times, ele)
+
+
+def _fit_chunk(lat, lon, times, ele):
+    return TrackChunk(
+        np.array(lat, dtype=np.float64) * SEMICIRCLE_DEG,
+        np.array(lon, dtype=np.float64) * SEMICIRCLE_DEG,
+        np.array(times, dtype=np.float64),
+        np.array(ele, dtype=np.float64),
+    )
+
+
+def iter_array_points(lat, lon, timestamps, ele=None, chunk_size=CHUNK_SIZE):
+    # Raw arrays (e.g. decoded from the PWA's tracking samples)
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    ele = np.full(len(lat), np.nan) if ele is None else np.asarray(ele, dtype=np.float64)
+    for lo in range(0, len(lat), chunk_size):
+        hi = lo + chunk_size
+        yield TrackChunk(lat[lo:hi], lon[lo:hi], timestamps[lo:hi], ele[lo:hi])
+
+
+_READERS = {".gpx": iter_gpx_points, ".tcx": iter_tcx_points, ".fit": iter_fit_points}
+
+
+def open_track(path, chunk_size=CHUNK_SIZE):
+    name = str(path).lower()
+    if name.endswith(".gz"):
+        name = name[:-3]
+    reader = _READERS.get(os.path.splitext(name)[1])
+    if reader is None:
+        raise ValueError(f"unsupported track format: {path}")
+    return reader(path, chunk_size)
+
+
+def _ingest_one(path):
+    return path, track_stats(open_track(path))
+
+
+def _ingest_batch(paths):
+    return [_ingest_one(path) for path in paths]
+
+
+def ingest(paths, workers=1):
+    # Yields (path, TrackStats) for each upload, in input order. `paths` is
+    # consumed lazily: at most workers * INGEST_WINDOW batches are pending,
+    # so an iterator over millions of files never sits in memory
+    if workers == 1:
+        for path in paths:
+            yield _ingest_one(path)
+        return
+    paths = iter(paths)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        while True:
+            while len(pending) < workers * INGEST_WINDOW:
+                batch = list(islice(paths, INGEST_BATCH))
+                if not batch:
+                    break
+                pending.append(pool.submit(_ingest_batch, batch))
+            if not pending:
+                return
+            yield from pending.popleft().result()
+
+
+if __name__ == "__main__":
+    print("=== FIXIE GPS TRACK INGESTION ===")
+    print()
+
+    if len(sys.argv) > 1:
+        for path, stats in ingest(sys.argv[1:], workers=min(len(sys.argv) - 1, os.cpu_count() or 1)):
+            print(f"{path}: {stats.distance_m / 1000:.2f} km in {stats.duration_s / 60:.1f} min, "
+                  f"avg {stats.avg_speed_kmh:.1f} km/h, max {stats.max_speed_kmh:.1f} km/h, "
+                  f"+{stats.elevation_gain_m:.0f} m / -{stats.elevation_loss_m:.0f} m")
+    else:
+        # Synthetic 1 Hz ride, the rate of app.js's trackingInterval
+        n = 2_000_000
+        rng = np.random.default_rng(0)
+        heading = np.cumsum(rng.normal(0, 0.05, n))
+        step = 5.0 / 111_320  # ~18 km/h
+        lat = 48.85 + np.cumsum(np.cos(heading) * step)
+        lon = 2.35 + np.cumsum(np.sin(heading) * step / np.cos(np.radians(48.85)))
+        start = time.perf_counter()
+        stats = track_stats(iter_array_points(lat, lon, 1_700_000_000 + np.arange(n)))
+        elapsed = time.perf_counter() - start
+        print(f"{n:,} points in {elapsed:.2f}s ({n / elapsed:,.0f} points/s): "
+              f"{stats.distance_m / 1000:.1f} km, avg {stats.avg_speed_kmh:.1f} km/h")
@@ -0,0 +1,79 @@
+# Batched keccak256 over NumPy arrays
+# Runs Keccak-f[1600] on many equal-length messages at once, one uint64 lane
+# array per state word, so bulk hashing (rarity Monte Carlo, Merkle trees)
+# pays the per-call overhead once per batch instead of once per digest.
+# Output is bit-for-bit evm_encoding.keccak256.
+
+import numpy as np
+
+RATE = 136  # bytes absorbed per permutation for keccak256
+CHUNK = 8192  # messages per pass; keeps the 25 lanes in cache
+
+_ROUND_CONSTANTS = [
+    0x0000000000000001, 0x0000000000008082, 0x800000000000808A, 0x8000000080008000,
+    0x000000000000808B, 0x0000000080000001, 0x8000000080008081, 0x8000000000008009,
+    0x000000000000008A, 0x0000000000000088, 0x0000000080008009, 0x000000008000000A,
+    0x000000008000808B, 0x800000000000008B, 0x8000000000008089, 0x8000000000008003,
+    0x8000000000008002, 0x8000000000000080, 0x000000000000800A, 0x800000008000000A,
+    0x8000000080008081, 0x8000000000008080, 0x0000000080000001, 0x8000000080008008,
+]
+_ROTATIONS = [1, 3, 6, 10, 15, 21, 28, 36, 45, 55, 2, 14, 27, 41, 56, 8, 25, 43, 62, 18, 39, 61, 20, 44]
+_PI_LANES = [10, 7, 11, 17, 18, 3, 5, 16, 8, 21, 24, 4, 15, 23, 19, 13, 12, 2, 20, 14, 22, 9, 6, 1]
+_RC = [np.uint64(rc) for rc in _ROUND_CONSTANTS]
+_SHIFTS = {r: (np.uint64(r), np.uint64(64 - r)) for r in set(_ROTATIONS) | {1}}
+
+
+def _rotl(x, r):
+    left, right = _SHIFTS[r]
+    return (x << left) | (x >> right)
+
+
+def _permute(state):
+    # state: list of 25 uint64 arrays, updated in place
+    for rc in _RC:
+        c = [state[i] ^ state[i + 5] ^ state[i + 10] ^ state[i + 15] ^ state[i + 20] for i in range(5)]
+        for i in range(5):
+            d = c[(i + 4) % 5] ^ _rotl(c[(i + 1) % 5], 1)
+            for j in range(0, 25, 5):
+                state[j + i] ^= d
+
+        t = state[1]
+        for i in range(24):
+            j = _PI_LANES[i]
+            t, state[j] = state[j], _rotl(t, _ROTATIONS[i])
+
+        for j in range(0, 25, 5):
+            row = state[j:j + 5]
+            for i in range(5):
+                state[j + i] = row[i] ^ (~row[(i + 1) % 5] & row[(i + 2) % 5])
+
+        state[0] = state[0] ^ rc
+
+
+def _keccak256_block(messages):
+    n, length = messages.shape
+    blocks = length // RATE + 1
+    padded = np.zeros((n, blocks * RATE), dtype=np.uint8)
+    padded[:, :length] = messages
+    padded[:, length] ^= 0x01
+    padded[:, -1] ^= 0x80
+    lanes = padded.view("<u8")  # (n, blocks * 17)
+
+    state = [np.zeros(n, dtype=np.uint64) for _ in range(25)]
+    for block in range(blocks):
+        for i in range(RATE // 8):
+            state[i] ^= lanes[:, block * (RATE // 8) + i]
+        _permute(state)
+    return np.stack(state[:4], axis=1).astype("<u8").view(np.uint8)
+
+
+def keccak256_batch(messages):
+    # messages: (n, length) uint8 array of equal-length messages
+    # returns: (n, 32) uint8 array of digests
+    messages = np.ascontiguousarray(messages, dtype=np.uint8)
+    if len(messages) <= CHUNK:
+        return _keccak256_block(messages)
+    out = np.empty((len(messages), 32), dtype=np.uint8)
+    for lo in range(0, len(messages), CHUNK):
+        out[lo:lo + CHUNK] = _keccak256_block(messages[lo:lo + CHUNK])
+    return out
@@ -0,0 +1,532 @@
+# In-process ledger simulator for FixieToken, FixieRunNFT and WorkoutValidator
+# A pure-Python stand-in for the contracts emitted by script_1.py, built for
+# load-testing the validator pipeline far beyond what a Hardhat node sustains.
+#
+# State is kept in compact arrays indexed by an interned account id
+# (balances, userStreaks, lastWorkoutDate) and NFT metadata is stored
+# struct-of-arrays by token id. Every external function checks its requires
+# in the same order as the Solidity and raises Revert with the same reason
+# string; validateWorkout computes all effects before writing any of them,
+# so a revert leaves state untouched exactly like a reverted transaction.
+#
+# processedWorkouts is keyed by the abi.encodePacked preimage of workoutHash
+# rather than its keccak: the packing is unambiguous, so set membership is
+# identical and the simulator skips a hash per validation. processed_hash()
+# gives the on-chain key when it is needed.
+#
+# Semantics follow OpenZeppelin 4.9 (the version pinned in package.json).
+# Recipients are treated as EOAs (no onERC721Received hook) and only the
+# events the FixieRun contracts declare are recorded.
+
+import sys
+import time
+from array import array
+from collections import Counter, namedtuple
+
+from evm_encoding import to_address_bytes
+from fixie_rules import (
+    DAILY_EMISSION_LIMIT,
+    EXP_PER_LEVEL,
+    EXP_PER_METERS,
+    INITIAL_SUPPLY,
+    MAX_SUPPLY,
+    MAX_WORKOUT_AGE,
+    MINT_COSTS,
+    SECONDS_PER_DAY,
+    STREAK_BONUS_EVERY,
+    STREAK_BONUS_PER_DAY,
+    generate_stats,
+    workout_reward,
+)
+from workout_dedup import workout_hash
+
+ZERO_ADDRESS = b"\x00" * 20
+TOKEN_ADDRESS = bytes.fromhex("f1e0000000000000000000000000000000000001")
+NFT_ADDRESS = bytes.fromhex("f1e0000000000000000000000000000000000002")
+VALIDATOR_ADDRESS = bytes.fromhex("f1e0000000000000000000000000000000000003")
+
+Workout = namedtuple(
+    "Workout",
+    "user distance duration calories workout_type timestamp equipped_nfts signature",
+    defaults=((), b""),
+)
+
+NFTMetadata = namedtuple(
+    "NFTMetadata",
+    "name rarity item_type level experience speed_boost token_boost experience_boost is_staked staked_timestamp",
+)
+
+
+class Revert(Exception):
+    def __init__(self, reason):
+        super().__init__(reason)
+        self.reason = reason
+
+
+PANIC_ARITHMETIC = "panic code 0x11"
+
+
+class FixieLedger:
+    def __init__(self, deployer, block_timestamp=0, record_events=True):
+        self.block_timestamp = block_timestamp
+        self.events = [] if record_events else None
+
+        # Account interning: any address spelling -> compact id
+        self._ids = {}
+        self._addresses = []
+        self.balances = []  # wei per account id
+        self.allowances = {}  # (owner id, spender id) -> wei
+        self.user_streaks = array("I")
+        self.last_workout_date = array("Q")
+
+        # FixieToken
+        self.token_owner = self._account(deployer)
+        self.total_supply = 0
+        self.minters = set()
+        self.daily_minted = {}
+        self.paused = False
+
+        # FixieRunNFT, struct-of-arrays by token id
+        self.nft_owner = self.token_owner
+        self.staking_contract = self._account(ZERO_ADDRESS)
+        self.nft_holder = array("I")
+        self.nft_names = []
+        self.nft_uris = []
+        self.nft_rarity = array("B")
+        self.nft_item_type = array("B")
+        self.nft_level = array("Q")
+        self.nft_experience = array("Q")
+        self.nft_speed_boost = array("Q")
+        self.nft_token_boost = array("Q")
+        self.nft_experience_boost = array("Q")
+        self.nft_is_staked = array("B")
+        self.nft_staked_timestamp = array("Q")
+        self.user_nfts = {}  # account id -> [token ids]
+
+        # WorkoutValidator
+        self.validator_owner = self.token_owner
+        self.validators = set()
+        self.processed_workouts = set()
+
+        self._token = self._account(TOKEN_ADDRESS)
+        self._nft = self._account(NFT_ADDRESS)
+        self._validator = self._account(VALIDATOR_ADDRESS)
+
+        # FixieToken constructor
+        self._mint(self.token_owner, INITIAL_SUPPLY)
+
+    @classmethod
+    def deploy(cls, deployer, block_timestamp=0, record_events=True):
+        # Mirrors deploy.js: deploy all three, then wire up permissions
+        ledger = cls(deployer, block_timestamp, record_events)
+        ledger.add_minter(deployer, VALIDATOR_ADDRESS)
+        ledger.set_staking_contract(deployer, VALIDATOR_ADDRESS)
+        return ledger
+
+    # -- accounts -------------------------------------------------------
+
+    def _account(self, address):
+        account = self._ids.get(address)
+        if account is None:
+            raw = to_address_bytes(address)
+            account = self._ids.get(raw)
+            if account is None:
+                account = len(self._addresses)
+                self._addresses.append(raw)
+                self.balances.append(0)
+                self.user_streaks.append(0)
+                self.last_workout_date.append(0)
+                self._ids[raw] = account
+            self._ids[address] = account
+        return account
+
+    def address_of(self, account):
+        return self._addresses[account]
+
+    def _emit(self, name, *args):
+        if self.events is not None:
+            self.events.append((name, args))
+
+    def _only(self, sender, owner):
+        if self._account(sender) != owner:
+            raise Revert("Ownable: caller is not the owner")
+
+    # -- FixieToken -----------------------------------------------------
+
+    def balance_of(self, address):
+        return self.balances[self._account(address)]
+
+    def add_minter(self, sender, minter):
+        self._only(sender, self.token_owner)
+        self.minters.add(self._account(minter))
+        self._emit("MinterAdded", to_address_bytes(minter))
+
+    def remove_minter(self, sender, minter):
+        self._only(sender, self.token_owner)
+        self.minters.discard(self._account(minter))
+        self._emit("MinterRemoved", to_address_bytes(minter))
+
+    def pause(self, sender):
+        self._only(sender, self.token_owner)
+        if self.paused:
+            raise Revert("Pausable: paused")
+        self.paused = True
+
+    def unpause(self, sender):
+        self._only(sender, self.token_owner)
+        if not self.paused:
+            raise Revert("Pausable: not paused")
+        self.paused = False
+
+    def _check_mint(self, minter, to, amount, daily, supply):
+        # Requires of mintWorkoutReward + ERC20._mint, in order
+        if minter not in self.minters:
+            raise Revert("Not authorized to mint")
+        if self.paused:
+            raise Revert("Pausable: paused")
+        if daily + amount > DAILY_EMISSION_LIMIT:
+            raise Revert("Daily emission limit exceeded")
+        if supply + amount > MAX_SUPPLY:
+            raise Revert("Would exceed max supply")
+        if self._addresses[to] == ZERO_ADDRESS:
+            raise Revert("ERC20: mint to the zero address")
+
+    def _mint(self, to, amount):
+        if self.paused:
+            raise Revert("Pausable: paused")
+        self.total_supply += amount
+        self.balances[to] += amount
+
+    def mint_workout_reward(self, sender, to, amount, reason):
+        minter = self._account(sender)
+        to = self._account(to)
+        today = self.block_timestamp // SECONDS_PER_DAY
+        daily = self.daily_minted.get(today, 0)
+        self._check_mint(minter, to, amount, daily, self.total_supply)
+        self.daily_minted[today] = daily + amount
+        self._mint(to, amount)
+        self._emit("TokensMinted", self._addresses[to], amount, reason)
+
+    def _transfer(self, sender, to, amount):
+        if self._addresses[sender] == ZERO_ADDRESS:
+            raise Revert("ERC20: transfer from the zero address")
+        if self._addresses[to] == ZERO_ADDRESS:
+            raise Revert("ERC20: transfer to the zero address")
+        if self.paused:
+            raise Revert("Pausable: paused")
+        if self.balances[sender] < amount:
+            raise Revert("ERC20: transfer amount exceeds balance")
+        self.balances[sender] -= amount
+        self.balances[to] += amount
+
+    def transfer(self, sender, to, amount):
+        self._transfer(self._account(sender), self._account(to), amount)
+        return True
+
+    def approve(self, sender, spender, amount):
+        spender = self._account(spender)
+        if self._addresses[spender] == ZERO_ADDRESS:
+            raise Revert("ERC20: approve to the zero address")
+        self.allowances[self._account(sender), spender] = amount
+        return True
+
+    def allowance(self, owner, spender):
+        return self.allowances.get((self._account(owner), self._account(spender)), 0)
+
+    def _spend_allowance(self, owner, spender, amount):
+        current = self.allowances.get((owner, spender), 0)
+        if current != 2**256 - 1:
+            if current < amount:
+                raise Revert("ERC20: insufficient allowance")
+            return current - amount
+        return current
+
+    def transfer_from(self, sender, owner, to, amount):
+        spender = self._account(sender)
+        owner = self._account(owner)
+        to = self._account(to)
+        remaining = self._spend_allowance(owner, spender, amount)
+        self._transfer(owner, to, amount)
+        self.allowances[owner, spender] = remaining
+        return True
+
+    def burn(self, sender, amount):
+        account = self._account(sender)
+        if self.paused:
+            raise Revert("Pausable: paused")
+        if self.balances[account] < amount:
+            raise Revert("ERC20: burn amount exceeds balance")
+        self.balances[account] -= amount
+        self.total_supply -= amount
+
+    # -- FixieRunNFT ----------------------------------------------------
+
+    def set_staking_contract(self, sender, staking_contract):
+        self._only(sender, self.nft_owner)
+        self.staking_contract = self._account(staking_contract)
+
+    def _exists(self, token_id):
+        return 0 <= token_id < len(self.nft_holder)
+
+    def owner_of(self, token_id):
+        if not self._exists(token_id):
+            raise Revert("ERC721: invalid token ID")
+        return self._addresses[self.nft_holder[token_id]]
+
+    def _append_nft(self, to, name, token_uri, rarity, item_type, stats):
+        token_id = len(self.nft_holder)
+        self.nft_holder.append(to)
+        self.nft_names.append(name)
+        self.nft_uris.append(token_uri)
+        self.nft_rarity.append(rarity)
+        self.nft_item_type.append(item_type)
+        self.nft_level.append(1)
+        self.nft_experience.append(0)
+        self.nft_speed_boost.append(stats[0])
+        self.nft_token_boost.append(stats[1])
+        self.nft_experience_boost.append(stats[2])
+        self.nft_is_staked.append(0)
+        self.nft_staked_timestamp.append(0)
+        self.user_nfts.setdefault(to, []).append(token_id)
+        self._emit("NFTMinted", self._addresses[to], token_id, rarity)
+        return token_id
+
+    def mint_nft(self, sender, to, name, token_uri, rarity, item_type):
+        # The contract "burns" with transferFrom(msg.sender, address(0), cost),
+        # which OpenZeppelin rejects after spending the allowance check, so
+        # this always reverts on-chain; see seed_nft for test fixtures.
+        payer = self._account(sender)
+        remaining = self._spend_allowance(payer, self._nft, MINT_COSTS[rarity])
+        self._transfer(payer, self._account(ZERO_ADDRESS), MINT_COSTS[rarity])
+        self.allowances[payer, self._nft] = remaining
+        to = self._account(to)
+        if self._addresses[to] == ZERO_ADDRESS:
+            raise Revert("ERC721: mint to the zero address")
+        stats = generate_stats(rarity, self.block_timestamp)
+        return self._append_nft(to, name, token_uri, rarity, item_type, stats)
+
+    def seed_nft(self, to, name, rarity, item_type=0, token_uri=""):
+        # Genesis helper (like hardhat_setStorageAt): creates an NFT with
+        # mintNFT's stats but without its payment, for load-test fixtures
+        stats = generate_stats(rarity, self.block_timestamp)
+        return self._append_nft(self._account(to), name, token_uri, rarity, item_type, stats)
+
+    def level_up_nft(self, sender, token_id, experience_gained):
+        caller = self._account(sender)
+        if caller != self.nft_owner and caller != self.staking_contract:
+            raise Revert("Unauthorized")
+        if not self._exists(token_id):
+            raise Revert("NFT does not exist")
+        experience = self.nft_experience[token_id] + experience_gained
+        self.nft_experience[token_id] = experience
+        new_level = experience // EXP_PER_LEVEL + 1
+        if new_level > self.nft_level[token_id]:
+            self.nft_level[token_id] = new_level
+            self.nft_speed_boost[token_id] += 1
+            self.nft_token_boost[token_id] += 1
+            self.nft_experience_boost[token_id] += 1
+            self._emit("NFTLevelUp", token_id, new_level)
+
+    def stake_nft(self, sender, token_id):
+        staker = self._account(sender)
+        if self._account(self.owner_of(token_id)) != staker:
+            raise Revert("Not owner")
+        if self.nft_is_staked[token_id]:
+            raise Revert("Already staked")
+        self.nft_is_staked[token_id] = 1
+        self.nft_staked_timestamp[token_id] = self.block_timestamp
+        self._emit("NFTStaked", token_id, self._addresses[staker])
+
+    def unstake_nft(self, sender, token_id):
+        staker = self._account(sender)
+        if self._account(self.owner_of(token_id)) != staker:
+            raise Revert("Not owner")
+        if not self.nft_is_staked[token_id]:
+            raise Revert("Not staked")
+        self.nft_is_staked[token_id] = 0
+        self.nft_staked_timestamp[token_id] = 0
+        self._emit("NFTUnstaked", token_id, self._addresses[staker])
+
+    def get_user_nfts(self, user):
+        return list(self.user_nfts.get(self._account(user), ()))
+
+    def get_nft_boosts(self, token_id):
+        # Public mapping getter semantics: missing tokens read as zeros
+        if not self._exists(token_id):
+            return (0, 0, 0)
+        return (self.nft_speed_boost[token_id], self.nft_token_boost[token_id], self.nft_experience_boost[token_id])
+
+    def nft_metadata(self, token_id):
+        if not self._exists(token_id):
+            return NFTMetadata("", 0, 0, 0, 0, 0, 0, 0, False, 0)
+        return NFTMetadata(
+            self.nft_names[token_id],
+            self.nft_rarity[token_id],
+            self.nft_item_type[token_id],
+            self.nft_level[token_id],
+            self.nft_experience[token_id],
+            self.nft_speed_boost[token_id],
+            self.nft_token_boost[token_id],
+            self.nft_experience_boost[token_id],
+            bool(self.nft_is_staked[token_id]),
+            self.nft_staked_timestamp[token_id],
+        )
+
+    # -- WorkoutValidator -----------------------------------------------
+
+    def add_validator(self, sender, validator):
+        self._only(sender, self.validator_owner)
+        self.validators.add(self._account(validator))
+
+    def remove_validator(self, sender, validator):
+        self._only(sender, self.validator_owner)
+        self.validators.discard(self._account(validator))
+
+    def get_user_streak(self, user):
+        return self.user_streaks[self._account(user)]
+
+    def processed_hash(self, workout):
+        # The processedWorkouts key validateWorkout uses on-chain
+        return workout_hash(
+            to_address_bytes(workout.user),
+            workout.distance,
+            workout.duration,
+            workout.calories,
+            workout.workout_type,
+            workout.timestamp,
+        )
+
+    def validate_workout(self, sender, workout):
+        if self._account(sender) not in self.validators:
+            raise Revert("Not authorized validator")
+        user = self._account(workout.user)
+        user_address = self._addresses[user]
+        # workout_preimage, inlined: this is the hot path
+        workout_key = b"".join((
+            user_address,
+            workout.distance.to_bytes(32, "big"),
+            workout.duration.to_bytes(32, "big"),
+            workout.calories.to_bytes(32, "big"),
+            workout.workout_type.encode(),
+            workout.timestamp.to_bytes(32, "big"),
+        ))
+        if workout_key in self.processed_workouts:
+            raise Revert("Workout already processed")
+        now = self.block_timestamp
+        if workout.timestamp > now:
+            raise Revert(PANIC_ARITHMETIC)
+        if now - workout.timestamp >= MAX_WORKOUT_AGE:
+            raise Revert("Workout too old")
+
+        # NFT loop on scratch copies; a token equipped twice sees its own
+        # level-up from the first pass, as it would on-chain
+        validator = self._validator
+        total_token_boost = 0
+        touched = {}
+        exp_gained = workout.distance // EXP_PER_METERS
+        for token_id in workout.equipped_nfts:
+            if not self._exists(token_id):
+                raise Revert("ERC721: invalid token ID")
+            if self.nft_holder[token_id] != user:
+                raise Revert("NFT not owned")
+            nft = touched.get(token_id)
+            if nft is None:
+                nft = [self.nft_experience[token_id], self.nft_level[token_id], self.nft_token_boost[token_id], []]
+                touched[token_id] = nft
+            total_token_boost += nft[2]
+            if validator != self.nft_owner and validator != self.staking_contract:
+                raise Revert("Unauthorized")
+            nft[0] += exp_gained
+            new_level = nft[0] // EXP_PER_LEVEL + 1
+            if new_level > nft[1]:
+                nft[1] = new_level
+                nft[2] += 1
+                nft[3].append(new_level)
+
+        # _updateStreak
+        today = now // SECONDS_PER_DAY
+        last_day = self.last_workout_date[user] // SECONDS_PER_DAY
+        streak = self.user_streaks[user]
+        daily = self.daily_minted.get(today, 0)
+        supply = self.total_supply
+        streak_changed = today != last_day
+        bonus = 0
+        if streak_changed:
+            streak = streak + 1 if today == last_day + 1 else 1
+            if streak % STREAK_BONUS_EVERY == 0:
+                bonus = streak * STREAK_BONUS_PER_DAY
+                self._check_mint(validator, user, bonus, daily, supply)
+                daily += bonus
+                supply += bonus
+
+        final_reward = workout_reward(workout.workout_type, workout.distance, streak, total_token_boost)
+        self._check_mint(validator, user, final_reward, daily, supply)
+
+        # Every require has passed: apply the effects
+        self.processed_workouts.add(workout_key)
+        for token_id, (experience, level, token_boost, new_levels) in touched.items():
+            self.nft_experience[token_id] = experience
+            if new_levels:
+                self.nft_level[token_id] = level
+                self.nft_token_boost[token_id] = token_boost
+                self.nft_speed_boost[token_id] += len(new_levels)
+                self.nft_experience_boost[token_id] += len(new_levels)
+                for new_level in new_levels:
+                    self._emit("NFTLevelUp", token_id, new_level)
+        if streak_changed:
+            self.user_streaks[user] = streak
+            self.last_workout_date[user] = now
+        self.daily_minted[today] = daily + final_reward
+        self.total_supply = supply + final_reward
+        self.balances[user] += bonus + final_reward
+        if self.events is not None:
+            if bonus:
+                self._emit("TokensMinted", user_address, bonus, "Streak Bonus")
+                self._emit("StreakBonus", user_address, streak, bonus)
+            self._emit("TokensMinted", user_address, final_reward, "Workout: " + workout.workout_type)
+            self._emit("WorkoutValidated", user_address, workout.distance, final_reward, streak)
+        return final_reward
+
+
+if __name__ == "__main__":
+    print("=== FIXIE IN-PROCESS LEDGER SIMULATOR ===")
+    print()
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    deployer = "0x" + "11" * 20
+    validator = "0x" + "22" * 20
+    ledger = FixieLedger.deploy(deployer, block_timestamp=1_700_000_000, record_events=False)
+    ledger.add_validator(deployer, validator)
+
+    users = [i.to_bytes(20, "big") for i in range(1, 10_001)]
+    for i, user in enumerate(users[:2000]):
+        ledger.seed_nft(user, f"Sneaker #{i}", rarity=i % 5)
+
+    workouts = [
+        Workout(
+            users[i % len(users)],
+            1000 + (i * 37) % 20_000,
+            1800,
+            250,
+            ("running", "cycling", "walking")[i % 3],
+            ledger.block_timestamp - (i % 600),
+            (i % len(users),) if i % len(users) < 2000 else (),
+        )
+        for i in range(n)
+    ]
+
+    reverted = Counter()
+    start = time.perf_counter()
+    for i, workout in enumerate(workouts):
+        if i % 50_000 == 0:
+            ledger.block_timestamp += SECONDS_PER_DAY
+            workouts_shift = SECONDS_PER_DAY * (i // 50_000 + 1)
+        try:
+            ledger.validate_workout(validator, workout._replace(timestamp=workout.timestamp + workouts_shift))
+        except Revert as exc:
+            reverted[exc.reason] += 1
+    elapsed = time.perf_counter() - start
+    print(f"Validated {n:,} workouts in {elapsed:.2f}s ({n / elapsed:,.0f}/s)")
+    for reason, count in reverted.most_common():
+        print(f"  reverted {count:,}x: {reason}")
+    print(f"Total supply: {ledger.total_supply / 10**18:,.2f} FIXIE")
@@ -0,0 +1,213 @@
+
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.19;
+
+import "@openzeppelin/contracts/token/ERC721/ERC721.sol";
+import "@openzeppelin/contracts/token/ERC721/extensions/ERC721URIStorage.sol";
+import "@openzeppelin/contracts/access/Ownable.sol";
+import "@openzeppelin/contracts/token/ERC20/IERC20.sol";
+import "@openzeppelin/contracts/security/ReentrancyGuard.sol";
+import "@openzeppelin/contracts/utils/math/SafeCast.sol";
+
+/**
+ * @title FixieRunNFT (gas-optimized)
+ * @dev NFT contract for FixieRun equipment; metadata packed into two slots
+ */
+contract FixieRunNFT is ERC721, ERC721URIStorage, Ownable, ReentrancyGuard {
+    uint256 private _nextTokenId;
+
+    enum Rarity { COMMON, UNCOMMON, RARE, EPIC, LEGENDARY }
+    enum ItemType { SNEAKER, BIKE, ACHIEVEMENT, SPECIAL }
+
+    // name has its own slot; everything else shares one (26 bytes). Field
+    // order is FixieRunNFT's, so the nftMetadata getter returns the same
+    // words (narrower types, same left-padded encoding)
+    struct NFTMetadata {
+        string name;
+        Rarity rarity;
+        ItemType itemType;
+        uint32 level;
+        uint64 experience;
+        uint16 speedBoost; // Percentage boost (1-20)
+        uint16 tokenBoost; // Percentage boost (1-20)
+        uint16 experienceBoost; // Percentage boost (1-20)
+        bool isStaked;
+        uint40 stakedTimestamp;
+    }
+
+    mapping(uint256 => NFTMetadata) public nftMetadata;
+    mapping(address => uint256[]) public userNFTs;
+    mapping(Rarity => uint256) public mintCosts; // Cost in FIXIE tokens
+
+    address public fixieToken;
+    address public stakingContract;
+
+    event NFTMinted(address indexed to, uint256 indexed tokenId, Rarity rarity);
+    event NFTLevelUp(uint256 indexed tokenId, uint256 newLevel);
+    event NFTStaked(uint256 indexed tokenId, address indexed staker);
+    event NFTUnstaked(uint256 indexed tokenId, address indexed staker);
+
+    constructor(address _fixieToken) ERC721("FixieRun Equipment", "FIXIE-NFT") {
+        fixieToken = _fixieToken;
+
+        // Set mint costs for each rarity (in FIXIE tokens)
+        mintCosts[Rarity.COMMON] = 10 * 10**18;      // 10 FIXIE
+        mintCosts[Rarity.UNCOMMON] = 25 * 10**18;    // 25 FIXIE
+        mintCosts[Rarity.RARE] = 50 * 10**18;        // 50 FIXIE
+        mintCosts[Rarity.EPIC] = 100 * 10**18;       // 100 FIXIE
+        mintCosts[Rarity.LEGENDARY] = 250 * 10**18;  // 250 FIXIE
+    }
+
+    function mintNFT(
+        address to,
+        string memory name,
+        string memory tokenURI,
+        Rarity rarity,
+        ItemType itemType
+    ) external nonReentrant {
+        // Burn FIXIE tokens for minting (unchanged from FixieRunNFT)
+        IERC20(fixieToken).transferFrom(msg.sender, address(0), mintCosts[rarity]);
+
+        uint256 tokenId = _nextTokenId++;
+
+        _safeMint(to, tokenId);
+        _setTokenURI(tokenId, tokenURI);
+
+        (uint16 speedBoost, uint16 tokenBoost, uint16 experienceBoost) = _generateStats(rarity);
+
+        nftMetadata[tokenId] = NFTMetadata({
+            name: name,
+            rarity: rarity,
+            itemType: itemType,
+            level: 1,
+            experience: 0,
+            speedBoost: speedBoost,
+            tokenBoost: tokenBoost,
+            experienceBoost: experienceBoost,
+            isStaked: false,
+            stakedTimestamp: 0
+        });
+
+        userNFTs[to].push(tokenId);
+        emit NFTMinted(to, tokenId, rarity);
+    }
+
+    function levelUpNFT(uint256 tokenId, uint256 experienceGained) external {
+        require(msg.sender == owner() || msg.sender == stakingContract, "Unauthorized");
+        require(_exists(tokenId), "NFT does not exist");
+        _levelUp(tokenId, experienceGained);
+    }
+
+    /**
+     * @dev What WorkoutValidator did per equipped NFT (ownerOf, getNFTBoosts,
+     * levelUpNFT) in one call: returns the summed tokenBoost, each read
+     * before that NFT's level-up
+     */
+    function applyWorkout(address user, uint256[] calldata tokenIds, uint256 experienceGained)
+        external
+        returns (uint256 totalTokenBoost)
+    {
+        require(msg.sender == owner() || msg.sender == stakingContract, "Unauthorized");
+        for (uint256 i = 0; i < tokenIds.length; ) {
+            uint256 tokenId = tokenIds[i];
+            require(ownerOf(tokenId) == user, "NFT not owned");
+            totalTokenBoost += nftMetadata[tokenId].tokenBoost;
+            _levelUp(tokenId, experienceGained);
+            unchecked { ++i; }
+        }
+    }
+
+    function _levelUp(uint256 tokenId, uint256 experienceGained) private {
+        NFTMetadata storage metadata = nftMetadata[tokenId];
+        uint256 experience = metadata.experience + experienceGained;
+        metadata.experience = SafeCast.toUint64(experience);
+
+        // Level up every 1000 experience points
+        uint256 newLevel = (experience / 1000) + 1;
+        if (newLevel > metadata.level) {
+            metadata.level = SafeCast.toUint32(newLevel);
+            // Increase boosts by 1% per level
+            metadata.speedBoost += 1;
+            metadata.tokenBoost += 1;
+            metadata.experienceBoost += 1;
+
+            emit NFTLevelUp(tokenId, newLevel);
+        }
+    }
+
+    function stakeNFT(uint256 tokenId) external {
+        require(ownerOf(tokenId) == msg.sender, "Not owner");
+        NFTMetadata storage metadata = nftMetadata[tokenId];
+        require(!metadata.isStaked, "Already staked");
+
+        metadata.isStaked = true;
+        metadata.stakedTimestamp = uint40(block.timestamp);
+
+        emit NFTStaked(tokenId, msg.sender);
+    }
+
+    function unstakeNFT(uint256 tokenId) external {
+        require(ownerOf(tokenId) == msg.sender, "Not owner");
+        NFTMetadata storage metadata = nftMetadata[tokenId];
+        require(metadata.isStaked, "Not staked");
+
+        metadata.isStaked = false;
+        metadata.stakedTimestamp = 0;
+
+        emit NFTUnstaked(tokenId, msg.sender);
+    }
+
+    function getUserNFTs(address user) external view returns (uint256[] memory) {
+        return userNFTs[user];
+    }
+
+    function getNFTBoosts(uint256 tokenId) external view returns (uint256, uint256, uint256) {
+        NFTMetadata storage metadata = nftMetadata[tokenId];
+        return (metadata.speedBoost, metadata.tokenBoost, metadata.experienceBoost);
+    }
+
+    function _generateStats(Rarity rarity) private view returns (uint16, uint16, uint16) {
+        uint256 baseBoost;
+        uint256 variance;
+
+        if (rarity == Rarity.COMMON) {
+            baseBoost = 1;
+            variance = 2;
+        } else if (rarity == Rarity.UNCOMMON) {
+            baseBoost = 3;
+            variance = 3;
+        } else if (rarity == Rarity.RARE) {
+            baseBoost = 6;
+            variance = 4;
+        } else if (rarity == Rarity.EPIC) {
+            baseBoost = 10;
+            variance = 5;
+        } else {
+            baseBoost = 15;
+            variance = 5;
+        }
+
+        // Generate pseudo-random stats (in production, use Chainlink VRF)
+        uint256 speedBoost = baseBoost + (uint256(keccak256(abi.encodePacked(block.timestamp, "speed"))) % variance);
+        uint256 tokenBoost = baseBoost + (uint256(keccak256(abi.encodePacked(block.timestamp, "token"))) % variance);
+        uint256 experienceBoost = baseBoost + (uint256(keccak256(abi.encodePacked(block.timestamp, "exp"))) % variance);
+
+        return (uint16(speedBoost), uint16(tokenBoost), uint16(experienceBoost));
+    }
+
+    function setStakingContract(address _stakingContract) external onlyOwner {
+        stakingContract = _stakingContract;
+    }
+
+    function tokenURI(uint256 tokenId) public view override(ERC721, ERC721URIStorage) returns (string memory) {
+        return super.tokenURI(tokenId);
+    }
+
+    function _burn(uint256 tokenId) internal override(ERC721, ERC721URIStorage) {
+        super._burn(tokenId);
+    }
+
+    function supportsInterface(bytes4 interfaceId) public view override(ERC721, ERC721URIStorage) returns (bool) {
+        return super.supportsInterface(interfaceId);
+    }
+}
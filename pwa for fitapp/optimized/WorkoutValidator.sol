@@ -0,0 +1,179 @@
+
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.19;
+
+import "@openzeppelin/contracts/access/Ownable.sol";
+import "@openzeppelin/contracts/security/ReentrancyGuard.sol";
+import "@openzeppelin/contracts/utils/cryptography/ECDSA.sol";
+
+interface IFixieToken {
+    function mintWorkoutReward(address to, uint256 amount, uint8 reason) external;
+}
+
+interface IFixieRunNFT {
+    function applyWorkout(address user, uint256[] calldata tokenIds, uint256 experienceGained)
+        external
+        returns (uint256 totalTokenBoost);
+}
+
+/**
+ * @title WorkoutValidator (gas-optimized)
+ * @dev Validates workouts and mints FIXIE token rewards
+ */
+contract WorkoutValidator is Ownable, ReentrancyGuard {
+    using ECDSA for bytes32;
+
+    enum WorkoutType { RUNNING, CYCLING, WALKING }
+
+    IFixieToken public immutable fixieToken;
+    IFixieRunNFT public immutable fixieRunNFT;
+
+    // streak and lastWorkoutDate (a timestamp) share one slot
+    struct Streak {
+        uint64 streak;
+        uint64 lastWorkoutDate;
+    }
+
+    mapping(address => bool) public validators;
+    mapping(bytes32 => bool) public processedWorkouts;
+    mapping(address => Streak) private _streaks;
+
+    struct Workout {
+        address user;
+        uint256 distance; // in meters
+        uint256 duration; // in seconds
+        uint256 calories;
+        WorkoutType workoutType;
+        uint256 timestamp;
+        uint256[] equippedNFTs;
+        bytes signature;
+    }
+
+    event WorkoutValidated(
+        address indexed user,
+        uint256 distance,
+        uint256 tokensEarned,
+        uint256 streak
+    );
+
+    event StreakBonus(address indexed user, uint256 streak, uint256 bonus);
+
+    constructor(address _fixieToken, address _fixieRunNFT) {
+        fixieToken = IFixieToken(_fixieToken);
+        fixieRunNFT = IFixieRunNFT(_fixieRunNFT);
+    }
+
+    function addValidator(address _validator) external onlyOwner {
+        validators[_validator] = true;
+    }
+
+    function removeValidator(address _validator) external onlyOwner {
+        validators[_validator] = false;
+    }
+
+    function validateWorkout(Workout calldata workout) external nonReentrant {
+        require(validators[msg.sender], "Not authorized validator");
+
+        bytes32 workoutHash = keccak256(
+            abi.encodePacked(
+                workout.user,
+                workout.distance,
+                workout.duration,
+                workout.calories,
+                _workoutTypeName(workout.workoutType), // same preimage as the string version
+                workout.timestamp
+            )
+        );
+
+        require(!processedWorkouts[workoutHash], "Workout already processed");
+        require(block.timestamp - workout.timestamp < 3600, "Workout too old"); // 1 hour max
+
+        processedWorkouts[workoutHash] = true;
+
+        // Calculate base reward (tokens per km)
+        uint256 baseReward = (workout.distance / 1000) * _ratePerKm(workout.workoutType) * 10**15;
+
+        // Apply NFT boosts (and level the NFTs up) in one call
+        uint256 totalTokenBoost = 0;
+        if (workout.equippedNFTs.length != 0) {
+            totalTokenBoost = fixieRunNFT.applyWorkout(workout.user, workout.equippedNFTs, workout.distance / 100);
+        }
+        uint256 boostedReward = baseReward + (baseReward * totalTokenBoost / 100);
+
+        // Calculate and apply streak bonus
+        (uint256 streak, uint256 bonus) = _updateStreak(workout.user);
+        uint256 finalReward = boostedReward * _getStreakMultiplier(streak) / 100;
+
+        // Add milestone bonuses
+        finalReward += _getMilestoneBonus(workout.distance);
+
+        // Mint the reward and any weekly streak bonus together
+        fixieToken.mintWorkoutReward(workout.user, finalReward + bonus, uint8(workout.workoutType));
+
+        emit WorkoutValidated(workout.user, workout.distance, finalReward, streak);
+    }
+
+    function _workoutTypeName(WorkoutType workoutType) private pure returns (bytes memory) {
+        if (workoutType == WorkoutType.RUNNING) return "running";
+        if (workoutType == WorkoutType.CYCLING) return "cycling";
+        return "walking";
+    }
+
+    function _ratePerKm(WorkoutType workoutType) private pure returns (uint256) {
+        if (workoutType == WorkoutType.RUNNING) return 1200; // 1.2 FIXIE per km
+        if (workoutType == WorkoutType.CYCLING) return 800;  // 0.8 FIXIE per km
+        return 500; // walking: 0.5 FIXIE per km
+    }
+
+    function _updateStreak(address user) private returns (uint256 streak, uint256 bonus) {
+        Streak memory current = _streaks[user];
+        uint256 today = block.timestamp / 1 days;
+        uint256 lastDay = current.lastWorkoutDate / 1 days;
+
+        if (today == lastDay) {
+            // Same day, no streak change
+            return (current.streak, 0);
+        }
+        // Consecutive day increases the streak, anything else resets it
+        streak = today == lastDay + 1 ? current.streak + 1 : 1;
+        _streaks[user] = Streak(uint64(streak), uint64(block.timestamp));
+
+        // Streak bonus for weekly milestones, minted with the reward
+        if (streak % 7 == 0) {
+            bonus = streak * 10**18; // 1 FIXIE per streak day
+            emit StreakBonus(user, streak, bonus);
+        }
+    }
+
+    function _getStreakMultiplier(uint256 streak) private pure returns (uint256) {
+        if (streak >= 30) return 150; // 50% bonus for 30+ day streak
+        if (streak >= 14) return 130; // 30% bonus for 14+ day streak
+        if (streak >= 7) return 115;  // 15% bonus for 7+ day streak
+        if (streak >= 3) return 105;  // 5% bonus for 3+ day streak
+        return 100; // No bonus
+    }
+
+    function _getMilestoneBonus(uint256 distance) private pure returns (uint256) {
+        uint256 distanceKm = distance / 1000;
+
+        if (distanceKm >= 42) return 50 * 10**18;  // Marathon: 50 FIXIE
+        if (distanceKm >= 21) return 25 * 10**18;  // Half marathon: 25 FIXIE
+        if (distanceKm >= 10) return 10 * 10**18;  // 10K: 10 FIXIE
+        if (distanceKm >= 5) return 5 * 10**18;    // 5K: 5 FIXIE
+        if (distanceKm >= 1) return 1 * 10**18;    // 1K: 1 FIXIE
+
+        return 0;
+    }
+
+    function userStreaks(address user) external view returns (uint256) {
+        return _streaks[user].streak;
+    }
+
+    function lastWorkoutDate(address user) external view returns (uint256) {
+        return _streaks[user].lastWorkoutDate;
+    }
+
+    function getUserStreak(address user) external view returns (uint256) {
+        return _streaks[user].streak;
+    }
+}
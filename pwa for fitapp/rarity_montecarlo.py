@@ -0,0 +1,130 @@
+# Parallel Monte Carlo of FixieRunNFT._generateStats
+# Reproduces boost = baseBoost + keccak256(abi.encodePacked(block.timestamp, tag)) % variance
+# bit-for-bit for a range of block timestamps, spread over a process pool.
+#
+# The digest depends only on the timestamp and the tag ("speed", "token",
+# "exp"), so each timestamp is hashed three times and the remainders for every
+# variance (2, 3, 4, 5) are taken from those same digests. Workers return a
+# joint (speed, token, exp) histogram per variance, which is enough to report
+# exact marginals and correlations without shipping samples back.
+
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from fixie_rules import RARITIES, RARITY_STATS, generate_stats
+from keccak_batch import keccak256_batch
+
+TAGS = (b"speed", b"token", b"exp")
+VARIANCES = sorted({variance for _, variance in RARITY_STATS})
+
+
+def _uint256_mod(digests, modulus):
+    # digests: (n, 32) uint8 big-endian uint256 values
+    words = np.ascontiguousarray(digests).view(">u8").astype(np.uint64)
+    shift = np.uint64(pow(2, 64, modulus))
+    m = np.uint64(modulus)
+    r = np.zeros(len(words), dtype=np.uint64)
+    for i in range(4):
+        r = (r * shift + words[:, i] % m) % m
+    return r.astype(np.int64)
+
+
+def _tag_digests(timestamps, tag):
+    packed = np.zeros((len(timestamps), 32 + len(tag)), dtype=np.uint8)
+    packed[:, 24:32] = timestamps.astype(">u8").view(np.uint8).reshape(-1, 8)
+    packed[:, 32:] = np.frombuffer(tag, dtype=np.uint8)
+    return keccak256_batch(packed)
+
+
+def stat_remainders(timestamps):
+    # {variance: (n, 3) array of keccak % variance for speed, token, exp}
+    timestamps = np.asarray(timestamps, dtype=np.uint64)
+    digests = [_tag_digests(timestamps, tag) for tag in TAGS]
+    return {v: np.stack([_uint256_mod(d, v) for d in digests], axis=1) for v in VARIANCES}
+
+
+def _joint_counts(start, stop, chunk_size):
+    counts = {v: np.zeros(v**3, dtype=np.int64) for v in VARIANCES}
+    for lo in range(start, stop, chunk_size):
+        remainders = stat_remainders(np.arange(lo, min(lo + chunk_size, stop), dtype=np.uint64))
+        for v, r in remainders.items():
+            counts[v] += np.bincount((r[:, 0] * v + r[:, 1]) * v + r[:, 2], minlength=v**3)
+    return counts
+
+
+def run(start, samples, workers=None, chunk_size=65_536):
+    # Joint histograms over block timestamps [start, start + samples)
+    workers = workers or os.cpu_count() or 1
+    per_task = max(chunk_size, -(-samples // (workers * 8)))
+    ranges = [(lo, min(lo + per_task, start + samples)) for lo in range(start, start + samples, per_task)]
+    total = {v: np.zeros(v**3, dtype=np.int64) for v in VARIANCES}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_joint_counts, lo, hi, chunk_size) for lo, hi in ranges]
+        for future in futures:
+            for v, counts in future.result().items():
+                total[v] += counts
+    return total
+
+
+def report(joint_counts):
+    # Per rarity: boost value distribution per stat and the 3x3 correlation
+    # matrix between speed, token and experience boosts
+    result = {}
+    for rarity, (base, variance) in zip(RARITIES, RARITY_STATS):
+        joint = joint_counts[variance].reshape(variance, variance, variance)
+        n = joint.sum()
+        marginals = [joint.sum(axis=tuple(a for a in range(3) if a != s)) for s in range(3)]
+        values = np.arange(variance)
+        means = [float(values @ m) / n for m in marginals]
+        grid = np.indices(joint.shape)
+        correlation = np.eye(3)
+        for a in range(3):
+            for b in range(a + 1, 3):
+                cov = float(((grid[a] - means[a]) * (grid[b] - means[b]) * joint).sum()) / n
+                var_a = float(((values - means[a]) ** 2) @ marginals[a]) / n
+                var_b = float(((values - means[b]) ** 2) @ marginals[b]) / n
+                correlation[a, b] = correlation[b, a] = cov / np.sqrt(var_a * var_b)
+        result[rarity] = {
+            "samples": int(n),
+            "boost_values": (base + values).tolist(),
+            "distribution": {
+                stat: (m / n).tolist() for stat, m in zip(("speed", "token", "experience"), marginals)
+            },
+            "mean_boost": [base + m for m in means],
+            "correlation": correlation,
+            "all_three_equal": float(sum(joint[i, i, i] for i in range(variance))) / n,
+        }
+    return result
+
+
+if __name__ == "__main__":
+    print("=== FIXIE _generateStats MONTE CARLO ===")
+    print()
+
+    samples = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    start_ts = 1_700_000_000
+
+    # Bit-for-bit check against the scalar mirror of _generateStats
+    check = stat_remainders(np.arange(start_ts, start_ts + 200, dtype=np.uint64))
+    for i in range(200):
+        for rarity, (base, variance) in enumerate(RARITY_STATS):
+            assert generate_stats(rarity, start_ts + i) == tuple(base + int(r) for r in check[variance][i])
+    print("Cross-check vs fixie_rules.generate_stats: OK")
+
+    begin = time.perf_counter()
+    summary = report(run(start_ts, samples))
+    elapsed = time.perf_counter() - begin
+    print(f"Hashed {samples:,} timestamps x 3 tags in {elapsed:.1f}s "
+          f"({samples * 3 / elapsed:,.0f} keccak/s on {os.cpu_count()} cores)")
+    print()
+    for rarity, stats in summary.items():
+        print(f"{rarity}: boosts {stats['boost_values']}, mean {stats['mean_boost'][1]:.3f}")
+        for stat, dist in stats["distribution"].items():
+            print(f"  {stat:<10} " + " ".join(f"{p:.4f}" for p in dist))
+        corr = stats["correlation"]
+        print(f"  corr speed/token {corr[0, 1]:+.4f}  speed/exp {corr[0, 2]:+.4f}  token/exp {corr[1, 2]:+.4f}")
+        print(f"  all three boosts equal: {stats['all_three_equal']:.4f}")
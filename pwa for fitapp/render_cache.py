@@ -0,0 +1,130 @@
+# Content-addressed render cache for the chart exporter
+# An exported image is a pure function of the figure (the chart data plus
+# its layout) and the export options, so artifacts are stored under
+# sha256(figure JSON, options, plotly / kaleido versions). Before rendering,
+# chart_export.export() asks the cache for every job: hits are copied into
+# place without starting a browser, only misses go to the Renderer and are
+# stored afterwards. Editing architecture_data, flow_arrows / external_nodes
+# or pwa_data (or a chart's layout / EXPORT settings) changes the key of that
+# chart only. Artifacts are evicted least-recently-used once the cache grows
+# past max_bytes; a hit refreshes the artifact's mtime.
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+
+DEFAULT_CACHE_DIR = os.path.join(".cache", "charts")
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def _versions():
+    from importlib import metadata  # deferred: ~30 ms, only needed once a cache is opened
+
+    versions = []
+    for package in ("plotly", "kaleido"):
+        try:
+            versions.append(metadata.version(package))
+        except metadata.PackageNotFoundError:
+            versions.append(None)
+    return versions
+
+
+class RenderCache:
+    def __init__(self, root=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._salt = json.dumps(_versions()).encode()
+
+    def key(self, figure, job):
+        # figure: the dict from build_figures(); job: a chart_export.ExportJob
+        from plotly.utils import PlotlyJSONEncoder
+
+        digest = hashlib.sha256(self._salt)
+        digest.update(json.dumps(figure, sort_keys=True, separators=(",", ":"), cls=PlotlyJSONEncoder).encode())
+        digest.update(json.dumps(job.opts(), sort_keys=True).encode())
+        return digest.hexdigest()
+
+    def _artifact(self, key, fmt):
+        return os.path.join(self.root, key[:2], f"{key}.{fmt}")
+
+    def fetch(self, key, job):
+        # Copies a cached artifact to job.path; False on a miss
+        artifact = self._artifact(key, job.format)
+        try:
+            os.utime(artifact)
+        except FileNotFoundError:
+            self.misses += 1
+            return False
+        if not _same_file(artifact, job.path):
+            shutil.copyfile(artifact, job.path)
+        self.hits += 1
+        return True
+
+    def store(self, key, job):
+        # Copies a freshly rendered job.path into the cache (atomically, so an
+        # interrupted build never leaves a truncated artifact behind)
+        artifact = self._artifact(key, job.format)
+        os.makedirs(os.path.dirname(artifact), exist_ok=True)
+        partial = f"{artifact}.{os.getpid()}.tmp"
+        shutil.copyfile(job.path, partial)
+        os.replace(partial, artifact)
+
+    def entries(self):
+        # [(mtime, size, path)] for every artifact, oldest first
+        entries = []
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(directory, name)
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return sorted(entries)
+
+    def evict(self):
+        # Drops least-recently-used artifacts until the cache fits max_bytes;
+        # returns the number removed
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+            removed += 1
+        return removed
+
+
+def _same_file(a, b):
+    # Cheap check that the output already holds the cached bytes
+    try:
+        if os.path.getsize(a) != os.path.getsize(b):
+            return False
+    except FileNotFoundError:
+        return False
+    with open(a, "rb") as fa, open(b, "rb") as fb:
+        return fa.read() == fb.read()
+
+
+if __name__ == "__main__":
+    import chart_export
+
+    print("=== FIXIE RENDER CACHE ===")
+    print()
+
+    # Dry run: which exports of a doc build would need the renderer?
+    cache = RenderCache(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_CACHE_DIR)
+    jobs = chart_export.plan()
+    figures = chart_export.build_figures()
+    for job in jobs:
+        key = cache.key(figures[job.chart], job)
+        state = "cached" if os.path.exists(cache._artifact(key, job.format)) else "render"
+        print(f"  {state:<7} {job.path:<45} {key[:12]}")
+    entries = cache.entries()
+    print(f"Cache {cache.root}: {len(entries)} artifacts, "
+          f"{sum(size for _, size, _ in entries) / 1024:,.0f} KiB of {cache.max_bytes / 2**20:,.0f} MiB")
@@ -0,0 +1,303 @@
+# Merkle-epoch reward distribution builder
+# Instead of one mintWorkoutReward per workout (plus one per weekly streak
+# bonus), a day's rewards are settled off-chain and published as a single
+# Merkle root: FixieRewardDistributor (script_1.py) stores one root per epoch
+# and mints a user's amount when they claim it with a proof (claimMany
+# settles any number of epochs with one mint). This replaces the validator's
+# mints rather than adding to them: deploy.js makes only one of the two a
+# minter (FIXIE_PAYOUT=merkle for this path), and publishEpoch reverts while
+# WorkoutValidator can still mint.
+#
+# The contract checks proofs with MerkleProof.verifyCalldata:
+#   leaf   = keccak256(bytes.concat(keccak256(abi.encode(user, amount, epoch))))
+#   parent = keccak256(min(a, b) ++ max(a, b))   (sorted pairs, no index bits)
+# The leaf encoding is StandardMerkleTree's, but the layout is not: levels
+# are built pairwise over the address-sorted leaves and an odd node at the
+# end of a level is carried up unchanged (some proofs are one step shorter),
+# where OpenZeppelin's JS StandardMerkleTree lays leaves out in a complete
+# tree sorted by leaf hash. Roots differ, so proofs must come from this
+# builder, not from @openzeppelin/merkle-tree.
+#
+# Rewards come in as REWARD_UNIT int64 arrays (reward_engine.score_workouts)
+# and are summed per user, one leaf per user sorted by address. An epoch never
+# pays more than DAILY_EMISSION_LIMIT (publishEpoch reverts above it): rewards
+# are accepted in arrival order the way sequential mintWorkoutReward calls are
+# (emission_sim.accept_in_order) and the rest are dropped and counted in
+# rejected / rejected_total. Claims are still minted, so claiming several
+# epochs on one day draws them all from that day's limit. Everything is
+# NumPy: leaves and levels are (n, 32) uint8 arrays hashed with
+# keccak_batch, and proofs are written as JSON lines in chunks straight from
+# the level arrays, so 10M leaves take minutes and the proof file never sits
+# in memory.
+
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from artifacts import open_atomic, write_if_changed
+from emission_sim import DAILY_LIMIT_UNITS, accept_in_order
+from evm_encoding import keccak256, to_address_bytes
+from fixie_rules import SECONDS_PER_DAY
+from keccak_batch import keccak256_batch
+from reward_engine import REWARD_UNIT
+
+LEAF_CHUNK = 1 << 20  # leaves encoded and hashed per pass
+PROOF_CHUNK = 1 << 16  # proof lines formatted per write
+
+_MASK32 = np.uint64(0xFFFFFFFF)
+_UNIT_LIMBS = (np.uint64(REWARD_UNIT & 0xFFFFFFFF), np.uint64(REWARD_UNIT >> 32))
+
+
+def _hex(rows):
+    # (n, k) uint8 -> (n, 2k) uint8 ASCII hex digits
+    return np.frombuffer(rows.tobytes().hex().encode(), dtype=np.uint8).reshape(len(rows), -1)
+
+
+def epoch_of(timestamp):
+    # Epochs are UTC days, like the contracts' block.timestamp / 1 days
+    return timestamp // SECONDS_PER_DAY
+
+
+def address_array(addresses):
+    # (n, 20) uint8 array from "0x..." strings, bytes or ints
+    return np.frombuffer(b"".join(to_address_bytes(a) for a in addresses), dtype=np.uint8).reshape(-1, 20)
+
+
+def _units_to_uint256(units):
+    # (n, 32) big-endian abi encoding of units * REWARD_UNIT, exact: four
+    # 32-bit limbs with carries, since the wei amount overflows 64 bits
+    units = units.astype(np.uint64)
+    u0, u1 = units & _MASK32, units >> np.uint64(32)
+    m0, m1 = _UNIT_LIMBS
+    p00, p01, p10, p11 = u0 * m0, u0 * m1, u1 * m0, u1 * m1
+    limbs = [p00 & _MASK32]
+    t = (p01 & _MASK32) + (p10 & _MASK32) + (p00 >> np.uint64(32))
+    limbs.append(t & _MASK32)
+    t = (p11 & _MASK32) + (t >> np.uint64(32)) + (p01 >> np.uint64(32)) + (p10 >> np.uint64(32))
+    limbs.append(t & _MASK32)
+    limbs.append((t >> np.uint64(32)) + (p11 >> np.uint64(32)))
+    out = np.zeros((len(units), 8), dtype=">u4")
+    for i, limb in enumerate(limbs):
+        out[:, 7 - i] = limb
+    return out.view(np.uint8)
+
+
+def leaf_hashes(users, units, epoch):
+    # users: (n, 20) uint8, units: int64 REWARD_UNIT amounts -> (n, 32) leaves
+    encoded = np.zeros((len(users), 96), dtype=np.uint8)
+    encoded[:, 12:32] = users
+    encoded[:, 32:64] = _units_to_uint256(units)
+    encoded[:, 64:96] = np.frombuffer(int(epoch).to_bytes(32, "big"), dtype=np.uint8)
+    return keccak256_batch(keccak256_batch(encoded))
+
+
+def leaf_hash(user, amount, epoch):
+    # Scalar leaf for one (user, wei amount, epoch), via evm_encoding
+    encoded = bytes(12) + to_address_bytes(user) + int(amount).to_bytes(32, "big") + int(epoch).to_bytes(32, "big")
+    return keccak256(keccak256(encoded))
+
+
+def parent_level(level):
+    # Hash sorted pairs; an odd last node is carried up
+    pairs = len(level) // 2
+    left, right = level[0:2 * pairs:2], level[1:2 * pairs:2]
+    differs = left != right
+    first = differs.argmax(axis=1)
+    rows = np.arange(pairs)
+    swap = left[rows, first] > right[rows, first]
+    joined = np.concatenate([np.where(swap[:, None], right, left), np.where(swap[:, None], left, right)], axis=1)
+    parents = keccak256_batch(joined)
+    if len(level) % 2:
+        parents = np.concatenate([parents, level[-1:]])
+    return parents
+
+
+def verify_proof(leaf, proof, root):
+    # MerkleProof.verify in Python, for spot checks
+    node = leaf
+    for sibling in proof:
+        node = keccak256(min(node, sibling) + max(node, sibling))
+    return node == root
+
+
+class EpochBuilder:
+    # Collects one epoch's rewards in chunks, then builds the tree
+    def __init__(self, epoch, capacity=DAILY_LIMIT_UNITS):
+        self.epoch = epoch
+        self.capacity = capacity  # REWARD_UNIT cap on the epoch total
+        self._users = []
+        self._units = []
+        self.users = None  # (n, 20) uint8, sorted, one row per user
+        self.units = None  # int64 REWARD_UNIT totals per user
+        self.levels = None  # [leaves, ..., root], each (m, 32) uint8
+        self.rejected = 0  # rewards dropped by the cap
+        self.rejected_units = 0
+
+    def add(self, users, units):
+        # users: (n, 20) uint8 or addresses; units: REWARD_UNIT amounts. A user
+        # may appear any number of times, across any number of calls
+        users = np.asarray(users, dtype=np.uint8) if isinstance(users, np.ndarray) else address_array(users)
+        units = np.asarray(units, dtype=np.int64)
+        if len(users) != len(units):
+            raise ValueError(f"{len(users)} users but {len(units)} amounts")
+        if (units < 0).any():
+            raise ValueError("negative reward")
+        self._users.append(users.reshape(-1, 20))
+        self._units.append(units)
+
+    def _aggregate(self):
+        users = np.concatenate(self._users) if self._users else np.zeros((0, 20), dtype=np.uint8)
+        units = np.concatenate(self._units) if self._units else np.zeros(0, dtype=np.int64)
+        self._users, self._units = [], []
+        accepted, used = accept_in_order(units, self.capacity)
+        self.rejected = int(np.count_nonzero(~accepted))
+        self.rejected_units = int(units.sum(dtype=np.int64)) - used
+        users, units = users[accepted], units[accepted]
+        keys = np.ascontiguousarray(users).view("S20").ravel()
+        order = np.argsort(keys, kind="stable")
+        keys, units = keys[order], units[order]
+        starts = np.flatnonzero(np.concatenate([[True], keys[1:] != keys[:-1]])) if len(keys) else np.zeros(0, int)
+        totals = np.add.reduceat(units, starts) if len(starts) else units
+        keep = totals > 0
+        self.users = np.frombuffer(keys[starts][keep].tobytes(), dtype=np.uint8).reshape(-1, 20)
+        self.units = totals[keep]
+
+    def build(self):
+        self._aggregate()
+        if not len(self.units):
+            raise ValueError(f"epoch {self.epoch} has no rewards")
+        leaves = np.empty((len(self.units), 32), dtype=np.uint8)
+        for lo in range(0, len(leaves), LEAF_CHUNK):
+            leaves[lo:lo + LEAF_CHUNK] = leaf_hashes(self.users[lo:lo + LEAF_CHUNK], self.units[lo:lo + LEAF_CHUNK],
+                                                     self.epoch)
+        self.levels = [leaves]
+        while len(self.levels[-1]) > 1:
+            self.levels.append(parent_level(self.levels[-1]))
+        return self
+
+    @property
+    def root(self):
+        return self.levels[-1][0].tobytes()
+
+    @property
+    def total(self):
+        # Wei claimable in this epoch
+        return int(self.units.sum(dtype=np.int64)) * REWARD_UNIT
+
+    @property
+    def rejected_total(self):
+        # Wei dropped because the epoch reached its cap
+        return self.rejected_units * REWARD_UNIT
+
+    def proof(self, index):
+        proof = []
+        for level in self.levels[:-1]:
+            sibling = index ^ 1
+            if sibling < len(level):
+                proof.append(level[sibling].tobytes())
+            index >>= 1
+        return proof
+
+    def summary(self):
+        return {
+            "epoch": self.epoch,
+            "root": "0x" + self.root.hex(),
+            "total": str(self.total),
+            "leaves": len(self.units),
+            "depth": len(self.levels) - 1,
+            "rejected": self.rejected,
+            "rejected_total": str(self.rejected_total),
+        }
+
+    def _proof_lines(self, lo, hi):
+        # JSON lines for leaves [lo, hi): {"user", "amount" (wei), "proof"}.
+        # Each proof is laid out as one fixed-width '"0x..",' row per leaf;
+        # a contiguous chunk only touches a contiguous run of each level, so
+        # that run is hex-encoded once and gathered
+        index = np.arange(lo, hi)
+        depth = len(self.levels) - 1
+        cells = np.full((hi - lo, depth, 69), ord(","), dtype=np.uint8)
+        cells[:, :, [0, 67]] = ord('"')
+        cells[:, :, 1:3] = np.frombuffer(b"0x", dtype=np.uint8)
+        present = np.ones((hi - lo, depth), dtype=bool)
+        for k, level in enumerate(self.levels[:-1]):
+            sibling = index ^ 1
+            present[:, k] = sibling < len(level)
+            sibling = np.minimum(sibling, len(level) - 1)
+            first = sibling.min()
+            cells[:, k, 3:67] = _hex(level[first:sibling.max() + 1])[sibling - first]
+            index >>= 1
+        rows = cells.reshape(hi - lo, -1)[:, :-1].copy().view(f"S{max(depth * 69 - 1, 1)}").ravel().tolist()
+        if depth == 0:
+            rows = [b""] * (hi - lo)
+        complete = present.all(axis=1)
+        users = _hex(self.users[lo:hi]).view("S40").ravel().tolist()
+        amounts = self.units[lo:hi].astype("S20").tolist()
+        zeros = b"0" * len(str(REWARD_UNIT)[1:])
+        lines = []
+        for i in range(hi - lo):
+            proof = rows[i]
+            if not complete[i]:
+                cells_i = [proof[k * 69:k * 69 + 68] for k in range(depth) if present[i, k]]
+                proof = b",".join(cells_i)
+            lines.append(b'{"user":"0x%s","amount":"%s%s","proof":[%s]}\n' % (users[i], amounts[i], zeros, proof))
+        return b"".join(lines)
+
+    def write(self, out_dir):
+        # <out_dir>/epoch-<n>.json (root, total) and epoch-<n>.proofs.jsonl,
+        # both replaced atomically; returns the two paths
+        proofs_path = os.path.join(out_dir, f"epoch-{self.epoch}.proofs.jsonl")
+        with open_atomic(proofs_path) as f:
+            for lo in range(0, len(self.units), PROOF_CHUNK):
+                f.write(self._proof_lines(lo, min(lo + PROOF_CHUNK, len(self.units))))
+        summary_path = os.path.join(out_dir, f"epoch-{self.epoch}.json")
+        write_if_changed(summary_path, json.dumps(self.summary(), indent=1) + "\n")
+        return summary_path, proofs_path
+
+
+if __name__ == "__main__":
+    print("=== FIXIE MERKLE REWARD EPOCHS ===")
+    print()
+
+    # python reward_merkle.py [users] [out_dir]; users get ~1.5 workouts each
+    from reward_engine import score_workouts
+
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    out_dir = sys.argv[2] if len(sys.argv) > 2 else "rewards"
+    rng = np.random.default_rng(7)
+    epoch = epoch_of(int(time.time()))
+    builder = EpochBuilder(epoch)
+
+    start = time.perf_counter()
+    population = rng.integers(0, 256, (users, 20), dtype=np.uint8)
+    workouts = users * 3 // 2
+    who = rng.integers(0, users, workouts)
+    rewards = score_workouts(rng.integers(500, 25_000, workouts), rng.integers(0, 3, workouts),
+                             rng.integers(1, 40, workouts), rng.integers(0, 40, workouts))
+    for lo in range(0, workouts, LEAF_CHUNK):
+        builder.add(population[who[lo:lo + LEAF_CHUNK]], rewards[lo:lo + LEAF_CHUNK])
+    built = time.perf_counter()
+    builder.build()
+    tree = time.perf_counter()
+    paths = builder.write(out_dir)
+    done = time.perf_counter()
+
+    summary = builder.summary()
+    print(f"{workouts:,} workouts -> {summary['leaves']:,} leaves, depth {summary['depth']}")
+    print(f"Root {summary['root']}, total {builder.total / 10**18:,.2f} FIXIE")
+    print(f"Over DAILY_EMISSION_LIMIT: {builder.rejected:,} rewards, {builder.rejected_total / 10**18:,.2f} FIXIE dropped")
+    assert builder.total <= DAILY_LIMIT_UNITS * REWARD_UNIT
+    print(f"Collect {built - start:.1f}s, tree {tree - built:.1f}s, proofs {done - tree:.1f}s -> {', '.join(paths)}")
+
+    # Spot-check streamed proofs against the scalar leaf and verifier
+    with open(paths[1]) as f:
+        for i, line in enumerate(f):
+            if i % max(summary["leaves"] // 100, 1):
+                continue
+            claim = json.loads(line)
+            leaf = leaf_hash(claim["user"], int(claim["amount"]), epoch)
+            assert verify_proof(leaf, [bytes.fromhex(p[2:]) for p in claim["proof"]], builder.root)
+    print("Spot-check vs MerkleProof.verify: OK")
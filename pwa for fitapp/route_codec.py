@@ -0,0 +1,314 @@
+# Route simplification and compact track encoding
+# The 1 Hz trackingInterval in app.js produces one sample per second, most of
+# which lie on a straight line between their neighbours. Routes are thinned
+# with an error-bounded Douglas-Peucker pass and then stored as zigzag
+# delta/varint polylines (lat/lon in 1e-5 degrees, ~1.1 m; time in seconds).
+#
+# Everything works on CSR batches (flat lat/lon/time plus per-track offsets,
+# the same layout as anti_cheat.TrackBatch). Douglas-Peucker runs one
+# refinement level at a time for all open intervals of all tracks together, so
+# the Python loop is over tree depth, not over points or tracks; varints are
+# packed and unpacked for the whole batch in single array passes. Batches are
+# cut into chunks of about SIMPLIFY_CHUNK / CODEC_CHUNK points so the
+# refinement and varint arrays stay cache-sized, and compress_batch spreads
+# chunks over a process pool (like rarity_montecarlo) when workers > 1.
+#
+# Measured ceiling (demo: 20,000 30-minute 1 Hz tracks, 1,800 points each)
+# on a single-core Intel Xeon VM: simplify ~1,550 tracks/s (~2.8M points/s),
+# encode ~8,800 tracks/s, decode ~14,000 tracks/s. Simplify is the
+# bottleneck; tens of thousands of simplified tracks per second need 15+
+# cores with compress_batch(workers=...), it does not fit on one.
+
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from gps_ingest import EARTH_RADIUS_M
+
+COORD_SCALE = 1e5  # quantization: 1e-5 degrees
+DEFAULT_TOLERANCE_M = 3.0
+SIMPLIFY_CHUNK = 1 << 17  # points per refinement batch
+CODEC_CHUNK = 1 << 19  # points per encode / decode batch
+
+
+def _chunks(offsets, points):
+    # Track ranges [a, b) of about `points` points each (at least one track)
+    n = len(offsets) - 1
+    a = 0
+    while a < n:
+        b = int(np.searchsorted(offsets, offsets[a] + points, side="right")) - 1
+        b = min(max(b, a + 1), n)
+        yield a, b
+        a = b
+
+
+def _local_xy(lat, lon, offsets):
+    # Equirectangular projection in metres relative to each track's first
+    # point; float32 is ample (mm precision over tens of km) and halves the
+    # memory traffic of the refinement passes
+    counts = np.diff(offsets)
+    first = offsets[:-1][counts > 0]
+    lat0 = np.repeat(lat[first], counts[counts > 0])
+    lon0 = np.repeat(lon[first], counts[counts > 0])
+    scale = np.radians(1.0) * EARTH_RADIUS_M
+    y = ((lat - lat0) * scale).astype(np.float32)
+    x = ((lon - lon0) * (scale * np.cos(np.radians(lat0)))).astype(np.float32)
+    return x, y
+
+
+def simplify_batch(lat, lon, offsets, tolerance_m=DEFAULT_TOLERANCE_M):
+    # Boolean mask of points kept by Douglas-Peucker: no dropped point lies
+    # further than tolerance_m from the simplified route (distance to the
+    # chord segment, not the infinite line)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    keep = np.zeros(len(lat), dtype=bool)
+    for a, b in _chunks(offsets, SIMPLIFY_CHUNK):
+        lo, hi = offsets[a], offsets[b]
+        keep[lo:hi] = _simplify_chunk(lat[lo:hi], lon[lo:hi], offsets[a:b + 1] - lo, tolerance_m)
+    return keep
+
+
+def _simplify_chunk(lat, lon, offsets, tolerance_m):
+    x, y = _local_xy(lat, lon, offsets)
+    keep = np.zeros(len(x), dtype=bool)
+    counts = np.diff(offsets)
+    keep[offsets[:-1][counts > 0]] = True
+    keep[offsets[1:][counts > 0] - 1] = True
+    tolerance_sq = np.float32(tolerance_m * tolerance_m)
+
+    # Open intervals (start, end) with at least one interior point
+    start = offsets[:-1][counts > 2]
+    end = offsets[1:][counts > 2] - 1
+    while len(start):
+        inner = end - start - 1
+        first = np.concatenate(([0], np.cumsum(inner)[:-1]))
+        total = int(first[-1] + inner[-1])
+        idx = np.arange(total) + np.repeat(start + 1 - first, inner)
+
+        # Squared distance to the chord segment, with the per-chord terms
+        # computed once per interval and broadcast (np.repeat over the
+        # interval lengths is much cheaper than a fancy-index gather)
+        ax, ay = x[start], y[start]
+        dx, dy = x[end] - ax, y[end] - ay
+        length_sq = dx * dx + dy * dy
+        inv = np.divide(1, length_sq, out=np.zeros_like(length_sq), where=length_sq > 0)
+        px = x[idx] - np.repeat(ax, inner)
+        py = y[idx] - np.repeat(ay, inner)
+        cdx, cdy = np.repeat(dx, inner), np.repeat(dy, inner)
+        t = (px * cdx + py * cdy) * np.repeat(inv, inner)
+        np.clip(t, 0, 1, out=t)
+        px -= t * cdx
+        py -= t * cdy
+        d = px * px + py * py
+
+        # Segmented argmax: the first position reaching each interval's max
+        peak = np.maximum.reduceat(d, first)
+        candidate = np.where(d >= np.repeat(peak, inner), np.arange(total), total)
+        split = idx[np.minimum.reduceat(candidate, first)]
+
+        far = peak > tolerance_sq
+        split, start, end = split[far], start[far], end[far]
+        keep[split] = True
+        start, end = np.concatenate((start, split)), np.concatenate((split, end))
+        open_ = end - start > 1
+        start, end = start[open_], end[open_]
+    return keep
+
+
+def _varint_encode(values):
+    # Zigzag + LEB128 for a flat int64 array -> (bytes, bytes per value).
+    # Builds one column per byte position (few, since deltas are small) and
+    # keeps the used cells with a single row-major mask.
+    values = np.asarray(values, dtype=np.int64)
+    u = ((values << 1) ^ (values >> 63)).view(np.uint64)
+    if len(u) and u.max() < 2**32:
+        u = u.astype(np.uint32)  # the common case: narrower shifts are cheaper
+    seven = u.dtype.type(7)
+    nbytes = np.ones(len(u), dtype=np.int64)
+    columns = [(u & 0x7F).astype(np.uint8)]
+    rest = u >> seven
+    while rest.any():
+        more = rest > 0
+        columns[-1] |= more.view(np.uint8) << 7
+        nbytes += more
+        columns.append((rest & 0x7F).astype(np.uint8))
+        rest >>= seven
+    cells = np.stack(columns, axis=1)
+    used = np.arange(len(columns)) < nbytes[:, None]
+    return cells[used], nbytes
+
+
+def _varint_decode(buf):
+    # Inverse of _varint_encode over a concatenated byte buffer
+    buf = np.frombuffer(buf, dtype=np.uint8) if not isinstance(buf, np.ndarray) else buf
+    last = (buf & 0x80) == 0
+    value_id = np.concatenate(([0], np.cumsum(last)[:-1]))
+    value_start = np.flatnonzero(np.concatenate(([True], last[:-1])))
+    k = np.arange(len(buf)) - value_start[value_id]
+    parts = (buf & 0x7F).astype(np.uint64) << (np.uint64(7) * k.astype(np.uint64))
+    u = np.bitwise_or.reduceat(parts, value_start) if len(buf) else np.zeros(0, dtype=np.uint64)
+    return (u >> np.uint64(1)).astype(np.int64) ^ -(u & np.uint64(1)).astype(np.int64)
+
+
+def encode_batch(lat, lon, offsets, timestamps=None, keep=None):
+    # One compact blob per track: varint point count, then (dlat, dlon, dt)
+    # per point, zigzag delta-coded against the previous point (the first
+    # point against zero). Without timestamps every dt is 0 (one byte each).
+    offsets = np.asarray(offsets, dtype=np.int64)
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    timestamps = np.zeros(len(lat)) if timestamps is None else np.asarray(timestamps, dtype=np.float64)
+    blobs = []
+    for a, b in _chunks(offsets, CODEC_CHUNK):
+        lo, hi = offsets[a], offsets[b]
+        blobs += _encode_chunk(lat[lo:hi], lon[lo:hi], offsets[a:b + 1] - lo, timestamps[lo:hi],
+                               None if keep is None else keep[lo:hi])
+    return blobs
+
+
+def _encode_chunk(lat, lon, offsets, timestamps, keep):
+    if keep is not None:
+        kept_before = np.concatenate(([0], np.cumsum(keep)))
+        offsets = kept_before[offsets]
+        lat, lon, timestamps = lat[keep], lon[keep], timestamps[keep]
+    lat = np.round(lat * COORD_SCALE).astype(np.int64)
+    lon = np.round(lon * COORD_SCALE).astype(np.int64)
+    t = np.round(timestamps).astype(np.int64)
+
+    counts = np.diff(offsets)
+    deltas = np.stack([lat, lon, t], axis=1)
+    deltas[1:] -= deltas[:-1].copy()
+    deltas[offsets[:-1][counts > 0]] = np.stack([lat, lon, t], axis=1)[offsets[:-1][counts > 0]]
+
+    # Interleave each track's header with its deltas in one flat value array
+    values = np.empty(len(lat) * 3 + len(counts), dtype=np.int64)
+    header_at = offsets[:-1] * 3 + np.arange(len(counts))
+    values[header_at] = counts
+    body = np.ones(len(values), dtype=bool)
+    body[header_at] = False
+    values[body] = deltas.ravel()
+
+    out, nbytes = _varint_encode(values)
+    value_track = np.repeat(np.arange(len(counts)), counts * 3 + 1)
+    bounds = np.concatenate(([0], np.cumsum(np.bincount(value_track, weights=nbytes, minlength=len(counts)))))
+    raw = out.tobytes()
+    return [raw[lo:hi] for lo, hi in zip(bounds[:-1].astype(np.int64), bounds[1:].astype(np.int64))]
+
+
+def decode_batch(blobs):
+    # blobs -> (lat, lon, timestamps, offsets)
+    blobs = list(blobs)
+    sizes = np.cumsum([0] + [len(blob) for blob in blobs])
+    parts = []
+    lo = 0
+    while lo < len(blobs):
+        # about CODEC_CHUNK points, at ~1 byte per value
+        hi = min(max(int(np.searchsorted(sizes, sizes[lo] + CODEC_CHUNK * 3, side="right")) - 1, lo + 1), len(blobs))
+        parts.append(_decode_chunk(blobs[lo:hi]))
+        lo = hi
+    if not parts:
+        return _decode_chunk([])
+    lat, lon, timestamps, counts = zip(*((p[0], p[1], p[2], np.diff(p[3])) for p in parts))
+    offsets = np.concatenate(([0], np.cumsum(np.concatenate(counts))))
+    return np.concatenate(lat), np.concatenate(lon), np.concatenate(timestamps), offsets
+
+
+def _decode_chunk(blobs):
+    buf = np.frombuffer(b"".join(blobs), dtype=np.uint8)
+    values = _varint_decode(buf)
+    # Each blob starts with its header varint; its value index is the number
+    # of varints that ended before the blob's first byte
+    ended = np.concatenate(([0], np.cumsum((buf & 0x80) == 0)))
+    header_at = ended[np.cumsum([0] + [len(b) for b in blobs[:-1]])] if blobs else np.zeros(0, dtype=np.int64)
+    counts = values[header_at]
+    body = np.ones(len(values), dtype=bool)
+    body[header_at] = False
+    deltas = values[body].reshape(-1, 3)
+
+    offsets = np.concatenate(([0], np.cumsum(counts)))
+    absolute = np.cumsum(deltas, axis=0)
+    # Each track restarts from zero: drop the running total of earlier tracks
+    padded = np.concatenate((np.zeros((1, 3), dtype=np.int64), absolute))
+    absolute -= np.repeat(padded[offsets[:-1]], counts, axis=0)
+    return absolute[:, 0] / COORD_SCALE, absolute[:, 1] / COORD_SCALE, absolute[:, 2].astype(np.float64), offsets
+
+
+def _compress_chunk(lat, lon, offsets, timestamps, tolerance_m):
+    keep = simplify_batch(lat, lon, offsets, tolerance_m)
+    return keep, encode_batch(lat, lon, offsets, timestamps, keep)
+
+
+def compress_batch(lat, lon, offsets, timestamps=None, tolerance_m=DEFAULT_TOLERANCE_M, workers=1):
+    # simplify_batch + encode_batch -> (keep mask, blobs). With workers > 1
+    # (None: one per core) chunks of tracks run in a process pool; results
+    # come back in track order
+    offsets = np.asarray(offsets, dtype=np.int64)
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    timestamps = np.zeros(len(lat)) if timestamps is None else np.asarray(timestamps, dtype=np.float64)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        return _compress_chunk(lat, lon, offsets, timestamps, tolerance_m)
+    keep = np.zeros(len(lat), dtype=bool)
+    blobs = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        ranges = list(_chunks(offsets, CODEC_CHUNK))
+        futures = [pool.submit(_compress_chunk, lat[offsets[a]:offsets[b]], lon[offsets[a]:offsets[b]],
+                               offsets[a:b + 1] - offsets[a], timestamps[offsets[a]:offsets[b]], tolerance_m)
+                   for a, b in ranges]
+        for (a, b), future in zip(ranges, futures):
+            chunk_keep, chunk_blobs = future.result()
+            keep[offsets[a]:offsets[b]] = chunk_keep
+            blobs += chunk_blobs
+    return keep, blobs
+
+
+if __name__ == "__main__":
+    print("=== FIXIE ROUTE SIMPLIFICATION + ENCODING ===")
+    print()
+
+    rng = np.random.default_rng(0)
+    n_tracks = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    points = 1800  # 30 min at 1 Hz
+    step = 3.0 / 111_320 * (1 + rng.normal(0, 0.1, (n_tracks, points)))
+    heading = np.cumsum(rng.normal(0, 0.03, (n_tracks, points)), axis=1) + rng.random((n_tracks, 1)) * 6.28
+    jitter = rng.normal(0, 1.5 / 111_320, (2, n_tracks, points))  # GPS noise
+    lat = (48.85 + np.cumsum(np.cos(heading) * step, axis=1) + jitter[0]).ravel()
+    lon = (2.35 + np.cumsum(np.sin(heading) * step, axis=1) / np.cos(np.radians(48.85)) + jitter[1]).ravel()
+    stamps = (1_700_000_000 + np.tile(np.arange(points), n_tracks)).astype(np.float64)
+    offsets = np.arange(n_tracks + 1, dtype=np.int64) * points
+
+    begin = time.perf_counter()
+    keep = simplify_batch(lat, lon, offsets)
+    simplified = time.perf_counter() - begin
+    begin = time.perf_counter()
+    blobs = encode_batch(lat, lon, offsets, stamps, keep)
+    encoded = time.perf_counter() - begin
+    begin = time.perf_counter()
+    dlat, dlon, dtime, doffsets = decode_batch(blobs)
+    decoded = time.perf_counter() - begin
+
+    assert np.array_equal(doffsets, np.concatenate(([0], np.cumsum(keep.reshape(n_tracks, points).sum(axis=1)))))
+    assert np.abs(dlat - lat[keep]).max() <= 0.5 / COORD_SCALE + 1e-12
+    assert np.array_equal(dtime, stamps[keep])
+    raw_bytes = len(lat) * 3 * 8
+    packed = sum(len(b) for b in blobs)
+    print(f"{n_tracks:,} tracks, {len(lat):,} points -> {int(keep.sum()):,} kept "
+          f"({keep.mean():.1%}) at {DEFAULT_TOLERANCE_M} m tolerance")
+    print(f"Size: {raw_bytes / 1e6:,.1f} MB float64 -> {packed / 1e6:,.2f} MB encoded "
+          f"({raw_bytes / packed:,.0f}x), {packed / n_tracks:,.0f} B/track")
+    print(f"Simplify: {n_tracks / simplified:,.0f} tracks/s")
+    print(f"Encode:   {n_tracks / encoded:,.0f} tracks/s")
+    print(f"Decode:   {n_tracks / decoded:,.0f} tracks/s")
+
+    workers = os.cpu_count() or 1
+    begin = time.perf_counter()
+    pooled_keep, pooled = compress_batch(lat, lon, offsets, stamps, workers=workers)
+    compressed = time.perf_counter() - begin
+    assert np.array_equal(pooled_keep, keep) and pooled == blobs
+    print(f"compress_batch: {n_tracks / compressed:,.0f} tracks/s on {workers} core{'s' * (workers > 1)}")
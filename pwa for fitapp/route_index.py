@@ -0,0 +1,275 @@
+# Spatial index over workout routes
+# Answers "which workouts crossed this bounding box / this segment?" for the
+# map and the social / leaderboard features without scanning every route.
+#
+# Routes are cut into pieces of up to PIECE_POINTS points (consecutive pieces
+# share their boundary point so no segment is lost) and the piece bounding
+# boxes are packed into a Sort-Tile-Recursive R-tree stored as one box array
+# per level; every node's children are a contiguous run of up to node_size
+# entries of the level below. Queries descend level by level for all hit nodes
+# at once with array ops and finish with an exact segment test on the
+# surviving pieces.
+#
+# Packed trees are immutable, so incremental inserts go to a small pending
+# buffer and are packed into a new tree when it fills up; trees of similar
+# size are merged (the logarithmic method), keeping the number of trees per
+# query at O(log n). Coordinates are (lat, lon) degrees; routes crossing the
+# antimeridian are not split.
+
+import sys
+import time
+
+import numpy as np
+
+PIECE_POINTS = 32
+NODE_SIZE = 16
+BUFFER_POINTS = 65_536
+
+
+def _boxes_intersect(boxes, box):
+    # boxes: (n, 4) min_lat, min_lon, max_lat, max_lon
+    return (boxes[:, 0] <= box[2]) & (boxes[:, 2] >= box[0]) & (boxes[:, 1] <= box[3]) & (boxes[:, 3] >= box[1])
+
+
+def _orientation(ax, ay, bx, by, cx, cy):
+    return np.sign((bx - ax) * (cy - ay) - (by - ay) * (cx - ax))
+
+
+def _on_segment(ax, ay, bx, by, cx, cy):
+    # c collinear with a-b: is it within a-b's extent?
+    return (np.minimum(ax, bx) <= cx) & (cx <= np.maximum(ax, bx)) & (np.minimum(ay, by) <= cy) & (cy <= np.maximum(ay, by))
+
+
+def _segments_cross(ax, ay, bx, by, cx, cy, dx, dy):
+    # Vectorized closed-segment intersection test for a-b against c-d
+    o1 = _orientation(ax, ay, bx, by, cx, cy)
+    o2 = _orientation(ax, ay, bx, by, dx, dy)
+    o3 = _orientation(cx, cy, dx, dy, ax, ay)
+    o4 = _orientation(cx, cy, dx, dy, bx, by)
+    return (((o1 != o2) & (o3 != o4))
+            | ((o1 == 0) & _on_segment(ax, ay, bx, by, cx, cy))
+            | ((o2 == 0) & _on_segment(ax, ay, bx, by, dx, dy))
+            | ((o3 == 0) & _on_segment(cx, cy, dx, dy, ax, ay))
+            | ((o4 == 0) & _on_segment(cx, cy, dx, dy, bx, by)))
+
+
+def _str_order(boxes, node_size):
+    # Sort-Tile-Recursive: vertical slices by center lon, then center lat
+    n = len(boxes)
+    slices = max(1, int(np.ceil(np.sqrt(np.ceil(n / node_size)))))
+    per_slice = slices * node_size
+    by_lon = np.argsort(boxes[:, 1] + boxes[:, 3], kind="stable")
+    slice_id = np.arange(n) // per_slice
+    return by_lon[np.lexsort(((boxes[by_lon, 0] + boxes[by_lon, 2]), slice_id))]
+
+
+def _group_boxes(boxes, node_size):
+    starts = np.arange(0, len(boxes), node_size)
+    return np.stack([
+        np.minimum.reduceat(boxes[:, 0], starts),
+        np.minimum.reduceat(boxes[:, 1], starts),
+        np.maximum.reduceat(boxes[:, 2], starts),
+        np.maximum.reduceat(boxes[:, 3], starts),
+    ], axis=1)
+
+
+class _PackedTree:
+    def __init__(self, lat, lon, offsets, route_ids, piece_points=PIECE_POINTS, node_size=NODE_SIZE):
+        self.lat, self.lon, self.offsets, self.route_ids = lat, lon, offsets, route_ids
+        self.node_size = node_size
+
+        # Pieces [start, end) overlapping by one point
+        counts = np.diff(offsets)
+        step = piece_points - 1
+        per_route = np.where(counts > 0, np.maximum(1, -(-(counts - 1) // step)), 0)
+        route = np.repeat(np.arange(len(counts)), per_route)
+        k = np.arange(len(route)) - np.repeat(np.cumsum(per_route) - per_route, per_route)
+        start = offsets[:-1][route] + k * step
+        end = np.minimum(start + piece_points, offsets[1:][route])
+        if len(start):
+            last = end - 1
+            boxes = np.stack([
+                np.minimum(np.minimum.reduceat(lat, start), lat[last]),
+                np.minimum(np.minimum.reduceat(lon, start), lon[last]),
+                np.maximum(np.maximum.reduceat(lat, start), lat[last]),
+                np.maximum(np.maximum.reduceat(lon, start), lon[last]),
+            ], axis=1)
+        else:
+            boxes = np.zeros((0, 4))
+
+        # Pack bottom-up. Level 0 holds the pieces in STR order; each upper
+        # level groups consecutive runs of the level below, then is itself
+        # STR-sorted, keeping each node's first-child slot in child_start
+        order = _str_order(boxes, node_size)
+        self.piece_start, self.piece_end, self.piece_route = start[order], end[order], route[order]
+        self.levels = [boxes[order]]
+        self.child_start = [None]
+        while len(self.levels[-1]) > node_size:
+            below = self.levels[-1]
+            boxes = _group_boxes(below, node_size)
+            first = np.arange(0, len(below), node_size)
+            order = _str_order(boxes, node_size)
+            self.levels.append(boxes[order])
+            self.child_start.append(first[order])
+
+    def candidates(self, box):
+        # Pieces whose bounding box intersects `box`
+        hit = np.flatnonzero(_boxes_intersect(self.levels[-1], box))
+        for level in range(len(self.levels) - 1, 0, -1):
+            lo = self.child_start[level][hit]
+            width = np.minimum(lo + self.node_size, len(self.levels[level - 1])) - lo
+            children = np.repeat(lo - np.cumsum(width) + width, width) + np.arange(width.sum())
+            hit = children[_boxes_intersect(self.levels[level - 1][children], box)]
+        return hit
+
+    def _piece_segments(self, pieces):
+        # Segment endpoints (a, b) for every segment of the given pieces;
+        # single-point pieces become zero-length segments
+        length = np.maximum(self.piece_end[pieces] - self.piece_start[pieces] - 1, 1)
+        owner = np.repeat(pieces, length)
+        a = np.repeat(self.piece_start[pieces] - (np.cumsum(length) - length), length) + np.arange(length.sum())
+        b = np.minimum(a + 1, self.piece_end[owner] - 1)
+        return owner, a, b
+
+    def query_bbox(self, box, exact=True):
+        pieces = self.candidates(box)
+        if not exact:
+            return self.route_ids[np.unique(self.piece_route[pieces])]
+        owner, a, b = self._piece_segments(pieces)
+        lat, lon = self.lat, self.lon
+        ay, ax, by, bx = lat[a], lon[a], lat[b], lon[b]
+        inside = ((ay >= box[0]) & (ay <= box[2]) & (ax >= box[1]) & (ax <= box[3]))
+        hit = inside.copy()
+        corners = ((box[0], box[1]), (box[0], box[3]), (box[2], box[3]), (box[2], box[1]))
+        for (y1, x1), (y2, x2) in zip(corners, corners[1:] + corners[:1]):
+            hit |= _segments_cross(ax, ay, bx, by, x1, y1, x2, y2)
+        return self.route_ids[np.unique(self.piece_route[owner[hit]])]
+
+    def query_segment(self, lat1, lon1, lat2, lon2):
+        box = (min(lat1, lat2), min(lon1, lon2), max(lat1, lat2), max(lon1, lon2))
+        owner, a, b = self._piece_segments(self.candidates(box))
+        hit = _segments_cross(self.lon[a], self.lat[a], self.lon[b], self.lat[b], lon1, lat1, lon2, lat2)
+        return self.route_ids[np.unique(self.piece_route[owner[hit]])]
+
+
+class RouteIndex:
+    def __init__(self, piece_points=PIECE_POINTS, node_size=NODE_SIZE, buffer_points=BUFFER_POINTS):
+        self.piece_points = piece_points
+        self.node_size = node_size
+        self.buffer_points = buffer_points
+        self.trees = []
+        self._pending = []  # (route_id, lat, lon)
+        self._pending_points = 0
+        self._pending_tree = None
+
+    def __len__(self):
+        return sum(len(tree.route_ids) for tree in self.trees) + len(self._pending)
+
+    @classmethod
+    def bulk_load(cls, lat, lon, offsets, route_ids=None, **kwargs):
+        # CSR routes (route i is points [offsets[i], offsets[i + 1]))
+        index = cls(**kwargs)
+        offsets = np.asarray(offsets, dtype=np.int64)
+        if route_ids is None:
+            route_ids = np.arange(len(offsets) - 1)
+        index.trees.append(index._pack(lat, lon, offsets, route_ids))
+        return index
+
+    def _pack(self, lat, lon, offsets, route_ids):
+        return _PackedTree(np.asarray(lat, dtype=np.float64), np.asarray(lon, dtype=np.float64),
+                           np.asarray(offsets, dtype=np.int64), np.asarray(route_ids, dtype=np.int64),
+                           self.piece_points, self.node_size)
+
+    def insert(self, route_id, lat, lon):
+        self._pending.append((route_id, np.asarray(lat, dtype=np.float64), np.asarray(lon, dtype=np.float64)))
+        self._pending_points += len(lat)
+        self._pending_tree = None
+        if self._pending_points >= self.buffer_points:
+            self.flush()
+
+    def _pending_arrays(self):
+        lengths = [len(lat) for _, lat, _ in self._pending]
+        offsets = np.concatenate(([0], np.cumsum(lengths))).astype(np.int64)
+        lat = np.concatenate([lat for _, lat, _ in self._pending])
+        lon = np.concatenate([lon for _, _, lon in self._pending])
+        return lat, lon, offsets, np.array([rid for rid, _, _ in self._pending], dtype=np.int64)
+
+    def flush(self):
+        # Pack the pending buffer, then merge while the newest tree is at
+        # least half the size of the one before it
+        if not self._pending:
+            return
+        self.trees.append(self._pack(*self._pending_arrays()))
+        self._pending, self._pending_points, self._pending_tree = [], 0, None
+        while len(self.trees) > 1 and 2 * len(self.trees[-1].lat) >= len(self.trees[-2].lat):
+            newer, older = self.trees.pop(), self.trees.pop()
+            self.trees.append(self._pack(
+                np.concatenate((older.lat, newer.lat)),
+                np.concatenate((older.lon, newer.lon)),
+                np.concatenate((older.offsets, newer.offsets[1:] + older.offsets[-1])),
+                np.concatenate((older.route_ids, newer.route_ids)),
+            ))
+
+    def _all_trees(self):
+        if self._pending and self._pending_tree is None:
+            self._pending_tree = self._pack(*self._pending_arrays())
+        return self.trees + ([self._pending_tree] if self._pending else [])
+
+    def query_bbox(self, min_lat, min_lon, max_lat, max_lon, exact=True):
+        # Route ids with at least one segment inside or crossing the box;
+        # exact=False stops at piece bounding boxes (a superset, cheaper)
+        box = (min_lat, min_lon, max_lat, max_lon)
+        found = [tree.query_bbox(box, exact) for tree in self._all_trees()]
+        return np.unique(np.concatenate(found)) if found else np.zeros(0, dtype=np.int64)
+
+    def query_segment(self, lat1, lon1, lat2, lon2):
+        # Route ids whose polyline touches the segment (lat1, lon1)-(lat2, lon2)
+        found = [tree.query_segment(lat1, lon1, lat2, lon2) for tree in self._all_trees()]
+        return np.unique(np.concatenate(found)) if found else np.zeros(0, dtype=np.int64)
+
+
+if __name__ == "__main__":
+    print("=== FIXIE ROUTE SPATIAL INDEX ===")
+    print()
+
+    rng = np.random.default_rng(0)
+    n_routes = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    points = 64  # simplified routes (see route_codec)
+    step = 40.0 / 111_320 * (1 + rng.normal(0, 0.2, (n_routes, points)))
+    heading = np.cumsum(rng.normal(0, 0.3, (n_routes, points)), axis=1) + rng.random((n_routes, 1)) * 6.28
+    # A city-sized area (~30 x 30 km) around Paris
+    lat = (48.72 + rng.random((n_routes, 1)) * 0.27 + np.cumsum(np.cos(heading) * step, axis=1)).ravel()
+    lon = (2.15 + rng.random((n_routes, 1)) * 0.4 + np.cumsum(np.sin(heading) * step, axis=1) * 1.5).ravel()
+    offsets = np.arange(n_routes + 1, dtype=np.int64) * points
+    del step, heading
+
+    begin = time.perf_counter()
+    index = RouteIndex.bulk_load(lat, lon, offsets)
+    print(f"Bulk-loaded {n_routes:,} routes ({len(lat):,} points) in {time.perf_counter() - begin:.1f}s")
+
+    def brute_bbox(box):
+        inside = (lat >= box[0]) & (lat <= box[2]) & (lon >= box[1]) & (lon <= box[3])
+        return np.unique(np.repeat(np.arange(n_routes), points)[inside])
+
+    box = (48.853, 2.345, 48.857, 2.351)  # ~450 x 450 m
+    begin = time.perf_counter()
+    found = index.query_bbox(*box)
+    elapsed = time.perf_counter() - begin
+    # Every route with a point in the box must be found (routes that only
+    # pass through it without a point inside are extra, correct hits)
+    assert np.isin(brute_bbox(box), found).all()
+    print(f"bbox query: {len(found):,} routes in {elapsed * 1e3:.1f} ms")
+
+    begin = time.perf_counter()
+    crossing = index.query_segment(48.85, 2.33, 48.86, 2.34)
+    print(f"segment query: {len(crossing):,} routes in {(time.perf_counter() - begin) * 1e3:.1f} ms")
+
+    begin = time.perf_counter()
+    for i in range(20_000):
+        j = rng.integers(n_routes)
+        index.insert(n_routes + i, lat[offsets[j]:offsets[j + 1]] + 1e-4, lon[offsets[j]:offsets[j + 1]])
+    print(f"Inserted 20,000 routes in {time.perf_counter() - begin:.1f}s "
+          f"({len(index.trees)} packed trees + {len(index._pending):,} pending)")
+    begin = time.perf_counter()
+    found = index.query_bbox(*box)
+    print(f"bbox query after inserts: {len(found):,} routes in {(time.perf_counter() - begin) * 1e3:.1f} ms")
@@ -0,0 +1,257 @@
+# Incremental segment leaderboards
+# Named segments (a city climb, a park loop) are matched against every
+# validated track, and each segment keeps its standings incrementally:
+#   - best elapsed time per user (only improvements change anything)
+#   - a Fenwick tree of best times bucketed by tenth of a second, so "rank
+#     of user X on segment Y" is a prefix sum, O(log max ticks), with no
+#     re-sorting; elapsed times are reported at the same resolution
+#   - a bounded top-K list that never needs refilling: an entry only leaves
+#     it when its own user improves or a faster effort pushes it past K
+#
+# Candidate segments for a track come from a route_index.RouteIndex over the
+# segment polylines (bbox of the track), so matching cost depends on the
+# segments near the track, not on how many segments exist. An effort counts
+# when the track passes the segment start, later the segment end, and stays
+# within the corridor of every resampled segment point in between.
+
+import bisect
+import sys
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+from gps_ingest import EARTH_RADIUS_M, haversine
+from route_index import RouteIndex
+
+TOP_K = 10
+START_RADIUS_M = 25.0
+CORRIDOR_M = 25.0
+SAMPLE_SPACING_M = 20.0
+MAX_SECONDS = 6 * 3600
+TICKS_PER_SECOND = 10  # ranking resolution: efforts under 0.1 s apart tie
+_M_PER_DEG = np.radians(1.0) * EARTH_RADIUS_M
+
+
+@dataclass
+class Segment:
+    segment_id: int
+    name: str
+    lat: np.ndarray
+    lon: np.ndarray
+    length_m: float
+    samples: np.ndarray  # (n, 2) x/y metres, every SAMPLE_SPACING_M along the segment
+    lon_scale: float  # metres per degree of longitude at the segment start
+
+
+class _Fenwick:
+    # Counts per elapsed tick; prefix(i) = efforts strictly faster than i.
+    # Sparse (dict-backed) so quiet segments cost a few entries, not a full
+    # max_seconds array each
+    def __init__(self, size):
+        self.size = size
+        self.tree = {}
+
+    def add(self, i, delta):
+        i += 1
+        tree = self.tree
+        while i <= self.size:
+            tree[i] = tree.get(i, 0) + delta
+            i += i & -i
+
+    def prefix(self, i):
+        total = 0
+        tree = self.tree
+        while i > 0:
+            total += tree.get(i, 0)
+            i -= i & -i
+        return total
+
+
+class SegmentBoard:
+    def __init__(self, top_k=TOP_K, max_seconds=MAX_SECONDS):
+        self.top_k = top_k
+        self.max_ticks = max_seconds * TICKS_PER_SECOND
+        self.best = {}  # user -> best elapsed ticks
+        self.top = []  # sorted (ticks, user), at most top_k entries
+        self._counts = _Fenwick(self.max_ticks + 1)
+
+    def __len__(self):
+        return len(self.best)
+
+    def ticks(self, seconds):
+        # Elapsed seconds -> the board's key, in 1 / TICKS_PER_SECOND steps
+        return min(int(round(seconds * TICKS_PER_SECOND)), self.max_ticks)
+
+    def submit(self, user, seconds):
+        # Returns True when this is the user's new best on the segment
+        ticks = self.ticks(seconds)
+        previous = self.best.get(user)
+        if previous is not None and ticks >= previous:
+            return False
+        self.best[user] = ticks
+        if previous is not None:
+            self._counts.add(previous, -1)
+            entry = (previous, user)
+            i = bisect.bisect_left(self.top, entry)
+            if i < len(self.top) and self.top[i] == entry:
+                del self.top[i]
+        self._counts.add(ticks, 1)
+        if len(self.top) < self.top_k or (ticks, user) < self.top[-1]:
+            bisect.insort(self.top, (ticks, user))
+            del self.top[self.top_k:]
+        return True
+
+    def rank(self, user):
+        # 1-based; ties share the rank of the fastest equal time
+        ticks = self.best.get(user)
+        return None if ticks is None else self._counts.prefix(ticks) + 1
+
+
+class SegmentLeaderboard:
+    def __init__(self, top_k=TOP_K, start_radius_m=START_RADIUS_M, corridor_m=CORRIDOR_M,
+                 max_seconds=MAX_SECONDS):
+        self.top_k = top_k
+        self.start_radius_m = start_radius_m
+        self.corridor_m = corridor_m
+        self.max_seconds = max_seconds
+        self.segments = {}
+        self.boards = {}
+        self._index = RouteIndex()
+
+    def add_segment(self, segment_id, name, lat, lon):
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        lon_scale = _M_PER_DEG * np.cos(np.radians(lat[0]))
+        x, y = lon * lon_scale, lat * _M_PER_DEG
+        along = np.concatenate(([0.0], np.cumsum(np.hypot(np.diff(x), np.diff(y)))))
+        at = np.linspace(0.0, along[-1], max(2, int(along[-1] // SAMPLE_SPACING_M) + 1))
+        samples = np.stack([np.interp(at, along, x), np.interp(at, along, y)], axis=1)
+        self.segments[segment_id] = Segment(segment_id, name, lat, lon, float(along[-1]), samples, lon_scale)
+        self.boards[segment_id] = SegmentBoard(self.top_k, self.max_seconds)
+        self._index.insert(segment_id, lat, lon)
+
+    def _effort(self, segment, lat, lon, timestamps):
+        # Fastest valid effort of this track on the segment, or None
+        near_start = np.flatnonzero(haversine(lat, lon, segment.lat[0], segment.lon[0]) <= self.start_radius_m)
+        if not len(near_start):
+            return None
+        near_end = np.flatnonzero(haversine(lat, lon, segment.lat[-1], segment.lon[-1]) <= self.start_radius_m)
+        near_end = near_end[near_end > near_start[0]]
+        if not len(near_end):
+            return None
+        # Pair each end pass with the latest start pass before it, keeping the
+        # first end pass per start
+        starts = near_start[np.searchsorted(near_start, near_end) - 1]
+        first = np.concatenate(([True], starts[1:] != starts[:-1]))
+        starts, ends = starts[first], near_end[first]
+        elapsed = timestamps[ends] - timestamps[starts]
+
+        x = lon * segment.lon_scale
+        y = lat * _M_PER_DEG
+        limit = self.corridor_m ** 2
+        for i in np.argsort(elapsed, kind="stable"):
+            s, e = starts[i], ends[i] + 1
+            dx = segment.samples[:, :1] - x[None, s:e]
+            dy = segment.samples[:, 1:] - y[None, s:e]
+            if ((dx * dx + dy * dy).min(axis=1) <= limit).all():
+                return float(elapsed[i])
+        return None
+
+    def match(self, lat, lon, timestamps):
+        # [(segment_id, elapsed_s)] for every segment this track completed
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        if len(lat) < 2:
+            return []
+        box = (lat.min(), lon.min(), lat.max(), lon.max())
+        # The track has to reach both segment ends; reject on its bounding box
+        # (padded by the start radius) before touching the points
+        pad_lat = self.start_radius_m / _M_PER_DEG
+        pad_lon = pad_lat / np.cos(np.radians(max(abs(box[0]), abs(box[2]))))
+        matches = []
+        for segment_id in self._index.query_bbox(*box, exact=False).tolist():
+            segment = self.segments[segment_id]
+            if not all(box[0] - pad_lat <= segment.lat[i] <= box[2] + pad_lat
+                       and box[1] - pad_lon <= segment.lon[i] <= box[3] + pad_lon for i in (0, -1)):
+                continue
+            elapsed = self._effort(segment, lat, lon, timestamps)
+            if elapsed is not None:
+                matches.append((segment_id, elapsed))
+        return matches
+
+    def record(self, user, lat, lon, timestamps):
+        # Matches a validated track and updates the boards:
+        # [(segment_id, elapsed_s, rank, improved)], elapsed_s at the
+        # board's resolution, as ranked
+        results = []
+        for segment_id, elapsed in self.match(lat, lon, timestamps):
+            board = self.boards[segment_id]
+            improved = board.submit(user, elapsed)
+            results.append((segment_id, board.ticks(elapsed) / TICKS_PER_SECOND, board.rank(user), improved))
+        return results
+
+    def top(self, segment_id, k=None):
+        return [(user, ticks / TICKS_PER_SECOND) for ticks, user in self.boards[segment_id].top[:k]]
+
+    def rank(self, segment_id, user):
+        return self.boards[segment_id].rank(user)
+
+
+if __name__ == "__main__":
+    print("=== FIXIE SEGMENT LEADERBOARDS ===")
+    print()
+
+    rng = np.random.default_rng(0)
+    n_segments = 500
+    n_workouts = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    n_users = 5_000
+    leaderboard = SegmentLeaderboard()
+    shapes = []
+    for segment_id in range(n_segments):
+        points = 20
+        heading = rng.random() * 6.28 + np.cumsum(rng.normal(0, 0.2, points))
+        step = 60.0 / _M_PER_DEG  # ~60 m per vertex, ~1.1 km segments
+        lat = 48.72 + rng.random() * 0.27 + np.cumsum(np.cos(heading) * step)
+        lon = 2.15 + rng.random() * 0.4 + np.cumsum(np.sin(heading) * step) / np.cos(np.radians(48.85))
+        leaderboard.add_segment(segment_id, f"Segment {segment_id}", lat, lon)
+        shapes.append((lat, lon))
+    leaderboard._index.flush()
+
+    def ride(lat, lon, speed_ms):
+        # 1 Hz track along the polyline plus a short lead-in and lead-out
+        x, y = lon * _M_PER_DEG * np.cos(np.radians(lat[0])), lat * _M_PER_DEG
+        along = np.concatenate(([0.0], np.cumsum(np.hypot(np.diff(x), np.diff(y)))))
+        at = np.arange(-100.0, along[-1] + 100.0, speed_ms * (1 + rng.normal(0, 0.05)))
+        tx = np.interp(at, along, x) + rng.normal(0, 3, len(at))
+        ty = np.interp(at, along, y) + rng.normal(0, 3, len(at))
+        return ty / _M_PER_DEG, tx / (_M_PER_DEG * np.cos(np.radians(lat[0])))
+
+    tracks = []
+    for _ in range(n_workouts):
+        segment_id = int(rng.integers(n_segments))
+        lat, lon = ride(*shapes[segment_id], speed_ms=rng.uniform(3, 12))
+        tracks.append((int(rng.integers(n_users)), lat, lon, 1_700_000_000 + np.arange(len(lat), dtype=np.float64)))
+
+    begin = time.perf_counter()
+    efforts = sum(len(leaderboard.record(*track)) for track in tracks)
+    elapsed = time.perf_counter() - begin
+    print(f"Matched {n_workouts:,} workouts against {n_segments:,} segments in {elapsed:.1f}s "
+          f"({n_workouts / elapsed:,.0f} workouts/s, {efforts:,} efforts)")
+
+    busiest = max(leaderboard.boards, key=lambda s: len(leaderboard.boards[s]))
+    board = leaderboard.boards[busiest]
+    ranking = sorted(board.best.items(), key=lambda item: item[1])
+    for user, seconds in ranking:
+        assert board.rank(user) == 1 + sum(1 for _, other in ranking if other < seconds)
+    assert [(u, s) for s, u in board.top] == sorted(ranking, key=lambda item: (item[1], item[0]))[:TOP_K]
+    print(f"Cross-check vs full sort on segment {busiest} ({len(board):,} athletes): OK")
+
+    print(f"Top 5 on {leaderboard.segments[busiest].name} ({leaderboard.segments[busiest].length_m:,.0f} m):")
+    for place, (user, seconds) in enumerate(leaderboard.top(busiest, 5), 1):
+        print(f"  {place}. user {user:<5} {seconds // 60:.0f}:{seconds % 60:04.1f}")
+    begin = time.perf_counter()
+    for user in range(n_users):
+        leaderboard.rank(busiest, user)
+    print(f"{n_users:,} rank queries in {(time.perf_counter() - begin) * 1e3:.1f} ms")
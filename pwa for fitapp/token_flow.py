@@ -0,0 +1,162 @@
+# Token flow aggregates for the tokenomics diagram
+# chart_script_1.py draws the FIXIE economy from the numbers in FLOWS_PATH
+# instead of hand-written labels. They come from one streaming pass over a
+# DayStats stream -- emission_sim.simulate() directly, or a JSON-lines day
+# log of any size read line by line -- folded into running totals, so memory
+# does not depend on the length of the run:
+#   - minted tokens split by source (distance rewards per workout type, NFT
+#     tokenBoost, streak multiplier, milestone bonus, weekly StreakBonus)
+#   - NFT purchases and the mint costs they burn, capped workouts
+#   - the total supply series, downsampled on the fly into at most
+#     CURVE_POINTS (day, low, high) buckets: when the buckets fill up,
+#     neighbours are merged pairwise and the bucket width doubles
+# Per-day figures are averages over the whole run, in whole FIXIE.
+
+import dataclasses
+import json
+import sys
+import time
+
+from emission_sim import SOURCES, ActivityModel, DayStats, simulate
+from fixie_rules import WEI, WORKOUT_TYPES
+
+FLOWS_PATH = "fixie_token_flows.json"
+CURVE_POINTS = 120
+
+
+class SupplyCurve:
+    # Min/max decimation of an unbounded series into <= points buckets
+    def __init__(self, points=CURVE_POINTS):
+        self.points = points
+        self.width = 1
+        self.buckets = []  # [first day, low, high]
+
+    def add(self, day, value):
+        if self.buckets and day - self.buckets[-1][0] < self.width:
+            bucket = self.buckets[-1]
+            bucket[1] = min(bucket[1], value)
+            bucket[2] = max(bucket[2], value)
+            return
+        if len(self.buckets) == self.points:
+            self.width *= 2
+            merged = []
+            for bucket in self.buckets:
+                if merged and bucket[0] - merged[-1][0] < self.width:
+                    merged[-1][1] = min(merged[-1][1], bucket[1])
+                    merged[-1][2] = max(merged[-1][2], bucket[2])
+                else:
+                    merged.append(bucket)
+            self.buckets = merged
+            return self.add(day, value)
+        self.buckets.append([day, value, value])
+
+
+class FlowAggregator:
+    def __init__(self, curve_points=CURVE_POINTS):
+        self.days = 0
+        self.workouts = 0
+        self.rejected = 0
+        self.cap_days = 0
+        self.minted = 0
+        self.burned = 0
+        self.nft_purchases = 0
+        self.distance_by_type = [0] * len(WORKOUT_TYPES)
+        self.sources = [0] * len(SOURCES)
+        self.supply = SupplyCurve(curve_points)
+
+    def add(self, stats):
+        self.days += 1
+        self.workouts += stats.workouts
+        self.rejected += stats.rejected
+        self.cap_days += stats.daily_cap_hit
+        self.minted += stats.minted
+        self.burned += stats.burned
+        self.nft_purchases += stats.nft_purchases
+        for i, value in enumerate(stats.distance_by_type):
+            self.distance_by_type[i] += value
+        for i, value in enumerate(stats.sources):
+            self.sources[i] += value
+        self.supply.add(stats.day, stats.total_supply // WEI)
+
+    def extend(self, day_stats):
+        for stats in day_stats:
+            self.add(stats)
+        return self
+
+    def flows(self):
+        # Plain dict of per-day averages (FIXIE) for the diagram; see FLOWS_PATH
+        days = max(self.days, 1)
+        flows = {
+            "days": self.days,
+            "workouts": self.workouts / days,
+            "rejected": self.rejected / days,
+            "cap_day_share": self.cap_days / days,
+            "minted": self.minted / WEI / days,
+            "burned": self.burned / WEI / days,
+            "net": (self.minted - self.burned) / WEI / days,
+            "nft_purchases": self.nft_purchases / days,
+            "supply_curve": [tuple(bucket) for bucket in self.supply.buckets],
+        }
+        for name, value in zip(WORKOUT_TYPES, self.distance_by_type):
+            flows[f"distance_{name}"] = value / WEI / days
+        for name, value in zip(SOURCES, self.sources):
+            flows[name] = value / WEI / days
+        return flows
+
+
+def read_day_log(path):
+    # DayStats from a JSON-lines log (one dataclasses.asdict per line),
+    # streamed so the log never has to fit in memory
+    with open(path) as log:
+        for line in log:
+            if line.strip():
+                record = json.loads(line)
+                for name in ("distance_by_type", "sources"):
+                    record[name] = tuple(record[name])
+                yield DayStats(**record)
+
+
+def write_day_log(day_stats, path):
+    with open(path, "w") as log:
+        for stats in day_stats:
+            log.write(json.dumps(dataclasses.asdict(stats)) + "\n")
+
+
+def save(flows, path=FLOWS_PATH):
+    # One key per line, so a regenerated file diffs readably
+    with open(path, "w") as f:
+        f.write("{\n" + ",\n".join(f" {json.dumps(key)}: {json.dumps(value)}" for key, value in flows.items())
+                + "\n}\n")
+
+
+def load(path=FLOWS_PATH):
+    with open(path) as f:
+        return json.load(f)
+
+
+if __name__ == "__main__":
+    print("=== FIXIE TOKEN FLOW AGGREGATES ===")
+    print()
+
+    # python token_flow.py [users] [years]  -- simulate and aggregate
+    # python token_flow.py days.jsonl       -- aggregate an existing day log
+    start = time.perf_counter()
+    if len(sys.argv) > 1 and not sys.argv[1].isdigit():
+        source = sys.argv[1]
+        flows = FlowAggregator().extend(read_day_log(source)).flows()
+    else:
+        users = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+        years = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+        source = f"emission_sim, {users:,} users, {years} years"
+        model = ActivityModel(users=users, user_growth_per_day=0.002)
+        flows = FlowAggregator().extend(simulate(model, days=365 * years)).flows()
+    elapsed = time.perf_counter() - start
+    save(flows)
+
+    print(f"Aggregated {flows['days']:,} days ({source}) in {elapsed:.1f}s -> {FLOWS_PATH}")
+    print(f"Per day: {flows['minted']:,.0f} minted, {flows['burned']:,.0f} burned, {flows['net']:+,.0f} net")
+    for name in WORKOUT_TYPES:
+        print(f"  {name:<18} {flows[f'distance_{name}']:>12,.0f}")
+    for name in SOURCES[1:]:
+        print(f"  {name:<18} {flows[name]:>12,.0f}")
+    print(f"Supply curve: {len(flows['supply_curve'])} buckets")
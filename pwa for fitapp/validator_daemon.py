@@ -0,0 +1,348 @@
+# Asyncio validator daemon between the PWA and validateWorkout
+# app.js's syncData() / requestBackgroundSync() have nothing to talk to, and
+# one validator signing one transaction per request falls over at peak hours.
+# This daemon takes workout submissions into a pipeline of bounded queues:
+#
+#   submit() -> dedup -> signature -> fraud -> reward -> chain
+#
+#   dedup      workout_dedup hash, rejected if already processed or in flight
+#   signature  workout_signatures.SignatureVerifier (process pool)
+#   fraud      anti_cheat.FraudScorer over the batch's GPS tracks
+#   reward     drops workouts already older than validateWorkout's one-hour
+#              window; zero-reward workouts still go on, since they keep
+#              the streak and can earn the weekly StreakBonus
+#   chain      backend.submit(), one call per batch (LedgerBackend locally)
+#
+# Like processedWorkouts on-chain, a hash is only recorded as processed once
+# its workout is accepted. Until then it is held as in flight and released on
+# any rejection, so a failed submission can be retried and a copy with a bad
+# signature cannot block the real one.
+#
+# Every stage pulls batches of up to `batch_size` from its queue and runs
+# `concurrency` workers; blocking work goes to a thread so the loop keeps
+# accepting. Queues are bounded, so a slow chain fills the queues behind it
+# and submit() blocks (try_submit() raises asyncio.QueueFull) instead of
+# memory growing without limit. drain() stops intake, lets every queued
+# workout finish stage by stage, then stops the workers.
+#
+# Each submit() returns a future that resolves to an Outcome once the workout
+# is submitted or rejected.
+
+import asyncio
+import sys
+import time
+from collections import Counter, namedtuple
+from dataclasses import dataclass
+
+import numpy as np
+
+from anti_cheat import FraudScorer, TrackBatch
+from evm_encoding import to_address_bytes
+from fixie_rules import MAX_WORKOUT_AGE
+from ledger_sim import Revert
+from workout_dedup import workout_hash
+
+ACCEPTED = "accepted"
+DUPLICATE = "duplicate"
+BAD_SIGNATURE = "bad signature"
+FRAUD = "fraud"
+REVERTED = "reverted"
+ERROR = "error"
+
+Outcome = namedtuple("Outcome", "status reward reason")  # reward in wei
+
+
+@dataclass
+class StageConfig:
+    concurrency: int = 1
+    batch_size: int = 256
+    queue_size: int = 4096
+    max_wait: float = 0.005  # seconds a partial batch waits for more items
+
+
+DEFAULT_STAGES = {
+    "dedup": StageConfig(concurrency=1, batch_size=1024),
+    "signature": StageConfig(concurrency=2, batch_size=1024),
+    "fraud": StageConfig(concurrency=1, batch_size=256),
+    "reward": StageConfig(concurrency=1, batch_size=1024),
+    "chain": StageConfig(concurrency=4, batch_size=128, queue_size=1024),
+}
+
+
+@dataclass
+class Submission:
+    workout: object  # ledger_sim.Workout
+    track: tuple = None  # (lat, lon, time) arrays, if the upload had GPS
+    future: asyncio.Future = None
+    digest: bytes = None  # workout_hash, set by the dedup stage
+
+
+class LedgerBackend:
+    # Local stand-in chain: ledger_sim.FixieLedger, with `latency` seconds of
+    # simulated block time per submit(). A network backend implements the
+    # same two coroutines.
+    def __init__(self, ledger, validator, latency=0.0):
+        self.ledger = ledger
+        self.validator = validator
+        self.latency = latency
+        self.calls = 0
+
+    async def now(self):
+        return self.ledger.block_timestamp
+
+    async def submit(self, workouts):
+        # [(reward wei or None, revert reason or None)] in input order
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        results = []
+        for workout in workouts:
+            try:
+                results.append((self.ledger.validate_workout(self.validator, workout), None))
+            except Revert as exc:
+                results.append((None, exc.reason))
+        return results
+
+
+class _SeenHashes:
+    # In-memory default for `dedup`; workout_dedup.WorkoutDedupIndex has the
+    # same add() and `in` and survives restarts
+    def __init__(self):
+        self._seen = set()
+
+    def __contains__(self, digest):
+        return digest in self._seen
+
+    def add(self, digest):
+        if digest in self._seen:
+            return False
+        self._seen.add(digest)
+        return True
+
+
+class ValidatorDaemon:
+    STAGES = ("dedup", "signature", "fraud", "reward", "chain")
+
+    def __init__(self, backend, dedup=None, verifier=None, scorer=None, fraud_threshold=0.5, stages=None):
+        self.backend = backend
+        self.dedup = dedup if dedup is not None else _SeenHashes()  # accepted workouts
+        self.in_flight = set()
+        self.verifier = verifier  # None: signatures are not checked
+        self.scorer = scorer if scorer is not None else FraudScorer()
+        self.fraud_threshold = fraud_threshold
+        self.config = {**DEFAULT_STAGES, **(stages or {})}
+        self.queues = {name: asyncio.Queue(self.config[name].queue_size) for name in self.STAGES}
+        self.max_depth = Counter()
+        self.outcomes = Counter()
+        self._handlers = {
+            "dedup": self._dedup,
+            "signature": self._signature,
+            "fraud": self._fraud,
+            "reward": self._reward,
+            "chain": self._chain,
+        }
+        self._workers = {}
+        self._accepting = False
+
+    # -- lifecycle --------------------------------------------------------
+
+    def start(self):
+        for i, name in enumerate(self.STAGES):
+            following = self.queues[self.STAGES[i + 1]] if i + 1 < len(self.STAGES) else None
+            self._workers[name] = [asyncio.create_task(self._run_stage(name, following))
+                                   for _ in range(self.config[name].concurrency)]
+        self._accepting = True
+        return self
+
+    async def drain(self):
+        # Stop intake, finish everything queued, stop the workers
+        self._accepting = False
+        for name in self.STAGES:
+            await self.queues[name].join()
+            for task in self._workers[name]:
+                task.cancel()
+            await asyncio.gather(*self._workers[name], return_exceptions=True)
+
+    async def __aenter__(self):
+        return self.start()
+
+    async def __aexit__(self, *exc):
+        await self.drain()
+
+    # -- intake -----------------------------------------------------------
+
+    def _submission(self, workout, track):
+        if not self._accepting:
+            raise RuntimeError("validator daemon is not accepting submissions")
+        return Submission(workout, track, asyncio.get_running_loop().create_future())
+
+    async def submit(self, workout, track=None):
+        # Waits while the dedup queue is full; returns the Outcome future
+        submission = self._submission(workout, track)
+        await self.queues["dedup"].put(submission)
+        return submission.future
+
+    def try_submit(self, workout, track=None):
+        # Raises asyncio.QueueFull instead of waiting (HTTP 429 upstream)
+        submission = self._submission(workout, track)
+        self.queues["dedup"].put_nowait(submission)
+        return submission.future
+
+    # -- stage machinery --------------------------------------------------
+
+    async def _next_batch(self, name):
+        queue, config = self.queues[name], self.config[name]
+        batch = [await queue.get()]
+        waited = False
+        while len(batch) < config.batch_size:
+            if not queue.empty():
+                batch.append(queue.get_nowait())
+            elif waited or not config.max_wait:
+                break
+            else:
+                await asyncio.sleep(config.max_wait)
+                waited = True
+        return batch
+
+    async def _run_stage(self, name, following):
+        queue, handler = self.queues[name], self._handlers[name]
+        while True:
+            batch = await self._next_batch(name)
+            self.max_depth[name] = max(self.max_depth[name], queue.qsize() + len(batch))
+            try:
+                passed = await handler(batch)
+            except Exception as exc:
+                for submission in batch:
+                    self._finish(submission, ERROR, reason=f"{name} stage failed: {exc!r}")
+                passed = []
+            for submission in passed:
+                if following is None:
+                    continue
+                await following.put(submission)  # backpressure: waits while the next stage is full
+            for _ in batch:
+                queue.task_done()
+
+    def _finish(self, submission, status, reward=None, reason=None):
+        if submission.digest is not None:
+            self.in_flight.discard(submission.digest)
+            if status == ACCEPTED:
+                self.dedup.add(submission.digest)
+        self.outcomes[status] += 1
+        if not submission.future.done():
+            submission.future.set_result(Outcome(status, reward, reason))
+
+    # -- stages -----------------------------------------------------------
+
+    async def _dedup(self, batch):
+        passed = []
+        for submission in batch:
+            w = submission.workout
+            digest = workout_hash(to_address_bytes(w.user), w.distance, w.duration, w.calories, w.workout_type,
+                                  w.timestamp)
+            if digest in self.dedup:
+                self._finish(submission, DUPLICATE, reason="Workout already processed")
+            elif digest in self.in_flight:
+                self._finish(submission, DUPLICATE, reason="Workout already in flight")
+            else:
+                self.in_flight.add(digest)
+                submission.digest = digest
+                passed.append(submission)
+        return passed
+
+    async def _signature(self, batch):
+        if self.verifier is None:
+            return batch
+        checks = await asyncio.to_thread(self.verifier.verify, [s.workout for s in batch])
+        passed = []
+        for submission, check in zip(batch, checks):
+            if check.valid:
+                passed.append(submission)
+            else:
+                self._finish(submission, BAD_SIGNATURE, reason=check.reason)
+        return passed
+
+    async def _fraud(self, batch):
+        tracked = [s for s in batch if s.track is not None]
+        if not tracked:
+            return batch
+        tracks = TrackBatch.from_tracks([s.track for s in tracked], [s.workout.workout_type for s in tracked])
+        scores = await asyncio.to_thread(self.scorer.score, tracks)
+        flagged = set()
+        for i in np.flatnonzero(scores.flagged(self.fraud_threshold)):
+            flagged.add(id(tracked[i]))
+            self._finish(tracked[i], FRAUD, reason=", ".join(scores.explain(i)))
+        return [s for s in batch if id(s) not in flagged]
+
+    async def _reward(self, batch):
+        # Only the age check: a workout whose reward floors to 0 still runs
+        # _updateStreak on-chain
+        now = await self.backend.now()
+        passed = []
+        for submission in batch:
+            if now - submission.workout.timestamp >= MAX_WORKOUT_AGE:
+                self._finish(submission, REVERTED, reason="Workout too old")
+            else:
+                passed.append(submission)
+        return passed
+
+    async def _chain(self, batch):
+        results = await self.backend.submit([s.workout for s in batch])
+        for submission, (reward, reason) in zip(batch, results):
+            if reason is None:
+                self._finish(submission, ACCEPTED, reward=reward)
+            else:
+                self._finish(submission, REVERTED, reason=reason)
+        return []
+
+
+if __name__ == "__main__":
+    print("=== FIXIE VALIDATOR DAEMON ===")
+    print()
+
+    from ledger_sim import FixieLedger, Workout
+
+    # python validator_daemon.py [submissions] [chain latency ms]
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 20.0) / 1000
+    deployer, validator = "0x" + "11" * 20, "0x" + "22" * 20
+    ledger = FixieLedger.deploy(deployer, block_timestamp=1_700_000_000, record_events=False)
+    ledger.add_validator(deployer, validator)
+    backend = LedgerBackend(ledger, validator, latency=latency)
+    rng = np.random.default_rng(0)
+
+    def upload(i):
+        workout_type = ("running", "cycling", "walking")[i % 3]
+        workout = Workout((i % 5_000 + 1).to_bytes(20, "big"), 500 + (i * 37) % 20_000, 1800 + i, 250, workout_type,
+                          ledger.block_timestamp - (i % 600))
+        if i % 10:
+            return workout, None
+        # Every tenth upload carries its GPS track; a few of those teleport
+        points = 600
+        kmh = {"running": 11.0, "cycling": 24.0, "walking": 5.0}[workout_type]
+        step = kmh / 3.6 / 111_320 * (1 + rng.normal(0, 0.15, points))
+        lat = 48.85 + rng.random() * 0.1 + np.cumsum(step)
+        lon = 2.35 + rng.random() * 0.1 + np.cumsum(rng.normal(0, 2e-6, points))
+        if i % 70 == 0:
+            lat[points // 2:] += 0.05
+        return workout, (lat, lon, workout.timestamp - points + np.arange(points, dtype=np.float64))
+
+    async def main():
+        uploads = [upload(i) for i in range(n)]
+        uploads += uploads[:n // 20]  # background-sync retries
+        start = time.perf_counter()
+        async with ValidatorDaemon(backend) as daemon:
+            futures = [await daemon.submit(workout, track) for workout, track in uploads]
+            intake = time.perf_counter() - start
+        outcomes = [future.result() for future in futures]
+        elapsed = time.perf_counter() - start
+        print(f"{len(uploads):,} submissions in {elapsed:.2f}s ({len(uploads) / elapsed:,.0f}/s), "
+              f"intake blocked for {intake:.2f}s by backpressure")
+        print(f"{backend.calls:,} chain submissions of up to {daemon.config['chain'].batch_size} workouts, "
+              f"{latency * 1000:.0f} ms each")
+        for status, count in daemon.outcomes.most_common():
+            print(f"  {status:<13} {count:,}")
+        print("Max queue depth: " + ", ".join(f"{name} {daemon.max_depth[name]:,}" for name in daemon.STAGES))
+        minted = sum(o.reward for o in outcomes if o.status == ACCEPTED)
+        print(f"Minted {minted / 10**18:,.2f} FIXIE")
+
+    asyncio.run(main())
@@ -0,0 +1,155 @@
+# Rolling 7-day challenge aggregator
+# Server-side replacement for the userData.weeklyDistance / weeklyCalories
+# counters in app.js. Every user owns a ring of WINDOW_DAYS daily buckets
+# (slot = day % WINDOW_DAYS) in struct-of-arrays form: distance, calories and
+# workout count per slot plus the day each slot currently holds, stored as
+# (WINDOW_DAYS, users) so each slot is one contiguous row. A slot is
+# reset lazily the first time a newer day lands in it, so expiry costs
+# nothing, and a window sum only reads the WINDOW_DAYS slots whose day is
+# inside the window: "who completed this week's challenge?" is one pass over
+# (users, 7) arrays, never over workout history.
+
+import sys
+import time
+
+import numpy as np
+
+from fixie_rules import SECONDS_PER_DAY
+
+WINDOW_DAYS = 7
+_EMPTY_DAY = np.iinfo(np.int32).min
+
+
+class WeeklyAggregator:
+    def __init__(self, users=0):
+        self.slot_day = np.full((WINDOW_DAYS, users), _EMPTY_DAY, dtype=np.int32)
+        self.distance = np.zeros((WINDOW_DAYS, users), dtype=np.uint32)  # metres
+        self.calories = np.zeros((WINDOW_DAYS, users), dtype=np.uint32)
+        self.workouts = np.zeros((WINDOW_DAYS, users), dtype=np.uint16)
+        self.today = _EMPTY_DAY  # latest day seen in the stream
+
+    def __len__(self):
+        return self.slot_day.shape[1]
+
+    def _ensure(self, users):
+        if users <= len(self):
+            return
+        size = max(users, 2 * len(self))
+        for name in ("slot_day", "distance", "calories", "workouts"):
+            old = getattr(self, name)
+            new = np.full((WINDOW_DAYS, size), _EMPTY_DAY if name == "slot_day" else 0, dtype=old.dtype)
+            new[:, : old.shape[1]] = old
+            setattr(self, name, new)
+
+    def add(self, user_ids, timestamps, distances_m, calories):
+        # Folds one batch of validated workouts into the buckets. Workouts
+        # older than the window (relative to the newest day seen) are ignored.
+        users = np.asarray(user_ids, dtype=np.int64)
+        if not len(users):
+            return
+        day = np.asarray(timestamps, dtype=np.int64) // SECONDS_PER_DAY
+        self._ensure(int(users.max()) + 1)
+        self.today = max(self.today, int(day.max()))
+        fresh = day > self.today - WINDOW_DAYS
+        users, day = users[fresh], day[fresh].astype(np.int32)
+        distances_m = np.asarray(distances_m, dtype=np.int64)[fresh]
+        calories = np.asarray(calories, dtype=np.int64)[fresh]
+
+        # Advance each touched slot to the newest day it receives, clearing
+        # it if that day is newer than what it held
+        key = (day % WINDOW_DAYS).astype(np.int64) * len(self) + users
+        slot_day = self.slot_day.reshape(-1)
+        before = slot_day[key]
+        np.maximum.at(slot_day, key, day)
+        after = slot_day[key]
+        cleared = key[after > before]
+        for name in ("distance", "calories", "workouts"):
+            getattr(self, name).reshape(-1)[cleared] = 0
+
+        current = day == after
+        key = key[current]
+        np.add.at(self.distance.reshape(-1), key, distances_m[current].astype(np.uint32))
+        np.add.at(self.calories.reshape(-1), key, calories[current].astype(np.uint32))
+        np.add.at(self.workouts.reshape(-1), key, np.uint16(1))
+
+    def _live(self, today, users):
+        # Per slot: does it hold a day inside [today - 6, today]?
+        today = self.today if today is None else int(today)
+        slot_day = self.slot_day if users is None else self.slot_day[:, users]
+        return (slot_day > today - WINDOW_DAYS) & (slot_day <= today)
+
+    def _window_sum(self, name, live, users):
+        values = getattr(self, name) if users is None else getattr(self, name)[:, users]
+        total = np.zeros(values.shape[1], dtype=np.int64)
+        for slot in range(WINDOW_DAYS):
+            total += values[slot] * live[slot]
+        return total
+
+    def window_totals(self, today=None, users=None):
+        # (distance_m, calories, workouts) summed over [today - 6, today] for
+        # every user (or the given user ids)
+        users = None if users is None else np.asarray(users, dtype=np.int64)
+        live = self._live(today, users)
+        return tuple(self._window_sum(name, live, users) for name in ("distance", "calories", "workouts"))
+
+    def completed(self, min_distance_m=0, min_calories=0, min_workouts=0, today=None):
+        # User ids meeting every threshold of a weekly challenge; only the
+        # metrics with a threshold are summed
+        live = self._live(today, None)
+        done = np.ones(len(self), dtype=bool)
+        for name, minimum in (("distance", min_distance_m), ("calories", min_calories), ("workouts", min_workouts)):
+            if minimum:
+                done &= self._window_sum(name, live, None) >= minimum
+        if not (min_distance_m or min_calories or min_workouts):
+            done &= live.any(axis=0)
+        return np.flatnonzero(done)
+
+
+if __name__ == "__main__":
+    print("=== FIXIE WEEKLY CHALLENGE AGGREGATOR ===")
+    print()
+
+    # Cross-check against a direct sum over the raw log
+    rng = np.random.default_rng(1)
+    aggregator = WeeklyAggregator()
+    start = 1_700_006_400 - 1_700_006_400 % SECONDS_PER_DAY
+    log = []
+    for d in range(20):
+        n = 3_000
+        users = rng.integers(0, 400, n)
+        stamps = start + d * SECONDS_PER_DAY + rng.integers(0, SECONDS_PER_DAY, n)
+        dist = rng.integers(500, 20_000, n)
+        cal = dist // 15
+        aggregator.add(users, stamps, dist, cal)
+        log.append((users, stamps // SECONDS_PER_DAY, dist, cal))
+    today = start // SECONDS_PER_DAY + 19
+    users, days, dist, cal = (np.concatenate(parts) for parts in zip(*log))
+    window = days > today - WINDOW_DAYS
+    expected = np.bincount(users[window], weights=dist[window], minlength=len(aggregator)).astype(np.int64)
+    assert np.array_equal(aggregator.window_totals()[0], expected)
+    assert np.array_equal(aggregator.window_totals()[2], np.bincount(users[window], minlength=len(aggregator)))
+    print("Cross-check vs raw 7-day sums: OK")
+
+    n_users = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000_000
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 28
+    aggregator = WeeklyAggregator(n_users)
+    rng = np.random.default_rng(0)
+    elapsed = 0.0
+    events = 0
+    for d in range(days):
+        active = np.flatnonzero(rng.random(n_users) < 0.3)
+        stamps = start + d * SECONDS_PER_DAY + rng.integers(0, SECONDS_PER_DAY, len(active))
+        dist = rng.lognormal(np.log(5_000), 0.6, len(active)).astype(np.int64)
+        begin = time.perf_counter()
+        aggregator.add(active, stamps, dist, dist // 15)
+        elapsed += time.perf_counter() - begin
+        events += len(active)
+    print(f"Aggregated {events:,} workouts for {n_users:,} users in {elapsed:.2f}s "
+          f"({events / elapsed:,.0f} workouts/s)")
+
+    begin = time.perf_counter()
+    done = aggregator.completed(min_distance_m=20_000, min_workouts=3)
+    print(f"'20 km in 3+ workouts this week': {len(done):,} users, "
+          f"answered in {(time.perf_counter() - begin) * 1e3:.0f} ms")
+    print(f"Memory: {sum(getattr(aggregator, n).nbytes for n in ('slot_day', 'distance', 'calories', 'workouts')) / 1e6:,.0f} MB "
+          f"({WINDOW_DAYS} daily buckets per user)")
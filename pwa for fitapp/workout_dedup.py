@@ -0,0 +1,335 @@
+# Off-chain duplicate-workout index
+# Computes the same workoutHash as WorkoutValidator.validateWorkout and answers
+# "already processed?" before a workout is forwarded, so replays never cost a
+# reverted transaction.
+#
+# Layout: an in-memory Bloom filter in front of a sorted on-disk hash set that
+# is memory-mapped. The file is
+#   header   MAGIC, entry count (uint64 LE)
+#   fanout   65536 x uint64 LE, number of hashes whose first two bytes are <= i
+#   hashes   sorted unique 32-byte workout hashes
+# so a lookup reads one fanout slot and binary-searches a single bucket.
+# New hashes are held in memory until flush() merges them into a new file.
+
+import math
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from evm_encoding import keccak256, pack_address, pack_string, pack_uint256
+
+MAGIC = b"FXDEDUP1"
+HASH_SIZE = 32
+FANOUT = 1 << 16
+HEADER_SIZE = len(MAGIC) + 8
+DATA_OFFSET = HEADER_SIZE + FANOUT * 8
+PARTITIONS = 256  # rebuild radix partitions, by first hash byte
+_U64 = (1 << 64) - 1
+
+
+def workout_preimage(user, distance, duration, calories, workout_type, timestamp):
+    # abi.encodePacked(user, distance, duration, calories, workoutType, timestamp)
+    return (
+        pack_address(user)
+        + pack_uint256(distance)
+        + pack_uint256(duration)
+        + pack_uint256(calories)
+        + pack_string(workout_type)
+        + pack_uint256(timestamp)
+    )
+
+
+def workout_hash(user, distance, duration, calories, workout_type, timestamp):
+    return keccak256(workout_preimage(user, distance, duration, calories, workout_type, timestamp))
+
+
+class BloomFilter:
+    # Bit positions come straight from the keccak digest (double hashing on
+    # its first two 64-bit words), so no extra hashing is needed
+
+    def __init__(self, expected_items, false_positive_rate=0.001):
+        expected_items = max(int(expected_items), 1)
+        self.size = max(64, int(-expected_items * math.log(false_positive_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / expected_items * math.log(2)))
+        self.bits = np.zeros((self.size + 7) // 8, dtype=np.uint8)
+        # Plain memoryview indexing is much cheaper than NumPy scalar access
+        self._view = memoryview(self.bits)
+
+    def _positions(self, digest):
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:16], "little") | 1
+        return [((h1 + i * h2) & _U64) % self.size for i in range(self.hash_count)]
+
+    def _positions_many(self, digests):
+        words = np.frombuffer(b"".join(digests) if isinstance(digests, list) else digests, dtype="<u8")
+        words = words.reshape(-1, HASH_SIZE // 8)
+        h1 = words[:, 0:1]
+        h2 = words[:, 1:2] | np.uint64(1)
+        steps = np.arange(self.hash_count, dtype=np.uint64)
+        # uint64 arithmetic wraps modulo 2**64, as _positions does explicitly
+        return (h1 + steps * h2) % np.uint64(self.size)
+
+    def add(self, digest):
+        view = self._view
+        for pos in self._positions(digest):
+            view[pos >> 3] |= 1 << (pos & 7)
+
+    def add_many(self, digests):
+        pos = self._positions_many(digests).ravel()
+        np.bitwise_or.at(self.bits, pos >> np.uint64(3), (1 << (pos & np.uint64(7))).astype(np.uint8))
+
+    def __contains__(self, digest):
+        view = self._view
+        return all(view[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(digest))
+
+    def contains_many(self, digests):
+        pos = self._positions_many(digests)
+        hit = (self.bits[pos >> np.uint64(3)] >> (pos & np.uint64(7)).astype(np.uint8)) & 1
+        return hit.all(axis=1)
+
+
+def _fanout(keys):
+    # keys: sorted (n, 32) uint8 array
+    prefixes = keys[:, 0].astype(np.int64) << 8 | keys[:, 1]
+    return np.cumsum(np.bincount(prefixes, minlength=FANOUT)).astype("<u8")
+
+
+def _write_sorted(path, key_blocks, count):
+    # key_blocks yields sorted, globally ordered (n, 32) uint8 blocks
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".dedup-")
+    fanout = np.zeros(FANOUT, dtype="<u8")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC + struct.pack("<Q", count))
+            f.write(b"\0" * (FANOUT * 8))
+            written = 0
+            for block in key_blocks:
+                fanout += _fanout(block)
+                f.write(block.tobytes())
+                written += len(block)
+            if written != count:
+                raise ValueError(f"expected {count} hashes, wrote {written}")
+            f.seek(HEADER_SIZE)
+            f.write(fanout.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _as_keys(digests):
+    if isinstance(digests, np.ndarray):
+        return digests.reshape(-1, HASH_SIZE)
+    return np.frombuffer(b"".join(digests), dtype=np.uint8).reshape(-1, HASH_SIZE)
+
+
+def _sort_unique(keys):
+    # Lexicographic sort of 32-byte keys via their big-endian 64-bit words
+    if not len(keys):
+        return keys
+    words = np.ascontiguousarray(keys).view(">u8").reshape(-1, 4)
+    order = np.lexsort(words.T[::-1])
+    keys = keys[order]
+    words = words[order]
+    keep = np.ones(len(keys), dtype=bool)
+    keep[1:] = (words[1:] != words[:-1]).any(axis=1)
+    return keys[keep]
+
+
+class WorkoutDedupIndex:
+    def __init__(self, path, expected_items=None, false_positive_rate=0.001):
+        self.path = path
+        self.pending = set()
+        self._false_positive_rate = false_positive_rate
+        if not os.path.exists(path):
+            _write_sorted(path, [], 0)
+        self._open()
+        self.bloom = BloomFilter(max(expected_items or 0, self.count * 2, 1024), false_positive_rate)
+        for block in self._blocks():
+            self.bloom.add_many(np.ascontiguousarray(block))
+
+    def _open(self):
+        with open(self.path, "rb") as f:
+            header = f.read(HEADER_SIZE)
+            if header[: len(MAGIC)] != MAGIC:
+                raise ValueError(f"{self.path} is not a workout dedup index")
+            self.count = struct.unpack("<Q", header[len(MAGIC):])[0]
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._fanout = np.frombuffer(self._mmap, dtype="<u8", count=FANOUT, offset=HEADER_SIZE)
+        self._keys = np.frombuffer(
+            self._mmap, dtype=np.uint8, count=self.count * HASH_SIZE, offset=DATA_OFFSET
+        ).reshape(-1, HASH_SIZE)
+
+    def close(self):
+        self._fanout = self._keys = None
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.flush()
+        self.close()
+
+    def __len__(self):
+        return self.count + len(self.pending)
+
+    def _blocks(self, block_size=1 << 20):
+        for start in range(0, self.count, block_size):
+            yield self._keys[start:start + block_size]
+
+    def _lower_bound(self, digest):
+        # Index of the first on-disk hash >= digest, searching only its bucket
+        prefix = digest[0] << 8 | digest[1]
+        lo = int(self._fanout[prefix - 1]) if prefix else 0
+        hi = int(self._fanout[prefix])
+        mm = self._mmap
+        while lo < hi:
+            mid = (lo + hi) // 2
+            offset = DATA_OFFSET + mid * HASH_SIZE
+            if mm[offset:offset + HASH_SIZE] < digest:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _on_disk(self, digest):
+        i = self._lower_bound(digest)
+        offset = DATA_OFFSET + i * HASH_SIZE
+        return i < self.count and self._mmap[offset:offset + HASH_SIZE] == digest
+
+    def __contains__(self, digest):
+        if digest not in self.bloom:
+            return False
+        return digest in self.pending or self._on_disk(digest)
+
+    def contains_many(self, digests):
+        keys = _as_keys(digests)
+        result = self.bloom.contains_many(keys)
+        for i in np.flatnonzero(result):
+            digest = keys[i].tobytes()
+            result[i] = digest in self.pending or self._on_disk(digest)
+        return result
+
+    def add(self, digest):
+        # Returns False if the workout was already processed
+        if digest in self:
+            return False
+        self.pending.add(digest)
+        self.bloom.add(digest)
+        return True
+
+    def flush(self, block_size=1 << 20):
+        # Stream-merge pending hashes into a new sorted file, replaced
+        # atomically; only one block of the old file is in memory at a time
+        if not self.pending:
+            return
+        new_keys = _sort_unique(_as_keys(list(self.pending)))
+        ranks = np.array([self._lower_bound(key.tobytes()) for key in new_keys], dtype=np.int64)
+
+        def blocks():
+            for start in range(0, max(self.count, 1), block_size):
+                end = min(start + block_size, self.count)
+                last = end == self.count
+                lo = np.searchsorted(ranks, start, side="left")
+                hi = len(ranks) if last else np.searchsorted(ranks, end, side="left")
+                yield np.insert(self._keys[start:end], ranks[lo:hi] - start, new_keys[lo:hi], axis=0)
+
+        _write_sorted(self.path + ".new", blocks(), self.count + len(new_keys))
+        self.close()
+        os.replace(self.path + ".new", self.path)
+        self.pending.clear()
+        self._open()
+
+    @classmethod
+    def rebuild(cls, path, digests, false_positive_rate=0.001, batch_size=1 << 20):
+        # Bulk build from an iterable of workout hashes (e.g. replayed from the
+        # submission log). Hashes are radix-partitioned on their first byte
+        # into temp files, then each partition is sorted in memory and appended,
+        # so memory is bounded by one partition rather than the whole log.
+        directory = os.path.dirname(os.path.abspath(path))
+        with tempfile.TemporaryDirectory(dir=directory, prefix=".dedup-rebuild-") as tmp:
+            parts = [open(os.path.join(tmp, f"{i:02x}"), "wb") for i in range(PARTITIONS)]
+            try:
+                batch = []
+                for digest in digests:
+                    batch.append(digest)
+                    if len(batch) >= batch_size:
+                        _partition(_as_keys(batch), parts)
+                        batch = []
+                if batch:
+                    _partition(_as_keys(batch), parts)
+            finally:
+                for f in parts:
+                    f.close()
+
+            sorted_parts = []
+            count = 0
+            for i in range(PARTITIONS):
+                part_path = os.path.join(tmp, f"{i:02x}")
+                keys = np.fromfile(part_path, dtype=np.uint8).reshape(-1, HASH_SIZE)
+                keys = _sort_unique(keys)
+                keys.tofile(part_path)
+                sorted_parts.append(part_path)
+                count += len(keys)
+
+            def blocks():
+                for part_path in sorted_parts:
+                    yield np.fromfile(part_path, dtype=np.uint8).reshape(-1, HASH_SIZE)
+
+            _write_sorted(path, blocks(), count)
+        return cls(path, false_positive_rate=false_positive_rate)
+
+
+def _partition(keys, parts):
+    order = np.argsort(keys[:, 0], kind="stable")
+    keys = keys[order]
+    bounds = np.searchsorted(keys[:, 0], np.arange(PARTITIONS + 1))
+    for i in range(PARTITIONS):
+        if bounds[i] != bounds[i + 1]:
+            parts[i].write(keys[bounds[i]:bounds[i + 1]].tobytes())
+
+
+if __name__ == "__main__":
+    print("=== FIXIE WORKOUT DEDUP INDEX ===")
+    print()
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    user = "0x" + "ab" * 20
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "processed.idx")
+
+        start = time.perf_counter()
+        index = WorkoutDedupIndex.rebuild(
+            path, (workout_hash(user, 5000 + i, 1800, 300, "running", 1_700_000_000 + i) for i in range(n))
+        )
+        print(f"Rebuilt {len(index):,} hashes in {time.perf_counter() - start:.2f}s")
+
+        seen = [workout_hash(user, 5000 + i, 1800, 300, "running", 1_700_000_000 + i) for i in range(0, n, 97)]
+        fresh = [workout_hash(user, 5000 + i, 1800, 300, "cycling", 1_700_000_000 + i) for i in range(0, n, 97)]
+
+        start = time.perf_counter()
+        assert all(h in index for h in seen)
+        hits = sum(h in index for h in fresh)
+        elapsed = time.perf_counter() - start
+        per_lookup = elapsed / (len(seen) + len(fresh)) * 1e6
+        print(f"Point lookups: {per_lookup:.1f} us each, {hits} false hits on fresh workouts")
+
+        start = time.perf_counter()
+        batch = index.contains_many(fresh + seen)
+        print(f"Batch lookup of {len(batch):,}: {time.perf_counter() - start:.3f}s")
+
+        for h in fresh[:1000]:
+            index.add(h)
+        index.flush()
+        assert all(h in index for h in fresh[:1000])
+        print(f"After flush: {len(index):,} hashes")
+        index.close()